@@ -1,14 +1,16 @@
 # Annie Kuo
 
-# IMPORT MODULE
+# IMPORT MODULES
 import doctest
+from file_io import *
 
 
 # DEFINE FUNCTIONS
 def get_iso_codes_by_continent(filename):
     """ (str) -> dict
 
-    The function takes as input a string representing a filename.
+    The function takes as input a string representing a filename,
+    which may be compressed.
     The function returns a dictionary mapping continents' names to
     a list of ISO codes of countries that belong to that continent.
     
@@ -55,7 +57,7 @@ def get_iso_codes_by_continent(filename):
     continents = {}
     
     # read the file
-    fobj= open(filename, "r", encoding= "UTF-8")
+    fobj= open_data_file(filename)
     
     # isolate the information in each line
     for line in fobj:
@@ -76,12 +78,43 @@ def get_iso_codes_by_continent(filename):
     return continents
 
 
-def add_continents_to_data(input_filename, continents_filename, output_filename):
-    """ (str, str, str) -> int
+def add_continent_to_line(line, countries_per_continent):
+    """ (str, dict) -> str
+
+    The function takes as input a single line of data and a dictionary mapping
+    continents' names to lists of ISO codes.
+    It returns the line with the continent(s) of its country inserted as the third column.
+
+    >>> d = {"ASIA": ["RUS", "QAT"], "EUROPE": ["RUS"]}
+    >>> add_continent_to_line("RUS\\tRussia\\t1971\\t1533.262\\t130831000", d)
+    'RUS\\tRussia\\tASIA,EUROPE\\t1971\\t1533.262\\t130831000'
+    >>> add_continent_to_line("QAT\\tQatar\\t2001\\t41.215\\t615000\\n", d)
+    'QAT\\tQatar\\tASIA\\t2001\\t41.215\\t615000\\n'
+    """
+    columns = line.split("\t")
+    
+    # find its continent(s)
+    iso_code = columns[0]
+    line_continent = []
+    
+    for continent in countries_per_continent:
+        if iso_code in countries_per_continent[continent]:
+            line_continent.append(continent)
+    
+    # add the continent(s) to the line of data
+    columns[2:2] = [",".join(line_continent)]
+    return "\t".join(columns)
+
+
+def add_continents_to_data(input_filename, continents_filename, output_filename,
+                           buffer_size=DEFAULT_BUFFER_SIZE):
+    """ (str, str, str, int) -> int
     
     The function takes as input three strings representing file names.
     It reads the input_filename, adds the continent of the corresponding countries and
     write the new version to ouput_filename.
+    Any of the files may be compressed (.gz, .bz2, .xz or .zst).
+    Lines are written in blocks of about buffer_size characters.
     The function returns an integer indicating the number of lines written to output_filename.
     
     >>> add_continents_to_data("small_clean_co2_data.tsv", "iso_codes_by_continent.tsv", "small_co2_data.tsv")
@@ -111,44 +144,13 @@ def add_continents_to_data(input_filename, continents_filename, output_filename)
     True
     >>> fobj.close()
     """
-    # initialize variables
-    num_of_lines = 0
-    new_lines = []
-    
     # retrieve a dictionary of countries per continent
     countries_per_continent = get_iso_codes_by_continent(continents_filename)
     
-    # read the input_filename
-    fobj= open(input_filename, "r", encoding= "UTF-8")
-    
-    # create a list of all the lines
-    for line in fobj:
-        new_lines.append(line)
-        
-    # modify the lines according to their continent
-    for index in range(len(new_lines)):
-        line = new_lines[index]
-        columns = line.split("\t")
-        
-        # find its continent(s)
-        iso_code = columns[0]
-        line_continent = []
-        
-        for continent in countries_per_continent:
-            if iso_code in countries_per_continent[continent]:
-                line_continent.append(continent)
-        
-        # add the continent(s) to the line of data
-        columns[2:2] = [",".join(line_continent)]
-        new_lines[index] = "\t".join(columns)
-        
-    fobj.close()
-    
-    # write the new output_filename
-    fobj= open(output_filename, "w", encoding= "UTF-8")
-    for line in new_lines:
-        fobj.write(line)
-        num_of_lines += 1
+    # read the input_filename and stream the modified lines to output_filename
+    fobj= open_data_file(input_filename)
+    new_lines = (add_continent_to_line(line, countries_per_continent) for line in fobj)
+    num_of_lines = write_lines(new_lines, output_filename, buffer_size)
     fobj.close()
     
     # return the number of lines
@@ -0,0 +1,323 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+from build_countries import *
+
+
+# DEFINE HELPER FUNCTIONS
+def get_country_series(country, metric):
+    """ (Country, str) -> YearSeries
+
+    The function returns the yearly data of a country for the metric, which is
+    either "co2" (in millions of tonnes) or "co2_per_capita" (in tonnes).
+    Per capita values only exist for years where both the co2 emissions and
+    the population are recorded and are not 0.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> q.add_yearly_data("1993\\t30.985\\t")
+    >>> get_country_series(q, "co2").years
+    [1993, 2007]
+    >>> s = get_country_series(q, "co2_per_capita")
+    >>> s.years
+    [2007]
+    >>> round(s.get(2007), 5)
+    51.64122
+    """
+    # in case the metric is the co2 emissions
+    if metric == "co2":
+        return country.get_co2_series()
+
+    # compute the per capita value of every year with the required data
+    per_capita = {}
+    for year, co2_emission in country.get_co2_series():
+        co2_per_capita = country.get_co2_per_capita_by_year(year)
+        if co2_per_capita is not None:
+            per_capita[year] = co2_per_capita
+    return YearSeries(per_capita)
+
+
+def get_continent_series(dict_by_iso_codes, metric):
+    """ (dict, str) -> dict
+
+    The function takes as input a dictionary mapping ISO codes to objects of type Country.
+    It returns a dictionary mapping every continent to a YearSeries of the metric
+    for all the countries in that continent, computed in a single pass over the countries.
+    The per capita value of a continent only uses the countries for which both
+    the co2 emissions and the population are recorded that year.
+
+    >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+    >>> r.add_yearly_data("2006\\t1500.0\\t")
+    >>> d = get_continent_series({"ALB": b, "RUS": r}, "co2")
+    >>> list(d["EUROPE"])
+    [(2006, 1500.0), (2007, 1608.702)]
+    >>> d = get_continent_series({"ALB": b, "RUS": r}, "co2_per_capita")
+    >>> round(d["EUROPE"].get(2007), 5)
+    92.98855
+    >>> d["ASIA"].years
+    [2007]
+    """
+    # initialize variables
+    co2_by_continent = {}
+    population_by_continent = {}
+
+    # add up the data of every country in its continent(s)
+    for iso_code in dict_by_iso_codes:
+        country = dict_by_iso_codes[iso_code]
+        for continent in country.continents:
+            if continent not in co2_by_continent:
+                co2_by_continent[continent] = {}
+                population_by_continent[continent] = {}
+            co2_totals = co2_by_continent[continent]
+            population_totals = population_by_continent[continent]
+
+            for year, co2_emission in country.co2_emissions.items():
+                # in case the per capita needs the population of the same year
+                if metric == "co2_per_capita":
+                    if year not in country.population:
+                        continue
+                    population_totals[year] = population_totals.get(year, 0) + country.population[year]
+                co2_totals[year] = co2_totals.get(year, 0.0) + co2_emission
+
+    # create the series of every continent
+    series_by_continent = {}
+    for continent in co2_by_continent:
+        co2_totals = co2_by_continent[continent]
+        if metric == "co2_per_capita":
+            population_totals = population_by_continent[continent]
+            per_capita = {}
+            for year in co2_totals:
+                if population_totals.get(year, 0) != 0:
+                    per_capita[year] = (co2_totals[year] * 10**6) / population_totals[year]
+            co2_totals = per_capita
+        series_by_continent[continent] = YearSeries(co2_totals)
+
+    # return the dictionary
+    return series_by_continent
+
+
+# DEFINE FUNCTIONS
+def get_growth_rates(series):
+    """ (YearSeries) -> dict
+
+    The function returns a dictionary mapping years to the growth rate of the series
+    compared with the previous year. A year is left out when the previous year is
+    missing or its value is 0.
+
+    >>> s = YearSeries({2000: 10.0, 2001: 12.0, 2003: 6.0, 2004: 3.0})
+    >>> get_growth_rates(s)
+    {2001: 0.2, 2004: -0.5}
+    """
+    growth_rates = {}
+    previous_year = None
+    previous_value = 0
+    for year, value in series:
+        # the previous year must be recorded and not be 0
+        if previous_year == year - 1 and previous_value != 0:
+            growth_rates[year] = (value - previous_value) / previous_value
+        previous_year = year
+        previous_value = value
+    return growth_rates
+
+
+def get_rolling_averages(series, window, min_years=None):
+    """ (YearSeries, int, int) -> dict
+
+    The function returns a dictionary mapping every year from the first to the last
+    year of the series to the average of the values recorded in the window of years
+    ending with that year. Missing years are not counted, and a year is left out when
+    fewer than min_years values are recorded in its window (by default, all of them
+    must be recorded).
+
+    >>> s = YearSeries({2000: 1.0, 2001: 2.0, 2002: 3.0, 2004: 5.0})
+    >>> get_rolling_averages(s, 2)
+    {2001: 1.5, 2002: 2.5}
+    >>> get_rolling_averages(s, 3, 2)
+    {2001: 1.5, 2002: 2.0, 2003: 2.5, 2004: 4.0}
+    """
+    return get_rolling_averages_by_window(series, (window,), min_years)[window]
+
+
+def get_rolling_averages_by_window(series, windows, min_years=None):
+    """ (YearSeries, tuple, int) -> dict
+
+    The function returns a dictionary mapping every window of the tuple to its
+    rolling averages (see get_rolling_averages), all computed in a single pass over
+    the years: each window only keeps the index of its first recorded year, and its
+    sum is the difference of two running cumulative sums (the prefix sums of the series).
+
+    >>> s = YearSeries({2000: 1.0, 2001: 2.0, 2002: 3.0, 2004: 5.0})
+    >>> get_rolling_averages_by_window(s, (1, 2))
+    {1: {2000: 1.0, 2001: 2.0, 2002: 3.0, 2004: 5.0}, 2: {2001: 1.5, 2002: 2.5}}
+    """
+    # initialize variables
+    rolling_averages = {}
+    starts = {}
+    for window in windows:
+        rolling_averages[window] = {}
+        starts[window] = 0
+    if len(series) == 0:
+        return rolling_averages
+    years = series.years
+    prefix_sums = series.prefix_sums
+    end = 0
+
+    for year in range(series.first_year(), series.last_year() + 1):
+        # the values recorded up to the year
+        if years[end] == year:
+            end += 1
+
+        # move the start of every window past the years that left it
+        for window in windows:
+            start = starts[window]
+            while years[start] <= year - window:
+                start += 1
+            starts[window] = start
+            required = window
+            if min_years is not None:
+                required = min_years
+            if end - start >= required:
+                rolling_averages[window][year] = (prefix_sums[end] - prefix_sums[start]) / (end - start)
+    return rolling_averages
+
+
+def get_cagr(series, start_year, end_year):
+    """ (YearSeries, int, int) -> float
+
+    The function returns the compound annual growth rate of the series between
+    start_year and end_year. It returns None if either year is missing or if the
+    value of start_year is not positive.
+
+    >>> s = YearSeries({2000: 100.0, 2002: 121.0})
+    >>> round(get_cagr(s, 2000, 2002), 5)
+    0.1
+    >>> print(get_cagr(s, 2000, 2001))
+    None
+    """
+    start_value = series.get(start_year, None)
+    end_value = series.get(end_year, None)
+    if start_value is None or end_value is None or start_value <= 0 or end_year <= start_year:
+        return None
+    return (end_value / start_value) ** (1 / (end_year - start_year)) - 1
+
+
+def get_analytics(dict_by_iso_codes, metric="co2", windows=(5, 10), cagr_years=None):
+    """ (dict, str, tuple, tuple) -> dict
+
+    The function takes as input a dictionary mapping ISO codes to objects of type Country.
+    It returns a dictionary with two keys: "countries" maps every Country object and
+    "continents" maps every continent to a dictionary of results for the metric.
+    Each result dictionary maps "growth" to the yearly growth rates,
+    "rolling_<window>" to the rolling averages of each window and "cagr" to the
+    compound annual growth rate between the two years of cagr_years (by default,
+    the first and last years recorded for that entity), or None (see get_cagr).
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2000, 10.0, 1000000)
+    >>> q.add_yearly_data("2001\\t11.0\\t1000000")
+    >>> a = get_analytics({"QAT": q}, "co2", (2,))
+    >>> a["countries"][q]["rolling_2"]
+    {2001: 10.5}
+    >>> round(a["continents"]["ASIA"]["growth"][2001], 5)
+    0.1
+    >>> round(a["countries"][q]["cagr"], 5)
+    0.1
+    >>> print(get_analytics({"QAT": q}, "co2", (2,), (1990, 2001))["continents"]["ASIA"]["cagr"])
+    None
+    """
+    # compute the results of every entity
+    analytics = {"countries": {}, "continents": {}}
+    for iso_code in dict_by_iso_codes:
+        country = dict_by_iso_codes[iso_code]
+        analytics["countries"][country] = get_series_analytics(get_country_series(country, metric),
+                                                               windows, cagr_years)
+    continent_series = get_continent_series(dict_by_iso_codes, metric)
+    for continent in continent_series:
+        analytics["continents"][continent] = get_series_analytics(continent_series[continent],
+                                                                  windows, cagr_years)
+
+    # return the results
+    return analytics
+
+
+def get_series_analytics(series, windows, cagr_years=None):
+    """ (YearSeries, tuple, tuple) -> dict
+
+    The function returns a dictionary mapping "growth" to the growth rates
+    of the series, "rolling_<window>" to its rolling averages and "cagr" to its
+    compound annual growth rate between the two years of cagr_years (by default,
+    its first and last years), or None if it cannot be computed.
+
+    >>> r = get_series_analytics(YearSeries({2000: 1.0, 2001: 3.0}), (2,))
+    >>> r["growth"]
+    {2001: 2.0}
+    >>> r["rolling_2"]
+    {2001: 2.0}
+    >>> r["cagr"]
+    2.0
+    >>> print(get_series_analytics(YearSeries({}), (2,))["cagr"])
+    None
+    """
+    results = {"growth": get_growth_rates(series)}
+    rolling_averages = get_rolling_averages_by_window(series, windows)
+    for window in windows:
+        results["rolling_" + str(window)] = rolling_averages[window]
+
+    # the compound annual growth rate over the years recorded unless others are given
+    results["cagr"] = None
+    if cagr_years is not None:
+        results["cagr"] = get_cagr(series, cagr_years[0], cagr_years[1])
+    elif len(series) > 0:
+        results["cagr"] = get_cagr(series, series.first_year(), series.last_year())
+    return results
+
+
+def get_values_by_year(results_by_entity, kind, year):
+    """ (dict, str, int) -> dict
+
+    The function takes as input the "countries" or "continents" dictionary returned
+    by get_analytics, the kind of yearly result (e.g. "growth" or "rolling_5") and a year.
+    It returns a dictionary mapping every entity with a value that year to that
+    value. The values of countries can be ranked with Country.get_top_n, and
+    those of continents with get_top_n_continents.
+
+    >>> a = Country("AFG", "Afghanistan", ["ASIA"], 2000, 1.0, 100)
+    >>> a.add_yearly_data("2001\\t3.0\\t100")
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2000, 10.0, 1000000)
+    >>> q.add_yearly_data("2001\\t11.0\\t1000000")
+    >>> results = get_analytics({"AFG": a, "QAT": q}, "co2")["countries"]
+    >>> Country.get_top_n(get_values_by_year(results, "growth", 2001), 1)
+    [('AFG', 2.0)]
+    """
+    values = {}
+    for entity in results_by_entity:
+        if year in results_by_entity[entity][kind]:
+            values[entity] = results_by_entity[entity][kind][year]
+    return values
+
+
+def get_top_n_continents(values, n):
+    """ (dict, int) -> list
+
+    The function takes as input a dictionary mapping continents to numbers, such as
+    the values of continents returned by get_values_by_year, and an integer.
+    It returns the list of (continent, number) tuples of the n largest numbers,
+    with ties in alphabetical order, as Country.get_top_n does for countries.
+
+    >>> b = Country("ALB", "Albania", ["EUROPE"], 2000, 1.0, 100)
+    >>> b.add_yearly_data("2001\\t3.0\\t100")
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2000, 10.0, 1000000)
+    >>> q.add_yearly_data("2001\\t11.0\\t1000000")
+    >>> results = get_analytics({"ALB": b, "QAT": q}, "co2")["continents"]
+    >>> get_top_n_continents(get_values_by_year(results, "growth", 2001), 2)
+    [('EUROPE', 2.0), ('ASIA', 0.1)]
+    >>> get_top_n_continents({"ASIA": 1.0, "AFRICA": 1.0, "EUROPE": 0.5}, 2)
+    [('AFRICA', 1.0), ('ASIA', 1.0)]
+    """
+    continents = sorted(values, key=lambda continent: (-values[continent], continent))
+    return [(continent, values[continent]) for continent in continents[ : n]]
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
@@ -0,0 +1,170 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import tempfile
+import time
+from file_io import *
+from build_countries import *
+
+
+# DEFINE HELPER FUNCTIONS
+def make_sample_lines(num_of_lines):
+    """ (int) -> list
+
+    The function returns a list of num_of_lines lines of data shaped like
+    the clean co2 data, to be used as benchmark input.
+
+    >>> lines = make_sample_lines(3)
+    >>> len(lines)
+    3
+    >>> lines[0]
+    'AFG\\tAfghanistan\\tASIA\\t1750\\t0.015\\t7663783\\n'
+    """
+    lines = []
+    for index in range(num_of_lines):
+        year = 1750 + index % 270
+        lines.append("AFG\tAfghanistan\tASIA\t" + str(year) + "\t0.015\t7663783\n")
+    return lines
+
+
+def write_line_by_line(lines, output_filename):
+    """ (list, str) -> int
+
+    The function writes the lines one call at a time, the way the cleaning
+    stages used to, and returns the number of lines written.
+
+    >>> write_line_by_line(["a\\n", "b\\n"], "bench_test1.txt")
+    2
+    """
+    num_of_lines = 0
+    fobj= open(output_filename, "w", encoding= "UTF-8")
+    for line in lines:
+        fobj.write(line)
+        num_of_lines += 1
+    fobj.close()
+    return num_of_lines
+
+
+# DEFINE FUNCTIONS
+def benchmark_write_lines(num_of_lines=200000, buffer_sizes=(2 ** 12, 2 ** 16, 2 ** 20)):
+    """ (int, tuple) -> list
+
+    The function measures the write throughput of the line by line writer
+    against write_lines for every buffer size in buffer_sizes, with and
+    without writelines.
+    It returns a list of tuples (label, seconds, megabytes per second).
+
+    >>> results = benchmark_write_lines(1000, (2 ** 12,))
+    >>> len(results)
+    3
+    >>> results[0][0]
+    'line by line'
+    """
+    # initialize variables
+    results = []
+    lines = make_sample_lines(num_of_lines)
+    num_of_bytes = sum(len(line) for line in lines)
+
+    # write to a temporary directory removed afterwards
+    with tempfile.TemporaryDirectory() as directory:
+        output_filename = os.path.join(directory, "bench.tsv")
+
+        # create the list of writers to compare
+        writers = [("line by line", lambda: write_line_by_line(lines, output_filename))]
+        for buffer_size in buffer_sizes:
+            label = "write_lines " + str(buffer_size)
+            writers.append((label, lambda size=buffer_size:
+                            write_lines(iter(lines), output_filename, size)))
+            writers.append((label + " writelines", lambda size=buffer_size:
+                            write_lines(iter(lines), output_filename, size, True)))
+
+        # time every writer
+        for label, writer in writers:
+            start = time.perf_counter()
+            writer()
+            seconds = time.perf_counter() - start
+            results.append((label, seconds, num_of_bytes / seconds / 10**6))
+
+    return results
+
+
+def benchmark_render(input_filename, year, formats=("png", "svg"), dpis=(72, 100),
+                     optimization_levels=(0, 1, 2)):
+    """ (str, int, tuple, tuple, tuple) -> list
+
+    The function renders the four bar charts of the year from a data file with
+    continents into memory, once for every combination of format, dpi and
+    optimization level (metadata is always stripped). The dpi of vector formats
+    only matters for rasterized content.
+    It returns a list of tuples (label, seconds, total size in kilobytes).
+
+    >>> fobj = open("render_test1.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tQatar\\tASIA\\t2001\\t41.215\\t615000\\n")
+    34
+    >>> fobj.close()
+    >>> results = benchmark_render("render_test1.tsv", 2001, ("png",), (50,), (0,))
+    >>> [label for label, seconds, size in results]
+    ['png 50 dpi level 0']
+    """
+    # matplotlib is only needed to render charts
+    from plot_data import OutputSpec, get_bar_co2_pc_by_continent, get_bar_historical_co2_by_continent, \
+         get_bar_co2_pc_top_ten, get_bar_top_ten_historical_co2, plt
+
+    # initialize variables
+    results = []
+    dict_by_iso_codes = get_countries_from_file(input_filename)
+    chart_functions = [get_bar_co2_pc_by_continent, get_bar_historical_co2_by_continent,
+                       get_bar_co2_pc_top_ten, get_bar_top_ten_historical_co2]
+
+    # time every combination of settings
+    for image_format in formats:
+        for dpi in dpis:
+            for optimization_level in optimization_levels:
+                output = OutputSpec(None, image_format, dpi, optimization_level, True)
+                start = time.perf_counter()
+                for chart_function in chart_functions:
+                    plt.figure()
+                    chart_function(dict_by_iso_codes, year, output)
+                    plt.close()
+                seconds = time.perf_counter() - start
+                size = sum(len(image) for image in output.images.values())
+                label = image_format + " " + str(dpi) + " dpi level " + str(optimization_level)
+                results.append((label, seconds, size / 1000))
+
+    return results
+
+
+def print_results(results):
+    """ (list) -> NoneType
+
+    The function prints a table of benchmark results.
+
+    >>> print_results([("a", 0.5, 2.0)])
+    a                                      0.5000 s       2.00 MB/s
+    """
+    for label, seconds, throughput in results:
+        print(label.ljust(36), "%8.4f s" % seconds, "%10.2f MB/s" % throughput)
+
+
+def print_render_results(results):
+    """ (list) -> NoneType
+
+    The function prints a table of rendering benchmark results.
+
+    >>> print_render_results([("png 72 dpi level 0", 0.5, 20.0)])
+    png 72 dpi level 0                     0.5000 s      20.00 kB
+    """
+    for label, seconds, size in results:
+        print(label.ljust(36), "%8.4f s" % seconds, "%10.2f kB" % size)
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
+    print_results(benchmark_write_lines())
+
+    # the rendering benchmark needs the data file with continents
+    if os.path.exists("large_co2_data.tsv"):
+        print_render_results(benchmark_render("large_co2_data.tsv", 2000))
@@ -1,10 +1,23 @@
 # Annie Kuo
 
-# IMPORT MODULE
+# IMPORT MODULES
 import doctest
 import copy
+import re
+from itertools import islice
+from file_io import *
+from time_series import *
 
-# DEFINE HELPER FUNCTION
+
+# DEFINE CONSTANTS
+ISO_CODE_PATTERN = re.compile("[A-Z]{3}|OWID_KOS")
+FLOAT_PATTERN = re.compile(r"-?[0-9]+(\.[0-9]*)?([eE][-+]?[0-9]+)?")
+MIN_VALID_YEAR = 1700
+MAX_VALID_YEAR = 2100
+VALIDATION_BLOCK_SIZE = 10000
+
+
+# DEFINE HELPER FUNCTIONS
 def iso_is_valid(code):
     """ (str) -> bool
 
@@ -18,20 +31,114 @@ def iso_is_valid(code):
     False
     >>> iso_is_valid('OWID_KOS')
     True
+    >>> iso_is_valid('RU')
+    False
+    """
+    # the code is either 3 capital letters or the code of Kosovo
+    return ISO_CODE_PATTERN.fullmatch(code) is not None
+
+
+def validate_lines(lines, first_line_number=1, min_year=MIN_VALID_YEAR, max_year=MAX_VALID_YEAR):
+    """ (list, int, int, int) -> list
+
+    The function takes as input a list of lines of data with continents
+    (iso code, name, continents, year, co2 emission, population) and the line
+    number of the first line.
+    Every column is checked at once: each distinct ISO code is validated only once,
+    years must be integers between min_year and max_year, and co2 emissions and
+    populations must be numbers or empty.
+    It returns a list of tuples (line number, column, value, reason) describing
+    every problem found, sorted by line number.
+
+    >>> lines = ["ALB\\tAlbania\\tEUROPE\\t1991\\t4.283\\t3280000\\n"]
+    >>> lines.append("alb\\tAlbania\\tEUROPE\\t1992\\t\\t3247000\\n")
+    >>> lines.append("QAT\\tQatar\\tASIA\\t20O7\\tabc\\t1218000\\n")
+    >>> lines.append("QAT\\tQatar\\tASIA\\t1066\\t1.0\\t12.5")
+    >>> lines.append("QAT\\tQatar\\n")
+    >>> for error in validate_lines(lines, 10):
+    ...     print(error)
+    (11, 'iso_code', 'alb', 'invalid iso code')
+    (12, 'year', '20O7', 'invalid year')
+    (12, 'co2_emissions', 'abc', 'invalid number')
+    (13, 'year', '1066', 'year out of range')
+    (13, 'population', '12.5', 'invalid number')
+    (14, 'line', 'QAT\\tQatar', 'wrong number of columns')
+    
+    >>> validate_lines(lines[:1])
+    []
     """
-    if code == 'OWID_KOS':
-        return True
+    # initialize variables
+    errors = []
+    rows = []
+    line_numbers = []
     
-    # check if the code has 3 characters
-    elif len(code) != 3:
-        return False
+    # keep only the rows with the right number of columns
+    for index in range(len(lines)):
+        columns = lines[index].rstrip("\n").split("\t")
+        if len(columns) == 6:
+            rows.append(columns)
+            line_numbers.append(first_line_number + index)
+        else:
+            errors.append((first_line_number + index, "line", "\t".join(columns), "wrong number of columns"))
+    iso_codes, names, continents, years, co2_emissions, populations = zip(*rows) if rows else [()] * 6
     
-    # check if the characters are letters
-    for char in code:
-        if char not in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
-           return False
-        
-    return True
+    # check each distinct iso code only once
+    invalid_iso_codes = set()
+    for iso_code in set(iso_codes):
+        if not iso_is_valid(iso_code):
+            invalid_iso_codes.add(iso_code)
+    for index in range(len(iso_codes)):
+        if iso_codes[index] in invalid_iso_codes:
+            errors.append((line_numbers[index], "iso_code", iso_codes[index], "invalid iso code"))
+    
+    # check the years
+    for index in range(len(years)):
+        if not years[index].isdecimal():
+            errors.append((line_numbers[index], "year", years[index], "invalid year"))
+        elif not min_year <= int(years[index]) <= max_year:
+            errors.append((line_numbers[index], "year", years[index], "year out of range"))
+    
+    # check the numbers, which may be missing
+    for index in range(len(co2_emissions)):
+        if co2_emissions[index] != "" and FLOAT_PATTERN.fullmatch(co2_emissions[index]) is None:
+            errors.append((line_numbers[index], "co2_emissions", co2_emissions[index], "invalid number"))
+    for index in range(len(populations)):
+        if populations[index] != "" and not populations[index].isdecimal():
+            errors.append((line_numbers[index], "population", populations[index], "invalid number"))
+    
+    # return the errors in the order of the lines
+    errors.sort(key=lambda error: error[0])
+    return errors
+
+
+def validate_file(filename, min_year=MIN_VALID_YEAR, max_year=MAX_VALID_YEAR):
+    """ (str, int, int) -> list
+
+    The function validates a data file with continents one block of lines at a time
+    and returns the list of problems found, as described in validate_lines.
+
+    >>> fobj = open("validate_test1.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("ALB\\tAlbania\\tEUROPE\\t1991\\t4.283\\t3280000\\nRUSS\\tRussia\\tASIA\\t2000\\t1.0\\t1\\n")
+    66
+    >>> fobj.close()
+    >>> validate_file("validate_test1.tsv")
+    [(2, 'iso_code', 'RUSS', 'invalid iso code')]
+    """
+    # initialize variables
+    errors = []
+    line_number = 1
+    
+    # validate the file one block at a time
+    fobj= open_data_file(filename)
+    block = list(islice(fobj, VALIDATION_BLOCK_SIZE))
+    while block:
+        errors.extend(validate_lines(block, line_number, min_year, max_year))
+        line_number += len(block)
+        block = list(islice(fobj, VALIDATION_BLOCK_SIZE))
+    fobj.close()
+    
+    # return the errors
+    return errors
 
 
 
@@ -41,18 +148,16 @@ class Country:
     Represents a country.
     
     Instance attributes: iso_code (str), name (str), continents (list),
-                         co2_emissions (dict), population (dict)
-    Class attributes: min_year_recorded, max_year_recorded
+                         co2_emissions (dict), population (dict),
+                         co2_series (YearSeries), population_series (YearSeries)
     Instance methods: __str__, __lt__, add_yearly_data, get_co2_emissions_by_year,
-                      get_population_by_year, get_co2_per_capita_by_year, get_historical_co2
-    Class method: get_country_from_data
+                      get_population_by_year, get_co2_per_capita_by_year, get_historical_co2,
+                      get_co2_series, get_population_series, clear_series
+    Class methods: get_country_from_data, get_countries_from_columns
     Static methods: get_countries_by_continent, get_total_historical_co2_emissions,
                     get_total_co2_emissions_per_capita_by_year, get_co2_emissions_per_capita_by_year,
                     get_historical_co2_emissions, get_top_n
     """
-    min_year_recorded = float('inf')
-    max_year_recorded = float('-inf')
-    
     def __init__(self, iso_code, name, continents, year, co2_emissions, population):
         """ (Country, str, str, list, int, float, int) -> Country
         Creates an object of type Country with corresponding attributes.
@@ -67,9 +172,9 @@ class Country:
         >>> c.co2_emissions
         {2006: 1.553}
         
-        >>> a = Country("AFG", "Afghanistan", ["ASIA"], 1949, 0.015, 7663783)
-        >>> a.min_year_recorded
-        1949
+        >>> a = Country("AFG", "Afghanistan", ["ASIA"], 1949, -1, 7663783)
+        >>> a.co2_emissions, a.population
+        ({}, {1949: 7663783})
         """
         # check is the iso code is valid
         if iso_is_valid(iso_code):
@@ -92,11 +197,9 @@ class Country:
         else:
             self.population = {}
         
-        # update min and max year recorded if necessary
-        if year < Country.min_year_recorded:
-            Country.min_year_recorded = year
-        elif year > Country.max_year_recorded:
-            Country.max_year_recorded = year
+        # the year sorted series are built when first needed
+        self.co2_series = None
+        self.population_series = None
 
 
     def __str__(self):
@@ -155,7 +258,6 @@ class Country:
         """ (Country, str) -> NoneType
         
         The method updates the appropriate attributes of the country.
-        It also updates the min and max year recorded if necessary.
         
         >>> a = Country("AFG", "Afghanistan", ["ASIA"], 1949, 0.015, 7663783)
         >>> a.add_yearly_data("2018\\t9.439\\t37122000")
@@ -168,13 +270,11 @@ class Country:
         >>> r.add_yearly_data("2000\\t\\t1000000")
         >>> r.co2_emissions == {2007: 1604.778}
         True
-        >>> Country.min_year_recorded
-        1949
         
         >>> c = Country("COD", "Democratic Republic of Congo", ["AFRICA"], 2006, 1.553, 56578000)
         >>> c.add_yearly_data("1930\\t1.234\\t56000000")
-        >>> Country.min_year_recorded
-        1930
+        >>> c.population == {2006: 56578000, 1930: 56000000}
+        True
         """
         # separate the data into its category
         individual_data = data.split("\t")
@@ -188,12 +288,8 @@ class Country:
         if population != '' and population != '\n':
             self.population[year] = int(population)
         
-        # update the min and max year recorded if necessary
-        if year < Country.min_year_recorded:
-            Country.min_year_recorded = year
-        
-        elif year > Country.max_year_recorded:
-            Country.max_year_recorded = year
+        # the year sorted series are now out of date
+        self.clear_series()
 
 
     def get_co2_emissions_by_year(self, year):
@@ -328,20 +424,70 @@ class Country:
         >>> r.get_historical_co2(2020)
         0.0
         """
-        # initialize variable
-        historical_co2 = 0.0
+        # return the sum of the year sorted emissions up to that year
+        return self.get_co2_series().get_cumulative_sum(year)
+    
+    
+    def get_co2_series(self):
+        """ (Country) -> YearSeries
         
-        # retrieve all co2 emission data
-        co2_items = self.co2_emissions.items()
-        co2_data = list(co2_items)
+        The method returns the co2 emissions of the country as a YearSeries
+        sorted by year. The series is built once and reused until
+        add_yearly_data modifies the data, or clear_series is called.
         
-        # add relevant data to the sum
-        for data_year, emission in co2_data:
-            if data_year <= year:
-                historical_co2 += emission
-                
-        # return the sum
-        return historical_co2
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> q.add_yearly_data("1993\\t30.985\\t501000")
+        >>> q.get_co2_series().years
+        [1993, 2007]
+        >>> q.get_co2_series() is q.get_co2_series()
+        True
+        >>> q.add_yearly_data("1989\\t14.292\\t462000")
+        >>> q.get_co2_series().get_range(1980, 2000)
+        [(1989, 14.292), (1993, 30.985)]
+        """
+        # build the series if it is missing
+        if self.co2_series is None:
+            self.co2_series = YearSeries(self.co2_emissions)
+        return self.co2_series
+    
+    
+    def get_population_series(self):
+        """ (Country) -> YearSeries
+        
+        The method returns the population of the country as a YearSeries
+        sorted by year. The series is built once and reused until
+        add_yearly_data modifies the data, or clear_series is called.
+        
+        >>> c = Country("COD", "Democratic Republic of Congo", ["AFRICA"], 2006, 1.553, 56578000)
+        >>> c.add_yearly_data("1930\\t1.234\\t56000000")
+        >>> c.get_population_series().first_year()
+        1930
+        >>> c.get_population_series().get_gaps(1929, 1931)
+        [1929, 1931]
+        """
+        # build the series if it is missing
+        if self.population_series is None:
+            self.population_series = YearSeries(self.population)
+        return self.population_series
+    
+    
+    def clear_series(self):
+        """ (Country) -> NoneType
+        
+        The method forgets the year sorted series of the country. It must be
+        called after changing the co2_emissions or population dictionaries
+        directly, so that the series are built again from the new data.
+        
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> q.get_historical_co2(2007)
+        62.899
+        >>> q.co2_emissions[2007] = 63.0
+        >>> q.clear_series()
+        >>> q.get_historical_co2(2007)
+        63.0
+        """
+        self.co2_series = None
+        self.population_series = None
         
     
     @classmethod
@@ -389,6 +535,76 @@ class Country:
         return cls(iso_code, name, continents, year, co2_emissions, population)
     
     
+    @classmethod
+    def get_countries_from_columns(cls, iso_codes, names, continents, years,
+                                   co2_emissions, populations, dict_by_iso_codes=None):
+        """ (list, list, list, list, list, list, dict) -> dict
+        
+        The method takes as input six lists of the same length holding the
+        pre-parsed columns of the data: ISO codes, names, lists of continents,
+        years, co2 emissions and populations (None when missing).
+        It returns a dictionary mapping ISO codes to Country objects holding the data,
+        grouped in a single pass. Each ISO code is validated once, when its Country
+        object is created.
+        If dict_by_iso_codes is given, the data is added to it instead of a new dictionary.
+        
+        >>> d = Country.get_countries_from_columns(["QAT", "QAT", "RUS"], ["Qatar", "Qatar", "Russia"],
+        ...     [["ASIA"], ["ASIA"], ["ASIA", "EUROPE"]], [2007, 1993, 1971],
+        ...     [62.899, None, 1533.262], [1218000, 501000, None])
+        >>> str(d["QAT"])
+        'Qatar\\tASIA\\t{2007: 62.899}\\t{2007: 1218000, 1993: 501000}'
+        >>> str(d["RUS"])
+        'Russia\\tASIA,EUROPE\\t{1971: 1533.262}\\t{}'
+        
+        >>> d = Country.get_countries_from_columns(["QAT"], ["Qatar"], [["ASIA"]], [1989], [14.292], [462000], d)
+        >>> d["QAT"].get_historical_co2(2000)
+        14.292
+        
+        >>> d = Country.get_countries_from_columns(["RUSS"], ["Russia"], [["ASIA"]], [1971], [None], [None])
+        Traceback (most recent call last):
+        AssertionError
+        """
+        # initialize variables
+        if dict_by_iso_codes is None:
+            dict_by_iso_codes = {}
+        country = None
+        
+        # group the rows by country
+        for index in range(len(iso_codes)):
+            iso_code = iso_codes[index]
+            year = years[index]
+            
+            # in case the row belongs to another country than the previous one
+            if country is None or country.iso_code != iso_code:
+                # in case there is no Country object associated with such country
+                if iso_code not in dict_by_iso_codes:
+                    country = cls.__new__(cls)
+                    if not iso_is_valid(iso_code):
+                        raise AssertionError
+                    country.iso_code = iso_code
+                    country.name = names[index]
+                    country.continents = copy.copy(continents[index])
+                    country.co2_emissions = {}
+                    country.population = {}
+                    dict_by_iso_codes[iso_code] = country
+                else:
+                    country = dict_by_iso_codes[iso_code]
+                
+                # the year sorted series will be out of date
+                country.clear_series()
+                co2_by_year = country.co2_emissions
+                population_by_year = country.population
+            
+            # add the data of that year
+            if co2_emissions[index] is not None:
+                co2_by_year[year] = co2_emissions[index]
+            if populations[index] is not None:
+                population_by_year[year] = populations[index]
+        
+        # return the dictionary
+        return dict_by_iso_codes
+    
+    
     @staticmethod
     def get_countries_by_continent(countries):
         """ (list) -> dict
@@ -741,12 +957,119 @@ class Country:
         
        
 # DEFINE FUNCTION
-def get_countries_from_file(filename):
-    """ (str) -> dict
+def get_columns_from_lines(lines, known_iso_codes, skipped_indexes=()):
+    """ (list, set, set) -> tuple
+    
+    The function takes as input a list of lines of data with continents and
+    the set of ISO codes already seen (which is updated).
+    It returns a tuple of six lists: ISO codes, names, lists of continents,
+    years, co2 emissions and populations, with None for missing numbers.
+    Lines whose index is in skipped_indexes are left out.
+    As with get_country_from_data, numbers that cannot be read on the first
+    line of a country are treated as missing.
+    
+    >>> lines = ["QAT\\tQatar\\tASIA\\t2007\\t62.899\\t1218000\\n", "QAT\\tQatar\\tASIA\\t1993\\t\\t\\n"]
+    >>> columns = get_columns_from_lines(lines, set())
+    >>> columns[3:]
+    ([2007, 1993], [62.899, None], [1218000, None])
+    >>> get_columns_from_lines(lines, set(), {0})[0]
+    ['QAT']
+    >>> get_columns_from_lines(["QAT\\tQatar\\tASIA\\t2007\\tn/a\\t1218000"], set())[4]
+    [None]
+    """
+    # separate every line into columns
+    if skipped_indexes:
+        lines = [lines[index] for index in range(len(lines)) if index not in skipped_indexes]
+    rows = [line.split("\t") for line in lines]
+    
+    # convert the text columns, splitting each distinct continents string once
+    iso_codes = [row[0] for row in rows]
+    names = [row[1] for row in rows]
+    continents_by_string = {}
+    for string in set(row[2] for row in rows):
+        continents_by_string[string] = string.split(",")
+    continents = [continents_by_string[row[2]] for row in rows]
+    years = [int(row[3]) for row in rows]
     
-    The function takes as input a string representing a filename.
+    # convert the number columns, where empty means missing
+    try:
+        co2_emissions = [None if row[4] == '' else float(row[4]) for row in rows]
+        populations = [None if row[5] == '' or row[5] == '\n' else int(row[5]) for row in rows]
+    # in case some numbers cannot be read, convert them one by one
+    except ValueError:
+        co2_emissions, populations = get_numbers_from_rows(rows, known_iso_codes)
+    known_iso_codes.update(iso_codes)
+    
+    # return the columns
+    return iso_codes, names, continents, years, co2_emissions, populations
+
+
+def get_numbers_from_rows(rows, known_iso_codes):
+    """ (list, set) -> tuple
+    
+    The function takes as input a list of rows of data separated into columns and
+    the set of ISO codes seen before these rows.
+    It returns the lists of co2 emissions and populations of the rows. As with
+    get_country_from_data, numbers that cannot be read on the first line of a
+    country are treated as missing; on later lines a ValueError is raised, as
+    with add_yearly_data.
+    
+    >>> rows = [["QAT", "Qatar", "ASIA", "2007", "n/a", "1218000\\n"], ["QAT", "Qatar", "ASIA", "1993", "", "\\n"]]
+    >>> get_numbers_from_rows(rows, set())
+    ([None, None], [1218000, None])
+    >>> get_numbers_from_rows(rows, {"QAT"})
+    Traceback (most recent call last):
+    ValueError: could not convert string to float: 'n/a'
+    """
+    # initialize variables
+    co2_emissions = []
+    populations = []
+    known_iso_codes = set(known_iso_codes)
+    
+    for row in rows:
+        co2_emission = row[4]
+        population = row[5]
+        
+        # in case it is the first line of that country
+        if row[0] not in known_iso_codes:
+            known_iso_codes.add(row[0])
+            try:
+                co2_emission = float(co2_emission)
+            except ValueError:
+                co2_emission = None
+            try:
+                population = int(population)
+            except ValueError:
+                population = None
+        
+        # in case the country was already seen
+        else:
+            if co2_emission == '':
+                co2_emission = None
+            else:
+                co2_emission = float(co2_emission)
+            if population == '' or population == '\n':
+                population = None
+            else:
+                population = int(population)
+        
+        co2_emissions.append(co2_emission)
+        populations.append(population)
+    
+    # return the numbers
+    return co2_emissions, populations
+
+
+def get_countries_from_file(filename, errors=None):
+    """ (str, list) -> dict
+    
+    The function takes as input a string representing a filename,
+    which may be compressed (.gz, .bz2, .xz or .zst).
     It returns a dictionary mapping ISO country codes to objects of type Country
     base on the data in the file.
+    If errors is a list, every line is first validated with validate_lines:
+    the problems found are added to errors and the invalid lines are skipped
+    instead of stopping the whole load.
     
     >>> d1 = get_countries_from_file("small_co2_data.tsv")
     >>> len(d1)
@@ -764,31 +1087,51 @@ def get_countries_from_file(filename):
     >>> str(d2['TUR'])
     'Turkey\\tASIA,EUROPE\\t{1900: 1.037}\\t{1900: 14030306}'
     
+    >>> fobj = open_data_file("continent_test5.txt.gz", "w")
+    >>> fobj.write('QAT\\tQatar\\tASIA\\t2007\\t62.899\\t1218000')
+    34
+    >>> fobj.close()
+    >>> str(get_countries_from_file("continent_test5.txt.gz")['QAT'])
+    'Qatar\\tASIA\\t{2007: 62.899}\\t{2007: 1218000}'
+    
+    >>> fobj = open("continent_test6.txt", "w", encoding= "UTF-8")
+    >>> fobj.write('RUSS\\tRussia\\tASIA\\t1971\\t1533.262\\t130831000\\nQAT\\tQatar\\tASIA\\t2007\\t62.899\\t1218000')
+    75
+    >>> fobj.close()
+    >>> errors = []
+    >>> list(get_countries_from_file("continent_test6.txt", errors))
+    ['QAT']
+    >>> errors
+    [(1, 'iso_code', 'RUSS', 'invalid iso code')]
+    
     >>> d3 = get_countries_from_file("large_co2_data.tsv")
     >>> len(d3['SEN'].co2_emissions)
     61
     >>> len(d3['CUB'].co2_emissions)
     78
     """
-    # initialize an empty dictionary
+    # initialize variables
     dict_by_iso_codes = {}
+    known_iso_codes = set()
+    line_number = 1
+    invalid_indexes = set()
     
-    # read the file
-    fobj= open(filename, "r", encoding= "UTF-8")
-    
-    # update dictionary according to the data found on its line
-    for line in fobj:
-        # separate the data into columns
-        columns = line.split("\t")
-        
-        # in case there is already a Country object associated with such country
-        if columns[0] in dict_by_iso_codes:
-            country = dict_by_iso_codes[columns[0]]
-            country.add_yearly_data("\t".join(columns[3 : ]))
-        # in case there is no Country object associated with such country
-        else:
-            new_country = Country.get_country_from_data(line)
-            dict_by_iso_codes[new_country.iso_code] = new_country
+    # read the file one block of lines at a time
+    fobj= open_data_file(filename)
+    block = list(islice(fobj, VALIDATION_BLOCK_SIZE))
+    while block:
+        # validate the whole block at once if requested
+        if errors is not None:
+            block_errors = validate_lines(block, line_number)
+            errors.extend(block_errors)
+            invalid_indexes = {error[0] - line_number for error in block_errors}
+        
+        # update dictionary with the columns of the whole block
+        columns = get_columns_from_lines(block, known_iso_codes, invalid_indexes)
+        Country.get_countries_from_columns(*columns, dict_by_iso_codes)
+        
+        line_number += len(block)
+        block = list(islice(fobj, VALIDATION_BLOCK_SIZE))
     
     # close the file and return the dictionary
     fobj.close()    
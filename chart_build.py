@@ -0,0 +1,311 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import json
+import hashlib
+import multiprocessing
+from bisect import bisect_right
+from plot_data import *
+
+
+# DEFINE CONSTANTS
+# the version of the charts must be increased whenever the way they are drawn changes
+CHARTS_VERSION = 1
+# maps the name of every kind of yearly chart to its function and to whether
+# it depends on all the earlier years (True) or on its own year only (False)
+YEARLY_CHARTS = {"co2_pc_by_continent": (get_bar_co2_pc_by_continent, False),
+                 "hist_co2_by_continent": (get_bar_historical_co2_by_continent, True),
+                 "top_10_co2_pc": (get_bar_co2_pc_top_ten, False),
+                 "top_10_hist_co2": (get_bar_top_ten_historical_co2, True)}
+# the manifest is saved after every group of this many charts, so that an
+# interrupted build does not have to create them again
+MANIFEST_SAVE_INTERVAL = 50
+# the data used by the processes rendering charts in parallel
+worker_data = {}
+
+
+# DEFINE HELPER FUNCTIONS
+def get_year_digests(dict_by_iso_codes):
+    """ (dict) -> dict
+
+    The function takes as input a dictionary mapping ISO codes to objects of type Country.
+    It returns a dictionary mapping every year with data to a digest of all the data
+    recorded that year: the ISO code, name, continents, co2 emissions and population
+    of every country, in order of ISO code.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 41.215, 615000)
+    >>> q.add_yearly_data("2002\\t46.0\\t")
+    >>> d1 = get_year_digests({"QAT": q})
+    >>> sorted(d1)
+    [2001, 2002]
+    >>> q.add_yearly_data("2002\\t47.0\\t")
+    >>> d2 = get_year_digests({"QAT": q})
+    >>> d1[2001] == d2[2001], d1[2002] == d2[2002]
+    (True, False)
+    """
+    # gather the rows of every year
+    rows_by_year = {}
+    for iso_code in sorted(dict_by_iso_codes):
+        country = dict_by_iso_codes[iso_code]
+        prefix = iso_code + "\t" + country.name + "\t" + ",".join(country.continents)
+        for year in set(country.co2_emissions) | set(country.population):
+            row = prefix + "\t" + repr(country.co2_emissions.get(year)) + "\t" + repr(country.population.get(year))
+            rows_by_year.setdefault(year, []).append(row)
+
+    # compute the digest of every year
+    year_digests = {}
+    for year in rows_by_year:
+        year_digests[year] = hashlib.sha256("\n".join(rows_by_year[year]).encode("UTF-8")).hexdigest()
+    return year_digests
+
+
+def get_cumulative_digests(year_digests):
+    """ (dict) -> dict
+
+    The function takes as input a dictionary mapping years to digests and returns
+    a dictionary mapping every year to a digest of the digests of that year and
+    of all the earlier years, computed in a single pass.
+
+    >>> c1 = get_cumulative_digests({2000: "a", 2001: "b", 2002: "c"})
+    >>> c2 = get_cumulative_digests({2000: "a", 2001: "x", 2002: "c"})
+    >>> c1[2000] == c2[2000], c1[2001] == c2[2001], c1[2002] == c2[2002]
+    (True, False, False)
+    """
+    cumulative_digests = {}
+    digest = hashlib.sha256()
+    for year in sorted(year_digests):
+        digest.update((str(year) + "\t" + year_digests[year] + "\n").encode("UTF-8"))
+        cumulative_digests[year] = digest.hexdigest()
+    return cumulative_digests
+
+
+def get_chart_keys(dict_by_iso_codes, years, output=None):
+    """ (dict, list, OutputSpec) -> dict
+
+    The function returns a dictionary mapping the name of every yearly chart of
+    the years to a key identifying the data it is computed from and how it is
+    saved (format, dpi, optimization level and metadata of the output spec).
+    The key of a chart of historical emissions covers the data of all the earlier years,
+    and the key of a chart by continent also covers the continents of the whole dataset,
+    since every continent has a bar even without data that year.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 41.215, 615000)
+    >>> q.add_yearly_data("2002\\t46.0\\t")
+    >>> k1 = get_chart_keys({"QAT": q}, [2001, 2002, 2003])
+    >>> len(k1)
+    12
+    >>> q.add_yearly_data("2001\\t40.0\\t615000")
+    >>> k2 = get_chart_keys({"QAT": q}, [2001, 2002, 2003])
+    >>> sorted(name for name in k1 if k1[name] != k2[name])
+    ['co2_pc_by_continent_2001', 'hist_co2_by_continent_2001', 'hist_co2_by_continent_2002', 'hist_co2_by_continent_2003', 'top_10_co2_pc_2001', 'top_10_hist_co2_2001', 'top_10_hist_co2_2002', 'top_10_hist_co2_2003']
+    >>> k3 = get_chart_keys({"QAT": q}, [2001], OutputSpec(".", "png", 200))
+    >>> k3["top_10_co2_pc_2001"] == k2["top_10_co2_pc_2001"]
+    False
+    >>> z = Country("ZAF", "South Africa", ["AFRICA"], 2003, 400.0, 46000000)
+    >>> k4 = get_chart_keys({"QAT": q, "ZAF": z}, [2001, 2002, 2003])
+    >>> sorted(name for name in k2 if name.endswith("2001") and k2[name] != k4[name])
+    ['co2_pc_by_continent_2001', 'hist_co2_by_continent_2001']
+    """
+    # initialize variables
+    if output is None:
+        output = OutputSpec()
+    settings = [output.format, output.dpi, output.optimization_level, output.strip_metadata]
+    settings = "\t".join(str(setting) for setting in settings)
+    all_continents = set()
+    for iso_code in dict_by_iso_codes:
+        all_continents.update(dict_by_iso_codes[iso_code].continents)
+    continents = ",".join(sorted(all_continents))
+    year_digests = get_year_digests(dict_by_iso_codes)
+    cumulative_digests = get_cumulative_digests(year_digests)
+    recorded_years = sorted(cumulative_digests)
+    chart_keys = {}
+
+    for year in years:
+        # the data of the year, and of all the years up to it
+        year_digest = year_digests.get(year, "")
+        index = bisect_right(recorded_years, year)
+        cumulative_digest = ""
+        if index > 0:
+            cumulative_digest = cumulative_digests[recorded_years[index - 1]]
+
+        # compute the key of every kind of chart
+        for kind in YEARLY_CHARTS:
+            chart_function, is_historical = YEARLY_CHARTS[kind]
+            digest = year_digest
+            if is_historical:
+                digest = cumulative_digest
+            if kind.endswith("_by_continent"):
+                digest = continents + "\t" + digest
+            key = kind + "\t" + str(year) + "\t" + str(CHARTS_VERSION) + "\t" + settings + "\t" + digest
+            chart_keys[kind + "_" + str(year)] = hashlib.sha256(key.encode("UTF-8")).hexdigest()
+
+    return chart_keys
+
+
+def load_manifest(manifest_filename):
+    """ (str) -> dict
+
+    The function returns the dictionary stored in a JSON manifest file,
+    or an empty dictionary if the file does not exist.
+
+    >>> load_manifest("missing_manifest.json")
+    {}
+    """
+    if not os.path.exists(manifest_filename):
+        return {}
+    fobj= open(manifest_filename, "r", encoding= "UTF-8")
+    manifest = json.load(fobj)
+    fobj.close()
+    return manifest
+
+
+def save_manifest(manifest, manifest_filename):
+    """ (dict, str) -> NoneType
+
+    The function writes the dictionary to a JSON manifest file. It writes to
+    a temporary file first so that a partial manifest is never read.
+
+    >>> save_manifest({"top_10_co2_pc_2001": "abc"}, "manifest_test1.json")
+    >>> load_manifest("manifest_test1.json")
+    {'top_10_co2_pc_2001': 'abc'}
+    """
+    fobj= open(manifest_filename + ".tmp", "w", encoding= "UTF-8")
+    json.dump(manifest, fobj, indent=0, sort_keys=True)
+    fobj.close()
+    os.replace(manifest_filename + ".tmp", manifest_filename)
+
+
+def get_chart_filename(fig_name, output=None):
+    """ (str, OutputSpec) -> str
+
+    The function returns the name of the file a chart is saved to, or None
+    if the output spec keeps charts in memory.
+
+    >>> get_chart_filename("top_10_co2_pc_2001")
+    'top_10_co2_pc_2001.png'
+    >>> print(get_chart_filename("top_10_co2_pc_2001", OutputSpec(None)))
+    None
+    """
+    if output is None:
+        return fig_name + ".png"
+    if output.directory is None:
+        return None
+    return output.get_filename(fig_name)
+
+
+def set_worker_data(dict_by_iso_codes, output):
+    """ (dict, OutputSpec) -> NoneType
+
+    The function keeps the data and the output spec used by render_chart
+    in the current process.
+
+    >>> set_worker_data({}, None)
+    >>> worker_data
+    {'dict_by_iso_codes': {}, 'output': None}
+    """
+    worker_data["dict_by_iso_codes"] = dict_by_iso_codes
+    worker_data["output"] = output
+
+
+def render_chart(chart):
+    """ (tuple) -> tuple
+
+    The function takes as input a tuple (kind, year) and creates the chart of
+    that kind for the year from the data set by set_worker_data.
+    It returns the input tuple.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 41.215, 615000)
+    >>> set_worker_data({"QAT": q}, OutputSpec(None))
+    >>> render_chart(("top_10_co2_pc", 2001))
+    ('top_10_co2_pc', 2001)
+    """
+    kind, year = chart
+    chart_function = YEARLY_CHARTS[kind][0]
+    plt.figure()
+    chart_function(worker_data["dict_by_iso_codes"], year, worker_data["output"])
+    plt.close()
+    return chart
+
+
+# DEFINE FUNCTION
+def build_charts(dict_by_iso_codes, years, manifest_filename, output=None, kinds=None, jobs=1):
+    """ (dict, list, str, OutputSpec, list, int) -> list
+
+    The function creates the yearly charts of every kind in kinds (by default,
+    all the kinds of YEARLY_CHARTS) for every year, skipping the charts whose
+    data has not changed since they were last created, according to the
+    manifest file. Charts whose file is missing are always created.
+    Changing the format or dpi of output also creates the charts again.
+    If jobs is more than 1, charts are created by that many processes; charts
+    kept in memory are always created by the current process.
+    It returns the sorted list of the names of the charts created.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 41.215, 615000)
+    >>> q.add_yearly_data("2002\\t46.0\\t650000")
+    >>> d = {"QAT": q}
+    >>> o = OutputSpec("build_test1", "svg")
+    >>> if os.path.exists("build_test1.json"): os.remove("build_test1.json")
+    >>> len(build_charts(d, [2001, 2002], "build_test1.json", o))
+    8
+    >>> build_charts(d, [2001, 2002], "build_test1.json", o)
+    []
+    >>> q.add_yearly_data("2002\\t47.0\\t650000")
+    >>> build_charts(d, [2001, 2002], "build_test1.json", o)
+    ['co2_pc_by_continent_2002', 'hist_co2_by_continent_2002', 'top_10_co2_pc_2002', 'top_10_hist_co2_2002']
+    >>> q.add_yearly_data("2001\\t40.0\\t615000")
+    >>> build_charts(d, [2001, 2002], "build_test1.json", o, ["top_10_co2_pc", "top_10_hist_co2"], 2)
+    ['top_10_co2_pc_2001', 'top_10_hist_co2_2001', 'top_10_hist_co2_2002']
+    >>> build_charts(d, [2001], "build_test1.json", OutputSpec("build_test1", "svg", 50), ["top_10_co2_pc"])
+    ['top_10_co2_pc_2001']
+    """
+    # initialize variables
+    if kinds is None:
+        kinds = list(YEARLY_CHARTS)
+    manifest = load_manifest(manifest_filename)
+    chart_keys = get_chart_keys(dict_by_iso_codes, years, output)
+    to_create = []
+    created = []
+
+    # find the charts whose data has changed or whose file is missing
+    for year in years:
+        for kind in kinds:
+            fig_name = kind + "_" + str(year)
+            filename = get_chart_filename(fig_name, output)
+            if manifest.get(fig_name) == chart_keys[fig_name]:
+                if filename is None or os.path.exists(filename):
+                    continue
+            to_create.append((kind, year))
+
+    # create the charts in the current process or in a pool of processes
+    set_worker_data(dict_by_iso_codes, output)
+    pool = None
+    if jobs > 1 and len(to_create) > 1 and (output is None or output.directory is not None):
+        pool = multiprocessing.Pool(jobs, set_worker_data, (dict_by_iso_codes, output))
+        results = pool.imap_unordered(render_chart, to_create)
+    else:
+        results = map(render_chart, to_create)
+
+    # record the key of every chart created, stopping the processes even if a chart fails
+    try:
+        for kind, year in results:
+            fig_name = kind + "_" + str(year)
+            manifest[fig_name] = chart_keys[fig_name]
+            created.append(fig_name)
+            if len(created) % MANIFEST_SAVE_INTERVAL == 0:
+                save_manifest(manifest, manifest_filename)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    # save the manifest and return the names of the charts created
+    save_manifest(manifest, manifest_filename)
+    created.sort()
+    return created
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
@@ -0,0 +1,472 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import time
+import json
+import asyncio
+import argparse
+import collections
+import concurrent.futures
+from urllib.parse import urlsplit, parse_qs
+from chart_build import *
+from dataset import *
+
+
+# DEFINE CONSTANTS
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_CACHE_SIZE = 256
+# the number of latencies kept to compute the metrics
+NUM_OF_LATENCIES = 1000
+STATUS_MESSAGES = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                   500: "Internal Server Error"}
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+
+# DEFINE HELPER FUNCTIONS
+def parse_chart_request(path):
+    """ (str) -> tuple
+
+    The function takes as input the path of a request for a chart, either
+    /charts/<yearly chart>?year=<year> or
+    /charts/co2_emissions?iso_codes=<codes>&min_year=<year>&max_year=<year>.
+    It returns a tuple (kind, parameters), where parameters is a tuple that
+    can be used as part of a cache key. A ValueError is raised if the path
+    is not a valid request for a chart.
+
+    >>> parse_chart_request("/charts/top_10_co2_pc?year=2001")
+    ('top_10_co2_pc', (2001,))
+    >>> parse_chart_request("/charts/co2_emissions?iso_codes=USA,CHN&min_year=1990&max_year=2000")
+    ('co2_emissions', (('USA', 'CHN'), 1990, 2000))
+    >>> parse_chart_request("/charts/pie_chart?year=2001")
+    Traceback (most recent call last):
+    ValueError: unknown chart: pie_chart
+    """
+    # separate the kind of chart from its parameters
+    url = urlsplit(path)
+    if not url.path.startswith("/charts/"):
+        raise ValueError("unknown path: " + url.path)
+    kind = url.path[len("/charts/") : ]
+    query = parse_qs(url.query)
+
+    # in case it is a yearly chart
+    if kind in YEARLY_CHARTS:
+        return kind, (int(query["year"][0]),)
+
+    # in case it is the plot of the co2 emissions of some countries
+    if kind == "co2_emissions":
+        iso_codes = tuple(query["iso_codes"][0].split(","))
+        return kind, (iso_codes, int(query["min_year"][0]), int(query["max_year"][0]))
+
+    raise ValueError("unknown chart: " + kind)
+
+
+def render_chart_bytes(kind, parameters):
+    """ (str, tuple) -> bytes
+
+    The function creates a chart from the data set by set_worker_data and
+    returns the bytes of the image. It is run by the worker processes.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 41.215, 615000)
+    >>> set_worker_data({"QAT": q}, OutputSpec(None))
+    >>> render_chart_bytes("top_10_co2_pc", (2001,))[:4]
+    b'\\x89PNG'
+    >>> render_chart_bytes("co2_emissions", (("QAT",), 2000, 2001))[:4]
+    b'\\x89PNG'
+    """
+    dict_by_iso_codes = worker_data["dict_by_iso_codes"]
+    output = OutputSpec(None, worker_data["output"].format, worker_data["output"].dpi)
+
+    # create the chart in memory
+    plt.figure()
+    if kind == "co2_emissions":
+        iso_codes, min_year, max_year = parameters
+        get_plot_co2_emissions(dict_by_iso_codes, list(iso_codes), min_year, max_year, output)
+    else:
+        YEARLY_CHARTS[kind][0](dict_by_iso_codes, parameters[0], output)
+    plt.close()
+
+    # return the only image created
+    return list(output.images.values())[0]
+
+
+# DEFINE CLASSES
+class LRUCache:
+    """
+    Represents a cache keeping the max_size most recently used values, and
+    counting how many lookups found their value (hits) or not (misses).
+
+    Instance attributes: max_size (int), values (OrderedDict), hits (int), misses (int)
+    Instance methods: get, put
+    """
+
+    def __init__(self, max_size):
+        """ (LRUCache, int) -> LRUCache
+        Creates an empty cache.
+
+        >>> c = LRUCache(2)
+        >>> len(c.values), c.hits, c.misses
+        (0, 0, 0)
+        """
+        self.max_size = max_size
+        self.values = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key):
+        """ (LRUCache, object) -> object
+
+        Returns the value stored under key and marks it as recently used,
+        or returns None if there is no such value.
+
+        >>> c = LRUCache(2)
+        >>> c.put("a", 1)
+        >>> c.get("a"), c.get("b")
+        (1, None)
+        >>> c.hits, c.misses
+        (1, 1)
+        """
+        if key not in self.values:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.values.move_to_end(key)
+        return self.values[key]
+
+
+    def put(self, key, value):
+        """ (LRUCache, object, object) -> NoneType
+
+        Stores the value under key, removing the least recently used value
+        if the cache is full.
+
+        >>> c = LRUCache(2)
+        >>> c.put("a", 1)
+        >>> c.put("b", 2)
+        >>> c.get("a")
+        1
+        >>> c.put("c", 3)
+        >>> list(c.values)
+        ['a', 'c']
+        """
+        self.values[key] = value
+        self.values.move_to_end(key)
+        if len(self.values) > self.max_size:
+            self.values.popitem(last=False)
+
+
+class ChartServer:
+    """
+    Represents a local HTTP service creating the charts of the live dataset on demand.
+    Charts are created by a pool of worker processes and their bytes are cached by
+    (kind, parameters, dataset version). Identical requests arriving while a chart is
+    being created wait for that chart instead of creating it again.
+    The pool of an older version of the dataset is only stopped once the charts
+    it is creating are done.
+
+    Instance attributes: store (DatasetStore), output (OutputSpec), jobs (int),
+                         cache (LRUCache), in_flight (dict), executors (dict),
+                         num_of_running (dict), num_of_requests (int), num_of_renders (int),
+                         num_of_coalesced (int), num_of_errors (int), latencies (deque)
+    Instance methods: get_executor, retire_executors, get_chart, get_metrics, handle,
+                      serve, close
+    """
+
+    def __init__(self, store, output=None, jobs=2, cache_size=DEFAULT_CACHE_SIZE):
+        """ (ChartServer, DatasetStore, OutputSpec, int, int) -> ChartServer
+        Creates a server for the dataset of the store. Charts are PNG images
+        unless output gives another format.
+
+        >>> s = ChartServer(DatasetStore({}), jobs=1)
+        >>> s.output.format, s.cache.max_size
+        ('png', 256)
+        """
+        if output is None:
+            output = OutputSpec(None)
+        self.store = store
+        self.output = output
+        self.jobs = jobs
+        self.cache = LRUCache(cache_size)
+        self.in_flight = {}
+        self.executors = {}
+        self.num_of_running = {}
+        self.num_of_requests = 0
+        self.num_of_renders = 0
+        self.num_of_coalesced = 0
+        self.num_of_errors = 0
+        self.latencies = collections.deque(maxlen=NUM_OF_LATENCIES)
+
+
+    def get_executor(self, dataset):
+        """ (ChartServer, Dataset) -> Executor
+
+        Returns the pool of worker processes holding the given version of the
+        dataset, creating it if needed and retiring the pools of older versions
+        (see retire_executors).
+        Workers are started from a separate server process, so that they do not
+        inherit the open connections of this process (which would then never
+        be closed for the clients).
+
+        >>> s = ChartServer(DatasetStore({}), jobs=1)
+        >>> e = s.get_executor(s.store.snapshot())
+        >>> e is s.get_executor(s.store.snapshot())
+        True
+        >>> s.num_of_running[0] = 1
+        >>> e = s.get_executor(s.store.replace({}))
+        >>> sorted(s.executors)
+        [0, 1]
+        >>> s.num_of_running[0] = 0
+        >>> s.retire_executors()
+        >>> sorted(s.executors)
+        [1]
+        >>> s.close()
+        """
+        if dataset.version not in self.executors:
+            self.executors[dataset.version] = concurrent.futures.ProcessPoolExecutor(
+                self.jobs, multiprocessing.get_context("forkserver"), set_worker_data,
+                (dataset.dict_by_iso_codes, self.output))
+            self.num_of_running[dataset.version] = 0
+            self.retire_executors()
+        return self.executors[dataset.version]
+
+
+    def retire_executors(self):
+        """ (ChartServer) -> NoneType
+
+        Stops the pools of worker processes of the older versions of the dataset
+        that are not creating any chart anymore. The pools still creating charts
+        are stopped once their last chart is done.
+
+        >>> s = ChartServer(DatasetStore({}), jobs=1)
+        >>> s.retire_executors()
+        >>> s.executors
+        {}
+        """
+        if not self.executors:
+            return
+        latest_version = max(self.executors)
+        for version in list(self.executors):
+            if version != latest_version and self.num_of_running[version] == 0:
+                self.executors.pop(version).shutdown(wait=False)
+                del self.num_of_running[version]
+
+
+    async def get_chart(self, kind, parameters):
+        """ (ChartServer, str, tuple) -> bytes
+
+        Returns the bytes of a chart of the current version of the dataset,
+        from the cache, from a render already in progress, or from a new render.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 41.215, 615000)
+        >>> s = ChartServer(DatasetStore({"QAT": q}), jobs=1)
+        >>> async def get_twice():
+        ...     return await asyncio.gather(s.get_chart("top_10_co2_pc", (2001,)),
+        ...                                 s.get_chart("top_10_co2_pc", (2001,)))
+        >>> images = asyncio.run(get_twice())
+        >>> images[0] == images[1], s.num_of_renders, s.num_of_coalesced
+        (True, 1, 1)
+        >>> image = asyncio.run(s.get_chart("top_10_co2_pc", (2001,)))
+        >>> s.num_of_renders, s.cache.hits
+        (1, 1)
+        >>> s.close()
+        """
+        dataset = self.store.snapshot()
+        key = (kind, parameters, dataset.version)
+
+        # in case the chart is cached
+        image = self.cache.get(key)
+        if image is not None:
+            return image
+
+        # in case the same chart is being created
+        if key in self.in_flight:
+            self.num_of_coalesced += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        # create the chart in a worker process, keeping its pool until it is done
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.get_executor(dataset), render_chart_bytes, kind, parameters)
+        self.in_flight[key] = future
+        self.num_of_renders += 1
+        self.num_of_running[dataset.version] += 1
+        try:
+            image = await future
+        finally:
+            del self.in_flight[key]
+            self.num_of_running[dataset.version] -= 1
+            self.retire_executors()
+        self.cache.put(key, image)
+        return image
+
+
+    def get_metrics(self):
+        """ (ChartServer) -> dict
+
+        Returns a dictionary of metrics: the number of requests, renders,
+        coalesced requests and failed renders, the cache hits, misses and hit rate, and the mean,
+        median and 95th percentile of the latency of the recent chart requests
+        in milliseconds.
+
+        >>> s = ChartServer(DatasetStore({}), jobs=1)
+        >>> s.latencies.extend([0.001, 0.002, 0.003])
+        >>> m = s.get_metrics()
+        >>> m["hit_rate"], m["latency_median_ms"], m["latency_p95_ms"]
+        (0.0, 2.0, 3.0)
+        """
+        # compute the hit rate
+        num_of_lookups = self.cache.hits + self.cache.misses
+        hit_rate = 0.0
+        if num_of_lookups > 0:
+            hit_rate = self.cache.hits / num_of_lookups
+
+        # compute the latencies
+        latencies = sorted(self.latencies)
+        mean = median = p95 = 0.0
+        if latencies:
+            mean = sum(latencies) / len(latencies)
+            median = latencies[len(latencies) // 2]
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+        return {"num_of_requests": self.num_of_requests, "num_of_renders": self.num_of_renders,
+                "num_of_coalesced": self.num_of_coalesced, "num_of_errors": self.num_of_errors,
+                "cache_hits": self.cache.hits,
+                "cache_misses": self.cache.misses, "hit_rate": hit_rate,
+                "dataset_version": self.store.snapshot().version,
+                "latency_mean_ms": round(mean * 1000, 3), "latency_median_ms": round(median * 1000, 3),
+                "latency_p95_ms": round(p95 * 1000, 3)}
+
+
+    async def handle(self, reader, writer):
+        """ (ChartServer, StreamReader, StreamWriter) -> NoneType
+
+        Answers one HTTP request: GET /charts/... returns a chart and GET /metrics
+        returns the metrics as JSON. If the chart cannot be created, the error is
+        returned as JSON with the status 500.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 41.215, 615000)
+        >>> s = ChartServer(DatasetStore({"QAT": q}), jobs=1)
+        >>> async def request(path):
+        ...     server = await asyncio.start_server(s.handle, HOST, 0)
+        ...     port = server.sockets[0].getsockname()[1]
+        ...     reader, writer = await asyncio.open_connection(HOST, port)
+        ...     writer.write(("GET " + path + " HTTP/1.1\\r\\nHost: localhost\\r\\n\\r\\n").encode())
+        ...     response = await reader.read()
+        ...     writer.close()
+        ...     server.close()
+        ...     return response
+        >>> asyncio.run(request("/charts/top_10_co2_pc?year=2001")).split(b"\\r\\n")[0]
+        b'HTTP/1.1 200 OK'
+        >>> asyncio.run(request("/charts/top_10_co2_pc")).split(b"\\r\\n")[0]
+        b'HTTP/1.1 400 Bad Request'
+        >>> json.loads(asyncio.run(request("/metrics")).split(b"\\r\\n\\r\\n")[1])["num_of_renders"]
+        1
+        >>> async def fail(kind, parameters):
+        ...     raise RuntimeError("render failed")
+        >>> s.get_chart = fail
+        >>> response = asyncio.run(request("/charts/top_10_co2_pc?year=2001")).split(b"\\r\\n")
+        >>> response[0], json.loads(response[-1])
+        (b'HTTP/1.1 500 Internal Server Error', {'error': 'render failed'})
+        >>> s.get_metrics()["num_of_errors"]
+        1
+        >>> s.close()
+        """
+        start = time.perf_counter()
+        status = 200
+        content_type = "application/json"
+        body = b""
+        try:
+            # read the request line and skip the headers
+            request_line = (await reader.readline()).decode("latin-1").split()
+            line = await reader.readline()
+            while line not in (b"\r\n", b"\n", b""):
+                line = await reader.readline()
+
+            # answer the request
+            if len(request_line) < 2 or request_line[0] != "GET":
+                status = 405
+            elif request_line[1] == "/metrics":
+                body = json.dumps(self.get_metrics()).encode("UTF-8")
+            else:
+                self.num_of_requests += 1
+                try:
+                    kind, parameters = parse_chart_request(request_line[1])
+                except (ValueError, KeyError, IndexError) as error:
+                    status = 400
+                    body = json.dumps({"error": str(error)}).encode("UTF-8")
+                else:
+                    try:
+                        body = await self.get_chart(kind, parameters)
+                    # in case the chart cannot be created
+                    except Exception as error:
+                        status = 500
+                        body = json.dumps({"error": str(error)}).encode("UTF-8")
+                        self.num_of_errors += 1
+                    else:
+                        content_type = CONTENT_TYPES[self.output.format]
+                        self.latencies.append(time.perf_counter() - start)
+
+            # write the response
+            header = "HTTP/1.1 " + str(status) + " " + STATUS_MESSAGES[status] + "\r\n"
+            header += "Content-Type: " + content_type + "\r\n"
+            header += "Content-Length: " + str(len(body)) + "\r\nConnection: close\r\n\r\n"
+            writer.write(header.encode("latin-1") + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+    async def serve(self, port=DEFAULT_PORT):
+        """ (ChartServer, int) -> NoneType
+
+        Accepts requests on localhost until the task is cancelled.
+        """
+        server = await asyncio.start_server(self.handle, HOST, port)
+        async with server:
+            await server.serve_forever()
+
+
+    def close(self):
+        """ (ChartServer) -> NoneType
+
+        Stops the worker processes.
+
+        >>> ChartServer(DatasetStore({}), jobs=1).close()
+        """
+        for version in list(self.executors):
+            self.executors.pop(version).shutdown()
+        self.num_of_running = {}
+
+
+# DEFINE FUNCTION
+def main(arguments=None):
+    """ (list) -> NoneType
+
+    The function reads a data file with continents and serves its charts
+    on localhost until it is interrupted.
+    """
+    # read the command line arguments
+    parser = argparse.ArgumentParser(description="Serve the charts of a co2 data file on localhost.")
+    parser.add_argument("data_filename", help="data file with continents")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen to")
+    parser.add_argument("--jobs", type=int, default=2, help="number of processes creating charts")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help="number of charts kept in memory")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="png", help="format of the charts")
+    args = parser.parse_args(arguments)
+
+    # load the dataset and serve its charts
+    store = DatasetStore(get_countries_from_file(args.data_filename))
+    server = ChartServer(store, OutputSpec(None, args.format), args.jobs, args.cache_size)
+    try:
+        asyncio.run(server.serve(args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+# RUN PROGRAM
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+from build_countries import *
+
+
+# DEFINE HELPER FUNCTION
+def get_positions(mask):
+    """ (int) -> list
+
+    The function takes as input a bitmap stored in an integer and returns the
+    list of the positions of its set bits, in increasing order.
+
+    >>> get_positions(0b10110)
+    [1, 2, 4]
+    >>> get_positions(0)
+    []
+    """
+    positions = []
+    while mask:
+        lowest_bit = mask & -mask
+        positions.append(lowest_bit.bit_length() - 1)
+        mask ^= lowest_bit
+    return positions
+
+
+# DEFINE CLASS
+class CountryIndex:
+    """
+    Represents bitmap indexes over a dataset of countries. Every country has a
+    position, and each bitmap is an integer whose bit at that position is set if
+    the country belongs to the subset. Subsets are combined with the integer
+    operators & (and), | (or) and & ~ (but not).
+
+    Instance attributes: countries (list), positions (dict), continents (dict),
+                         has_co2 (int), has_population (int),
+                         co2_by_year (dict), population_by_year (dict)
+    Instance methods: get_all, get_continent, get_covered, get_countries,
+                      get_total_co2_emissions_per_capita_by_year,
+                      get_total_historical_co2_emissions
+    """
+
+    def __init__(self, dict_by_iso_codes):
+        """ (CountryIndex, dict) -> CountryIndex
+        Creates the indexes of a dictionary mapping ISO codes to objects of type
+        Country in a single pass over the data. Countries keep the order of the dictionary.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, -1)
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 1993, 30.985, 501000)
+        >>> i = CountryIndex({"ALB": b, "RUS": r, "QAT": q})
+        >>> bin(i.continents["ASIA"]), bin(i.continents["EUROPE"])
+        ('0b110', '0b11')
+        >>> bin(i.has_population)
+        '0b101'
+        >>> bin(i.co2_by_year[2007])
+        '0b11'
+        """
+        # initialize variables
+        self.countries = []
+        self.positions = {}
+        self.continents = {}
+        self.has_co2 = 0
+        self.has_population = 0
+        self.co2_by_year = {}
+        self.population_by_year = {}
+
+        # set the bit of every country in its bitmaps
+        for iso_code in dict_by_iso_codes:
+            country = dict_by_iso_codes[iso_code]
+            bit = 1 << len(self.countries)
+            self.positions[iso_code] = len(self.countries)
+            self.countries.append(country)
+
+            for continent in country.continents:
+                self.continents[continent] = self.continents.get(continent, 0) | bit
+            if country.co2_emissions:
+                self.has_co2 |= bit
+            if country.population:
+                self.has_population |= bit
+            for year in country.co2_emissions:
+                self.co2_by_year[year] = self.co2_by_year.get(year, 0) | bit
+            for year in country.population:
+                self.population_by_year[year] = self.population_by_year.get(year, 0) | bit
+
+
+    def get_all(self):
+        """ (CountryIndex) -> int
+
+        Returns the bitmap of all the countries.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> bin(CountryIndex({"ALB": b}).get_all())
+        '0b1'
+        """
+        return (1 << len(self.countries)) - 1
+
+
+    def get_continent(self, continent):
+        """ (CountryIndex, str) -> int
+
+        Returns the bitmap of the countries of a continent (0 if there are none).
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, -1)
+        >>> i = CountryIndex({"ALB": b, "RUS": r})
+        >>> mask = i.get_continent("EUROPE") & ~i.get_continent("ASIA")
+        >>> [c.iso_code for c in i.get_countries(mask)]
+        ['ALB']
+        >>> i.get_continent("AFRICA")
+        0
+        """
+        return self.continents.get(continent, 0)
+
+
+    def get_covered(self, year):
+        """ (CountryIndex, int) -> int
+
+        Returns the bitmap of the countries for which both the co2 emissions and
+        the population are recorded in the year.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, -1)
+        >>> bin(CountryIndex({"ALB": b, "RUS": r}).get_covered(2007))
+        '0b1'
+        """
+        return self.co2_by_year.get(year, 0) & self.population_by_year.get(year, 0)
+
+
+    def get_countries(self, mask):
+        """ (CountryIndex, int) -> list
+
+        Returns the list of the Country objects in the bitmap, in index order.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, -1)
+        >>> [c.name for c in CountryIndex({"ALB": b, "RUS": r}).get_countries(0b10)]
+        ['Russia']
+        """
+        return [self.countries[position] for position in get_positions(mask)]
+
+
+    def get_total_co2_emissions_per_capita_by_year(self, mask, year):
+        """ (CountryIndex, int, int) -> float
+
+        Returns the co2 emissions per capita in tonnes of the countries in the
+        bitmap in the year, like Country.get_total_co2_emissions_per_capita_by_year.
+        Only the countries covered that year are visited.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> i = CountryIndex({"ALB": b, "RUS": r})
+        >>> round(i.get_total_co2_emissions_per_capita_by_year(i.get_continent("EUROPE"), 2007), 5)
+        92.98855
+        >>> i.get_total_co2_emissions_per_capita_by_year(i.get_continent("ASIA"), 1990)
+        0.0
+        """
+        # initialize variables
+        total_co2 = 0.0
+        total_population = 0
+
+        # add up the data of the covered countries
+        for position in get_positions(mask & self.get_covered(year)):
+            country = self.countries[position]
+            total_co2 += country.co2_emissions[year]
+            total_population += country.population[year]
+
+        # compute and return the co2 emissions per capita
+        if total_population == 0:
+            return 0.0
+        return (total_co2 * 10**6) / total_population
+
+
+    def get_total_historical_co2_emissions(self, mask, year):
+        """ (CountryIndex, int, int) -> float
+
+        Returns the total co2 emissions (in millions of tonnes) of the countries in
+        the bitmap up to and including the year, like
+        Country.get_total_historical_co2_emissions.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> i = CountryIndex({"ALB": b, "RUS": r})
+        >>> i.get_total_historical_co2_emissions(i.get_all(), 2007)
+        1608.702
+        """
+        total_co2_emissions = 0.0
+        for position in get_positions(mask & self.has_co2):
+            total_co2_emissions += self.countries[position].get_historical_co2(year)
+        return total_co2_emissions
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
@@ -1,7 +1,9 @@
 # Annie Kuo
 
-# IMPORT MODULE
+# IMPORT MODULES
 import doctest
+import time
+from file_io import *
 
 
 # DEFINE FUNCTIONS
@@ -52,13 +54,31 @@ def find_delim(string):
     return delims[max_index]
 
 
-def clean_one(input_filename, output_filename):
-    """ (str, str) -> int
+def clean_one_line(line):
+    """ (str) -> str
+
+    The function takes as input a single line of data and returns it
+    with its most common delimiter replaced by a tab.
+
+    >>> clean_one_line("LSO-Lesotho-1975--1161000")
+    'LSO\\tLesotho\\t1975\\t\\t1161000'
+    >>> clean_one_line("QAT,Qatar,2001,41,215,615000\\n")
+    'QAT\\tQatar\\t2001\\t41\\t215\\t615000\\n'
+    """
+    # find the delimiter in the line and replace it with a tab
+    delim = find_delim(line)
+    return line.replace(delim, "\t")
+
+
+def clean_one(input_filename, output_filename, buffer_size=DEFAULT_BUFFER_SIZE):
+    """ (str, str, int) -> int
 
     The function takes as input two strings: the file name for a file
     to be read, and file name for a file to be written.
     It replaces delimiters in input_filename by a tab
     and write the new version to output_filename.
+    Either file may be compressed (.gz, .bz2, .xz or .zst).
+    Lines are written in blocks of about buffer_size characters.
     The function returns an integer indicating the number of lines written to output_filename.
     
     >>> clean_one('small_raw_co2_data.txt', 'small_tab_sep_co2_data.tsv')
@@ -79,39 +99,91 @@ def clean_one(input_filename, output_filename):
     >>> fobj.close()
     >>> clean_one('test2.txt', 'first_clean2.txt')
     2
+
+    >>> fobj = open_data_file("test3.txt.gz", "w")
+    >>> fobj.write("\\n".join(strings))
+    61
+    >>> fobj.close()
+    >>> clean_one('test3.txt.gz', 'first_clean3.txt.xz')
+    2
+    >>> fobj = open_data_file('first_clean3.txt.xz')
+    >>> fobj.readline()
+    'CMR\\tCameroon\\t2001\\t3.324\\t16358000\\n'
+    >>> fobj.close()
     """
-    # initialize variables
-    new_lines = []
-    num_of_lines = 0
-    
-    # read the input_filename
-    fobj= open(input_filename, "r", encoding= "UTF-8")
-    for line in fobj:
-        # find the delimiter in the line and replace it with a tab
-        delim = find_delim(line)
-        new_line = line.replace(delim, "\t")
-        # add the modified line to the list of lines to write
-        new_lines.append(new_line)
-    fobj.close()
-    
-    # write the new output_filename
-    fobj= open(output_filename, "w", encoding= "UTF-8")
-    for line in new_lines:
-        fobj.write(line)
-        num_of_lines += 1
+    # read the input_filename and stream the modified lines to output_filename
+    fobj= open_data_file(input_filename)
+    new_lines = (clean_one_line(line) for line in fobj)
+    num_of_lines = write_lines(new_lines, output_filename, buffer_size)
     fobj.close()
     
     # return the number of lines
     return num_of_lines
 
 
-def final_clean(input_filename, output_filename):
-    """ (str, str) -> int
+def final_clean_line(line):
+    """ (str) -> str
+
+    The function takes as input a single tab separated line of data
+    and returns it modified so that it contains exactly 5 columns.
+    An AssertionError is raised if no column contains a year.
+
+    >>> final_clean_line("LSO\\tLesotho\\t1975\\t\\t1161000")
+    'LSO\\tLesotho\\t1975\\t\\t1161000'
+    >>> final_clean_line("QAT\\tQatar\\t2001\\t41\\t215\\t615000\\n")
+    'QAT\\tQatar\\t2001\\t41.215\\t615000\\n'
+    >>> final_clean_line("COD\\tDemocratic\\tRepublic\\t2006\\t1,553\\t56578000")
+    'COD\\tDemocratic Republic\\t2006\\t1.553\\t56578000'
+    >>> final_clean_line("COD\\tDemocratic\\tRepublic\\t1,553\\t56578000\\n")
+    Traceback (most recent call last):
+    AssertionError
+    """
+    # initialize variable
+    new_line = line
+    columns = line.split("\t")
+    
+    # in case the name is not contained in column 1,
+    # the year will not be in column 2
+    if not columns[2].isdecimal():
+        year_index = 0
+        for i in range(len(columns)):
+            if columns[i].isdecimal():
+                year_index = i
+                break
+        # raise error if there is no year in the line
+        if year_index == 0:
+            raise AssertionError
+        country = " ".join(columns[1 : year_index])
+        columns[1 : year_index] = [country]
+        new_line = "\t".join(columns)
+    
+    # in case commas were used to indicate decimals
+    # and commas were the delimiters
+    if len(columns) == 6 and "." not in line:
+        co2_emission = ".".join(columns[3:5])
+        columns[3:5] = [co2_emission]
+        new_line = "\t".join(columns)
+        
+    # in case commas were used to indicate decimals
+    # and commas were not the delimiters
+    if "," in columns[3]:
+        co2_emission = columns[3].replace(",", ".")
+        columns[3] = co2_emission
+        new_line = "\t".join(columns)
+    
+    # return the modified line
+    return new_line
+
+
+def final_clean(input_filename, output_filename, buffer_size=DEFAULT_BUFFER_SIZE):
+    """ (str, str, int) -> int
 
     The function takes as two strings: the file name for a file
     to be read, and file name for a file to be written.
     It modifies each line in input_filename so that it contains exactly 5 columns.
     and writes the modified line into output_filename.
+    Either file may be compressed (.gz, .bz2, .xz or .zst).
+    Lines are written in blocks of about buffer_size characters.
     The function returns an integer indicating the number of lines written to output_filename.
     
     >>> final_clean('small_tab_sep_co2_data.tsv', 'small_clean_co2_data.tsv')
@@ -137,62 +209,122 @@ def final_clean(input_filename, output_filename):
     >>> final_clean('first_clean2.txt', 'final_clean2.tsv')
     2
     """
-    # initialize variables
-    new_lines = []
-    num_of_lines = 0
-    
-    # read the input_filename
-    fobj= open(input_filename, "r", encoding= "UTF-8")
-    
-    # create a list of all the lines
-    for line in fobj:
-        new_lines.append(line)
-        
-    # modify the lines according to their irregularities  
-    for index in range(len(new_lines)):
-        line = new_lines[index]
-        columns = line.split("\t")
-        
-        # in case the name is not contained in column 1,
-        # the year will not be in column 2
-        if not columns[2].isdecimal():
-            year_index = 0
-            for i in range(len(columns)):
-                if columns[i].isdecimal():
-                    year_index = i
-                    break
-            country = " ".join(columns[1 : i])
-            columns[1 : i] = [country]
-            new_line = "\t".join(columns)
-            new_lines[index] = "\t".join(columns)
-        
-        # in case commas were used to indicate decimals
-        # and commas were the delimiters
-        if len(columns) == 6 and "." not in line:
-            co2_emission = ".".join(columns[3:5])
-            columns[3:5] = [co2_emission]
-            new_lines[index] = "\t".join(columns)
-            
-        # in case commas were used to indicate decimals
-        # and commas were not the delimiters
-        if "," in columns[3]:
-            co2_emission = columns[3].replace(",", ".")
-            columns[3] = co2_emission
-            new_lines[index] = "\t".join(columns)
-            
-    fobj.close()
-    
-    # write the new output_filename
-    fobj= open(output_filename, "w", encoding= "UTF-8")
-    for line in new_lines:
-        fobj.write(line)
-        num_of_lines += 1
+    # read the input_filename and stream the modified lines to output_filename
+    fobj= open_data_file(input_filename)
+    new_lines = (final_clean_line(line) for line in fobj)
+    num_of_lines = write_lines(new_lines, output_filename, buffer_size)
     fobj.close()
     
     # return the number of lines
     return num_of_lines
 
 
+def clean_line_or_reason(line):
+    """ (str) -> tuple
+
+    The function takes as input a single line of raw data and applies both
+    cleaning steps to it. It returns a tuple (clean line, None) if the line
+    could be cleaned, or (None, reason) with the reason why it could not:
+    'empty line', 'no delimiter', 'no year' or 'wrong number of columns'.
+
+    >>> clean_line_or_reason("QAT,Qatar,2001,41,215,615000\\n")
+    ('QAT\\tQatar\\t2001\\t41.215\\t615000\\n', None)
+    >>> clean_line_or_reason("astringwithoutdelimiter\\n")
+    (None, 'no delimiter')
+    >>> clean_line_or_reason("QAT-Qatar-n/a-n/a")
+    (None, 'no year')
+    >>> clean_line_or_reason("QAT,Qatar")
+    (None, 'wrong number of columns')
+    >>> clean_line_or_reason("QAT-Qatar-2001-41.215-615000-12")
+    (None, 'wrong number of columns')
+    >>> clean_line_or_reason("\\n")
+    (None, 'empty line')
+    """
+    # in case there is nothing to clean
+    if line.strip() == "":
+        return None, "empty line"
+
+    # apply both cleaning steps
+    try:
+        new_line = clean_one_line(line)
+    except AssertionError:
+        return None, "no delimiter"
+    try:
+        new_line = final_clean_line(new_line)
+    except AssertionError:
+        return None, "no year"
+    except IndexError:
+        return None, "wrong number of columns"
+
+    # the clean line must have exactly 5 columns
+    if new_line.count("\t") != 4:
+        return None, "wrong number of columns"
+    return new_line, None
+
+
+def clean_with_quarantine(input_filename, output_filename, quarantine_filename,
+                          buffer_size=DEFAULT_BUFFER_SIZE):
+    """ (str, str, str, int) -> dict
+
+    The function does the work of clean_one and final_clean in a single pass,
+    writing the clean lines to output_filename. Lines that cannot be cleaned
+    do not stop the run: they are written to quarantine_filename as
+    line number, reason and original line, separated by tabs.
+    Any of the files may be compressed (.gz, .bz2, .xz or .zst).
+    The function returns a dictionary of metrics: the number of lines read,
+    written and quarantined, the number of lines per reason, the time taken
+    in seconds, the number of lines read per second and the error rate.
+
+    >>> fobj = open("quarantine_test1.txt", "w", encoding= "UTF-8")
+    >>> strings = ["CMR-Cameroon-2001-3.324-16358000", "astringwithoutdelimiter"]
+    >>> strings.append("QAT,Qatar,2001,41,215,615000")
+    >>> fobj.write("\\n".join(strings))
+    85
+    >>> fobj.close()
+    >>> m = clean_with_quarantine("quarantine_test1.txt", "quarantine_out1.tsv", "quarantine1.tsv")
+    >>> m["num_of_lines"], m["num_of_clean_lines"], m["num_of_quarantined_lines"], m["reasons"]
+    (3, 2, 1, {'no delimiter': 1})
+    >>> round(m["error_rate"], 5)
+    0.33333
+    >>> open("quarantine_out1.tsv").read()
+    'CMR\\tCameroon\\t2001\\t3.324\\t16358000\\nQAT\\tQatar\\t2001\\t41.215\\t615000'
+    >>> open("quarantine1.tsv").read()
+    '2\\tno delimiter\\tastringwithoutdelimiter\\n'
+    """
+    # initialize variables
+    start = time.perf_counter()
+    metrics = {"num_of_lines": 0, "num_of_quarantined_lines": 0, "reasons": {}}
+    quarantine_fobj = open_data_file(quarantine_filename, "w", buffer_size)
+
+    def get_clean_lines(fobj):
+        # clean every line, sending the ones that cannot be cleaned to the quarantine file
+        for line in fobj:
+            metrics["num_of_lines"] += 1
+            new_line, reason = clean_line_or_reason(line)
+            if reason is None:
+                yield new_line
+            else:
+                metrics["num_of_quarantined_lines"] += 1
+                metrics["reasons"][reason] = metrics["reasons"].get(reason, 0) + 1
+                quarantine_fobj.write(str(metrics["num_of_lines"]) + "\t" + reason + "\t" + line.rstrip("\n") + "\n")
+
+    # read the input_filename and stream the clean lines to output_filename
+    fobj= open_data_file(input_filename)
+    metrics["num_of_clean_lines"] = write_lines(get_clean_lines(fobj), output_filename, buffer_size)
+    fobj.close()
+    quarantine_fobj.close()
+
+    # compute the throughput and the error rate
+    metrics["seconds"] = time.perf_counter() - start
+    metrics["lines_per_second"] = metrics["num_of_lines"] / max(metrics["seconds"], 10**-9)
+    metrics["error_rate"] = 0.0
+    if metrics["num_of_lines"] > 0:
+        metrics["error_rate"] = metrics["num_of_quarantined_lines"] / metrics["num_of_lines"]
+
+    # return the metrics
+    return metrics
+
+
 # TEST MODULE
 if __name__ == "__main__":
     doctest.testmod()
\ No newline at end of file
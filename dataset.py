@@ -0,0 +1,371 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import copy
+import threading
+from build_countries import *
+from emissions_cube import *
+
+
+# DEFINE HELPER FUNCTION
+def copy_country(country):
+    """ (Country) -> Country
+
+    The function returns a copy of a Country object whose data can be modified
+    without changing the original.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> c = copy_country(q)
+    >>> c.add_yearly_data("1993\\t30.985\\t501000")
+    >>> q.co2_emissions
+    {2007: 62.899}
+    >>> c.co2_emissions
+    {2007: 62.899, 1993: 30.985}
+    """
+    new_country = copy.copy(country)
+    new_country.continents = copy.copy(country.continents)
+    new_country.co2_emissions = dict(country.co2_emissions)
+    new_country.population = dict(country.population)
+    new_country.clear_series()
+    return new_country
+
+
+# DEFINE CLASSES
+class DatasetInfo:
+    """
+    Represents the metadata of one dataset of countries, computed once when the
+    dataset is loaded. The attributes are never modified afterwards, so the object
+    can be shared between threads and several datasets can be loaded in the same process.
+
+    Instance attributes: min_year (int), max_year (int), num_of_countries (int),
+                         num_of_rows (int), num_of_co2_values (int),
+                         num_of_population_values (int), num_of_complete_rows (int),
+                         countries_by_year (dict)
+    Instance methods: get_num_of_years, get_coverage, get_num_of_countries_by_year
+    """
+
+    def __init__(self, dict_by_iso_codes):
+        """ (DatasetInfo, dict) -> DatasetInfo
+        Creates an object of type DatasetInfo from a dictionary mapping ISO codes
+        to objects of type Country, in a single pass over the data.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> q.add_yearly_data("1993\\t30.985\\t")
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2010, -1, 14266000)
+        >>> info = DatasetInfo({"QAT": q, "RUS": r})
+        >>> info.min_year, info.max_year
+        (1993, 2010)
+        >>> info.num_of_countries, info.num_of_rows
+        (2, 3)
+        >>> info.num_of_co2_values, info.num_of_population_values, info.num_of_complete_rows
+        (2, 2, 1)
+
+        >>> info = DatasetInfo({})
+        >>> print(info.min_year, info.max_year)
+        None None
+        """
+        # initialize variables
+        self.min_year = None
+        self.max_year = None
+        self.num_of_countries = len(dict_by_iso_codes)
+        self.num_of_rows = 0
+        self.num_of_co2_values = 0
+        self.num_of_population_values = 0
+        self.num_of_complete_rows = 0
+        self.countries_by_year = {}
+
+        # go through the data of every country once
+        for iso_code in dict_by_iso_codes:
+            country = dict_by_iso_codes[iso_code]
+            co2_years = country.co2_emissions.keys()
+            population_years = country.population.keys()
+            years = co2_years | population_years
+
+            # update the counts
+            self.num_of_rows += len(years)
+            self.num_of_co2_values += len(co2_years)
+            self.num_of_population_values += len(population_years)
+            self.num_of_complete_rows += len(co2_years & population_years)
+            for year in years:
+                self.countries_by_year[year] = self.countries_by_year.get(year, 0) + 1
+
+            # update the year bounds
+            if years:
+                if self.min_year is None or min(years) < self.min_year:
+                    self.min_year = min(years)
+                if self.max_year is None or max(years) > self.max_year:
+                    self.max_year = max(years)
+
+
+    def get_num_of_years(self):
+        """ (DatasetInfo) -> int
+
+        Returns the number of years between the first and the last year recorded,
+        both included.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> q.add_yearly_data("1993\\t30.985\\t")
+        >>> DatasetInfo({"QAT": q}).get_num_of_years()
+        15
+        >>> DatasetInfo({}).get_num_of_years()
+        0
+        """
+        if self.min_year is None:
+            return 0
+        return self.max_year - self.min_year + 1
+
+
+    def get_coverage(self):
+        """ (DatasetInfo) -> float
+
+        Returns the fraction of (country, year) pairs between the first and last
+        year recorded for which both the co2 emissions and the population are known.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> q.add_yearly_data("2006\\t30.985\\t")
+        >>> DatasetInfo({"QAT": q}).get_coverage()
+        0.5
+        >>> DatasetInfo({}).get_coverage()
+        0.0
+        """
+        num_of_cells = self.num_of_countries * self.get_num_of_years()
+        if num_of_cells == 0:
+            return 0.0
+        return self.num_of_complete_rows / num_of_cells
+
+
+    def get_num_of_countries_by_year(self, year):
+        """ (DatasetInfo, int) -> int
+
+        Returns the number of countries with some data recorded for the year.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, -1, 14266000)
+        >>> info = DatasetInfo({"QAT": q, "RUS": r})
+        >>> info.get_num_of_countries_by_year(2007)
+        2
+        >>> info.get_num_of_countries_by_year(1900)
+        0
+        """
+        return self.countries_by_year.get(year, 0)
+
+
+class Dataset:
+    """
+    Represents one version of a dataset of countries. A Dataset is never modified
+    once it is created: new data creates a new version (see DatasetStore), so any
+    number of threads can query it without locks.
+
+    Instance attributes: dict_by_iso_codes (dict), version (int), info (DatasetInfo),
+                         cube (EmissionsCube)
+    Instance methods: get_countries, get_countries_by_continent,
+                      get_co2_emissions_per_capita_by_year, get_historical_co2_emissions,
+                      get_top_n_co2_per_capita, get_top_n_historical_co2
+    """
+
+    def __init__(self, dict_by_iso_codes, version=0):
+        """ (Dataset, dict, int) -> Dataset
+        Creates an object of type Dataset from a dictionary mapping ISO codes to
+        objects of type Country, which must not be modified afterwards.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> d = Dataset({"QAT": q}, 3)
+        >>> d.version
+        3
+        >>> d.info.num_of_countries
+        1
+        >>> d.cube.get("WORLD", "co2", 2007)
+        62.899
+        """
+        self.dict_by_iso_codes = dict_by_iso_codes
+        self.version = version
+        self.info = DatasetInfo(dict_by_iso_codes)
+        self.cube = EmissionsCube(dict_by_iso_codes)
+
+
+    def get_countries(self):
+        """ (Dataset) -> list
+
+        Returns a list of all the Country objects of the dataset.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> [c.name for c in Dataset({"QAT": q}).get_countries()]
+        ['Qatar']
+        """
+        return list(self.dict_by_iso_codes.values())
+
+
+    def get_countries_by_continent(self):
+        """ (Dataset) -> dict
+
+        Returns a dictionary mapping continents to the list of their countries.
+
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> sorted(Dataset({"RUS": r}).get_countries_by_continent())
+        ['ASIA', 'EUROPE']
+        """
+        return Country.get_countries_by_continent(self.get_countries())
+
+
+    def get_co2_emissions_per_capita_by_year(self, year):
+        """ (Dataset, int) -> dict
+
+        Returns a dictionary mapping every Country object to its co2 emissions
+        per capita in the year.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> round(Dataset({"QAT": q}).get_co2_emissions_per_capita_by_year(2007)[q], 5)
+        51.64122
+        """
+        return Country.get_co2_emissions_per_capita_by_year(self.get_countries(), year)
+
+
+    def get_historical_co2_emissions(self, year):
+        """ (Dataset, int) -> dict
+
+        Returns a dictionary mapping every Country object to its historical
+        co2 emissions up to and including the year.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> Dataset({"QAT": q}).get_historical_co2_emissions(2010)[q]
+        62.899
+        """
+        return Country.get_historical_co2_emissions(self.get_countries(), year)
+
+
+    def get_top_n_co2_per_capita(self, year, n):
+        """ (Dataset, int, int) -> list
+
+        Returns the top n countries for co2 emissions per capita in the year,
+        as a list of (iso code, value) tuples. Countries without data are left out.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, -1)
+        >>> [iso_code for iso_code, value in Dataset({"QAT": q, "RUS": r}).get_top_n_co2_per_capita(2007, 5)]
+        ['QAT']
+        """
+        co2_per_capita = {}
+        values = self.get_co2_emissions_per_capita_by_year(year)
+        for country in values:
+            if values[country] != None:
+                co2_per_capita[country] = values[country]
+        return Country.get_top_n(co2_per_capita, n)
+
+
+    def get_top_n_historical_co2(self, year, n):
+        """ (Dataset, int, int) -> list
+
+        Returns the top n countries for historical co2 emissions up to the year,
+        as a list of (iso code, value) tuples.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, -1)
+        >>> Dataset({"QAT": q, "RUS": r}).get_top_n_historical_co2(2007, 1)
+        [('RUS', 1604.778)]
+        """
+        return Country.get_top_n(self.get_historical_co2_emissions(year), n)
+
+
+class DatasetStore:
+    """
+    Represents the live dataset of a service. Readers call snapshot and never block;
+    writers build a new version of the dataset next to the current one (copying only
+    the countries they modify) and swap it in with a single assignment, so readers
+    always see a complete version.
+
+    Instance attributes: current (Dataset), write_lock (Lock)
+    Instance methods: snapshot, add_rows, replace
+    """
+
+    def __init__(self, dict_by_iso_codes=None):
+        """ (DatasetStore, dict) -> DatasetStore
+        Creates a store whose first version holds dict_by_iso_codes.
+
+        >>> DatasetStore().snapshot().version
+        0
+        """
+        if dict_by_iso_codes is None:
+            dict_by_iso_codes = {}
+        self.current = Dataset(dict_by_iso_codes, 0)
+        self.write_lock = threading.Lock()
+
+
+    def snapshot(self):
+        """ (DatasetStore) -> Dataset
+
+        Returns the current version of the dataset. It stays consistent
+        even if new versions are swapped in while it is being used.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> DatasetStore({"QAT": q}).snapshot().info.num_of_countries
+        1
+        """
+        return self.current
+
+
+    def add_rows(self, lines):
+        """ (DatasetStore, list) -> Dataset
+
+        The method adds lines of data with continents (as read by get_countries_from_file)
+        to a new version of the dataset, swaps it in and returns it.
+        Countries that are not modified are shared between versions.
+
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> store = DatasetStore({"QAT": q, "ALB": b})
+        >>> old = store.snapshot()
+        >>> new = store.add_rows(["QAT\\tQatar\\tASIA\\t1993\\t30.985\\t501000\\n",
+        ...                       "RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t14266000\\n"])
+        >>> new.version, len(new.dict_by_iso_codes)
+        (1, 3)
+        >>> new.dict_by_iso_codes["QAT"].get_historical_co2(2010)
+        93.884
+        >>> old.dict_by_iso_codes["QAT"].get_historical_co2(2010)
+        62.899
+        >>> new.dict_by_iso_codes["ALB"] is old.dict_by_iso_codes["ALB"]
+        True
+        """
+        with self.write_lock:
+            # start from a shallow copy of the current version
+            dict_by_iso_codes = dict(self.current.dict_by_iso_codes)
+            copied = set()
+
+            for line in lines:
+                columns = line.split("\t")
+                iso_code = columns[0]
+
+                # in case the country already exists, modify a copy of it
+                if iso_code in dict_by_iso_codes:
+                    if iso_code not in copied:
+                        dict_by_iso_codes[iso_code] = copy_country(dict_by_iso_codes[iso_code])
+                        copied.add(iso_code)
+                    dict_by_iso_codes[iso_code].add_yearly_data("\t".join(columns[3 : ]))
+                # in case it is a new country
+                else:
+                    dict_by_iso_codes[iso_code] = Country.get_country_from_data(line)
+                    copied.add(iso_code)
+
+            # swap the new version in
+            self.current = Dataset(dict_by_iso_codes, self.current.version + 1)
+            return self.current
+
+
+    def replace(self, dict_by_iso_codes):
+        """ (DatasetStore, dict) -> Dataset
+
+        The method swaps in a whole new dataset as the next version and returns it.
+
+        >>> store = DatasetStore()
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> store.replace({"QAT": q}).version
+        1
+        """
+        with self.write_lock:
+            self.current = Dataset(dict_by_iso_codes, self.current.version + 1)
+            return self.current
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
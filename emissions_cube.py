@@ -0,0 +1,289 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import json
+from build_countries import *
+
+
+# DEFINE CONSTANTS
+WORLD = "WORLD"
+CUBE_METRICS = ("co2", "population", "co2_per_capita", "cumulative_co2")
+
+
+# DEFINE CLASS
+class EmissionsCube:
+    """
+    Represents the yearly totals of every continent and of the whole world,
+    computed once for a dataset of countries. For every region and every year
+    from min_year to max_year, it stores the co2 emissions (in millions of tonnes)
+    and the population of the countries with data that year, the co2 emissions
+    per capita (in tonnes, from the countries with both values that year) and
+    the cumulative co2 emissions up to and including that year.
+    A value is found in constant time from its region, metric and year.
+
+    Instance attributes: min_year (int), max_year (int), continents (list),
+                         data (dict)
+    Instance methods: get_num_of_years, get_regions, get, get_by_year, get_range,
+                      write_to_file, get_cube_from_file
+    """
+
+    def __init__(self, dict_by_iso_codes):
+        """ (EmissionsCube, dict) -> EmissionsCube
+        Creates the cube of a dictionary mapping ISO codes to objects of type Country
+        in a single pass over the countries. Countries are added up in the order of
+        the dictionary, as Country.get_total_co2_emissions_per_capita_by_year and
+        Country.get_total_historical_co2_emissions do, so the totals are the same.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2006, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> c = EmissionsCube({"ALB": b, "RUS": r})
+        >>> c.min_year, c.max_year, c.continents
+        (2006, 2007, ['ASIA', 'EUROPE'])
+        >>> c.data["co2"]["EUROPE"]
+        [3.924, 1604.778]
+        >>> c.data["cumulative_co2"]["WORLD"]
+        [3.924, 1608.702]
+        """
+        # initialize variables
+        countries = list(dict_by_iso_codes.values())
+        continents = set()
+        years = set()
+        for country in countries:
+            continents.update(country.continents)
+            years.update(country.co2_emissions)
+            years.update(country.population)
+        self.continents = sorted(continents)
+        self.min_year = None
+        self.max_year = None
+        if years:
+            self.min_year = min(years)
+            self.max_year = max(years)
+        self.data = {}
+        for metric in CUBE_METRICS:
+            self.data[metric] = {}
+
+        # create the arrays of every region, with one value per year
+        num_of_years = self.get_num_of_years()
+        complete_co2 = {}
+        complete_population = {}
+        for region in self.get_regions():
+            self.data["co2"][region] = [0.0] * num_of_years
+            self.data["population"][region] = [0] * num_of_years
+            self.data["cumulative_co2"][region] = [0.0] * num_of_years
+            complete_co2[region] = [0.0] * num_of_years
+            complete_population[region] = [0] * num_of_years
+
+        # add the data of every country to its continents and to the world
+        for country in countries:
+            regions = country.continents + [WORLD]
+            for year in country.co2_emissions:
+                index = year - self.min_year
+                for region in regions:
+                    self.data["co2"][region][index] += country.co2_emissions[year]
+                    if year in country.population:
+                        complete_co2[region][index] += country.co2_emissions[year]
+                        complete_population[region][index] += country.population[year]
+            for year in country.population:
+                index = year - self.min_year
+                for region in regions:
+                    self.data["population"][region][index] += country.population[year]
+
+            # add the running total of the country to the cumulative totals
+            if country.co2_emissions:
+                cumulative_co2 = 0.0
+                for index in range(num_of_years):
+                    year = self.min_year + index
+                    if year in country.co2_emissions:
+                        cumulative_co2 += country.co2_emissions[year]
+                    for region in regions:
+                        self.data["cumulative_co2"][region][index] += cumulative_co2
+
+        # compute the co2 emissions per capita
+        for region in self.get_regions():
+            per_capita = []
+            for index in range(num_of_years):
+                if complete_population[region][index] == 0:
+                    per_capita.append(0.0)
+                else:
+                    per_capita.append((complete_co2[region][index] * 10**6) / complete_population[region][index])
+            self.data["co2_per_capita"][region] = per_capita
+
+
+    def get_num_of_years(self):
+        """ (EmissionsCube) -> int
+
+        Returns the number of years stored for every region.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2000, 3.924, 3034000)
+        >>> b.add_yearly_data("2004\\t4.0\\t3000000")
+        >>> EmissionsCube({"ALB": b}).get_num_of_years()
+        5
+        >>> EmissionsCube({}).get_num_of_years()
+        0
+        """
+        if self.min_year is None:
+            return 0
+        return self.max_year - self.min_year + 1
+
+
+    def get_regions(self):
+        """ (EmissionsCube) -> list
+
+        Returns the list of the regions of the cube: the continents in
+        alphabetical order, followed by the world.
+
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> EmissionsCube({"RUS": r}).get_regions()
+        ['ASIA', 'EUROPE', 'WORLD']
+        """
+        return self.continents + [WORLD]
+
+
+    def get(self, region, metric, year):
+        """ (EmissionsCube, str, str, int) -> float
+
+        Returns the value of the metric for the region in the year. Years after
+        the last year keep the last cumulative total; every other value outside
+        the years of the cube is 0.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> c = EmissionsCube({"ALB": b, "RUS": r})
+        >>> round(c.get("EUROPE", "co2_per_capita", 2007), 5)
+        92.98855
+        >>> c.get("WORLD", "population", 2007)
+        17300000
+        >>> c.get("ASIA", "cumulative_co2", 2020), c.get("ASIA", "co2", 2020)
+        (1604.778, 0.0)
+        >>> c.get("AFRICA", "co2", 2007)
+        0.0
+        """
+        # in case there is data for the region
+        values = self.data[metric].get(region)
+        if values:
+            index = year - self.min_year
+            if 0 <= index < len(values):
+                return values[index]
+            # the cumulative total stays the same after the last year
+            if index >= len(values) and metric == "cumulative_co2":
+                return values[-1]
+
+        # in case there is no data for the region in the year
+        if metric == "population":
+            return 0
+        return 0.0
+
+
+    def get_by_year(self, metric, year):
+        """ (EmissionsCube, str, int) -> list
+
+        Returns the list of the values of the metric in the year for every
+        continent, in alphabetical order of continents.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> EmissionsCube({"ALB": b, "RUS": r}).get_by_year("co2", 2007)
+        [1604.778, 1608.702]
+        """
+        return [self.get(continent, metric, year) for continent in self.continents]
+
+
+    def get_range(self, region, metric, min_year, max_year):
+        """ (EmissionsCube, str, str, int, int) -> list
+
+        Returns the list of the values of the metric for the region
+        for every year from min_year to max_year included.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2006, 3.924, 3034000)
+        >>> b.add_yearly_data("2007\\t4.5\\t3000000")
+        >>> EmissionsCube({"ALB": b}).get_range("EUROPE", "cumulative_co2", 2005, 2008)
+        [0.0, 3.924, 8.424, 8.424]
+        """
+        return [self.get(region, metric, year) for year in range(min_year, max_year + 1)]
+
+
+    def write_to_file(self, filename):
+        """ (EmissionsCube, str) -> NoneType
+
+        The method writes the cube to a JSON file, so that it can be kept next to
+        the data file it was computed from. It writes to a temporary file first
+        so that a partial cube is never read.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> EmissionsCube({"ALB": b}).write_to_file("cube_test1.json")
+        >>> os.path.exists("cube_test1.json")
+        True
+        """
+        cube = {"min_year": self.min_year, "max_year": self.max_year,
+                "continents": self.continents, "data": self.data}
+        fobj= open(filename + ".tmp", "w", encoding= "UTF-8")
+        json.dump(cube, fobj)
+        fobj.close()
+        os.replace(filename + ".tmp", filename)
+
+
+    @classmethod
+    def get_cube_from_file(cls, filename):
+        """ (type, str) -> EmissionsCube
+
+        The method reads a cube written by write_to_file and returns it.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2006, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> c1 = EmissionsCube({"ALB": b, "RUS": r})
+        >>> c1.write_to_file("cube_test2.json")
+        >>> c2 = EmissionsCube.get_cube_from_file("cube_test2.json")
+        >>> c2.data == c1.data, c2.min_year, c2.continents
+        (True, 2006, ['ASIA', 'EUROPE'])
+        """
+        fobj= open(filename, "r", encoding= "UTF-8")
+        data = json.load(fobj)
+        fobj.close()
+
+        # create the cube without computing it again
+        cube = cls.__new__(cls)
+        cube.min_year = data["min_year"]
+        cube.max_year = data["max_year"]
+        cube.continents = data["continents"]
+        cube.data = data["data"]
+        return cube
+
+
+# DEFINE FUNCTION
+def get_cube_for_file(dict_by_iso_codes, data_filename):
+    """ (dict, str) -> EmissionsCube
+
+    The function takes as input a dictionary mapping ISO codes to objects of type
+    Country and the name of the data file it was read from. It returns the cube of
+    the data, read from the file data_filename + ".cube.json" if that file is newer
+    than the data file, or computed and written to that file otherwise.
+
+    >>> fobj = open("cube_data1.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("ALB\\tAlbania\\tEUROPE\\t2007\\t3.924\\t3034000\\n")
+    38
+    >>> fobj.close()
+    >>> if os.path.exists("cube_data1.tsv.cube.json"): os.remove("cube_data1.tsv.cube.json")
+    >>> d = get_countries_from_file("cube_data1.tsv")
+    >>> c = get_cube_for_file(d, "cube_data1.tsv")
+    >>> os.path.exists("cube_data1.tsv.cube.json")
+    True
+    >>> get_cube_for_file(d, "cube_data1.tsv").data == c.data
+    True
+    """
+    cube_filename = data_filename + ".cube.json"
+
+    # in case the cube is up to date
+    if os.path.exists(cube_filename) and os.path.getmtime(cube_filename) >= os.path.getmtime(data_filename):
+        return EmissionsCube.get_cube_from_file(cube_filename)
+
+    # compute the cube and keep it next to the data file
+    cube = EmissionsCube(dict_by_iso_codes)
+    cube.write_to_file(cube_filename)
+    return cube
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
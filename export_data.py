@@ -0,0 +1,323 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import sys
+import ast
+import zipfile
+from array import array
+from build_countries import *
+
+# pyarrow is optional, the NPZ format is used when it is not installed
+try:
+    import pyarrow
+    import pyarrow.parquet
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+
+# DEFINE CONSTANTS
+COLUMNS = ("iso_code", "name", "continents", "year", "co2_emissions", "population")
+STRING_COLUMNS = ("iso_code", "name", "continents")
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+# DEFINE HELPER FUNCTIONS
+def get_columns(dict_by_iso_codes):
+    """ (dict) -> dict
+
+    The function takes as input a dictionary mapping ISO codes to objects of type Country.
+    It returns a dictionary mapping each column name to a list of values, with one row
+    per country and year. Rows are sorted by year within each country, and missing
+    co2 emissions or population are stored as None.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> q.add_yearly_data("1993\\t\\t501000")
+    >>> c = get_columns({"QAT": q})
+    >>> c["year"]
+    [1993, 2007]
+    >>> c["co2_emissions"]
+    [None, 62.899]
+    >>> c["continents"]
+    ['ASIA', 'ASIA']
+    """
+    # initialize the columns
+    columns = {}
+    for column in COLUMNS:
+        columns[column] = []
+
+    # add one row per country and year
+    for iso_code in dict_by_iso_codes:
+        country = dict_by_iso_codes[iso_code]
+        continents = ",".join(country.continents)
+        years = sorted(set(country.co2_emissions) | set(country.population))
+        for year in years:
+            columns["iso_code"].append(iso_code)
+            columns["name"].append(country.name)
+            columns["continents"].append(continents)
+            columns["year"].append(year)
+            columns["co2_emissions"].append(country.co2_emissions.get(year))
+            columns["population"].append(country.population.get(year))
+
+    # return the columns
+    return columns
+
+
+def write_npy(zip_file, name, values, column):
+    """ (ZipFile, str, list, str) -> NoneType
+
+    The function writes a list of values as a one-dimensional .npy array named
+    name inside an open zip file. Strings are stored as fixed width unicode,
+    years and populations as 64-bit integers (-1 when missing) and co2 emissions
+    as 64-bit floats (nan when missing).
+
+    >>> z = zipfile.ZipFile("npy_test1.npz", "w")
+    >>> write_npy(z, "year", [1993, 2007], "year")
+    >>> z.close()
+    >>> z = zipfile.ZipFile("npy_test1.npz")
+    >>> read_npy(z, "year")
+    [1993, 2007]
+    >>> z.close()
+    """
+    # convert the values to raw little endian bytes
+    if column in STRING_COLUMNS:
+        width = max([len(value) for value in values] + [1])
+        descr = "<U" + str(width)
+        data = b"".join(value.ljust(width, "\0").encode("utf-32-le") for value in values)
+    else:
+        if column == "co2_emissions":
+            descr = "<f8"
+            numbers = array("d", [float("nan") if value is None else value for value in values])
+        else:
+            descr = "<i8"
+            numbers = array("q", [-1 if value is None else value for value in values])
+        if sys.byteorder == "big":
+            numbers.byteswap()
+        data = numbers.tobytes()
+
+    # build the header, padded so that the data is aligned on 64 bytes
+    header = "{'descr': '" + descr + "', 'fortran_order': False, 'shape': (" + str(len(values)) + ",), }"
+    padding = 64 - (len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + " " * padding + "\n").encode("latin1")
+
+    # write the array
+    length = len(header).to_bytes(2, "little")
+    zip_file.writestr(name + ".npy", NPY_MAGIC + length + header + data)
+
+
+def read_npy(zip_file, name):
+    """ (ZipFile, str) -> list
+
+    The function reads the .npy array named name written by write_npy from an open
+    zip file and returns its values as a list. Missing values are returned as None.
+
+    >>> z = zipfile.ZipFile("npy_test2.npz", "w")
+    >>> write_npy(z, "name", ["Qatar", "Peru"], "name")
+    >>> write_npy(z, "co2_emissions", [1.5, None], "co2_emissions")
+    >>> z.close()
+    >>> z = zipfile.ZipFile("npy_test2.npz")
+    >>> read_npy(z, "name")
+    ['Qatar', 'Peru']
+    >>> read_npy(z, "co2_emissions")
+    [1.5, None]
+    >>> z.close()
+    """
+    # separate the header from the data
+    content = zip_file.read(name + ".npy")
+    header_length = int.from_bytes(content[8:10], "little")
+    header = ast.literal_eval(content[10 : 10 + header_length].decode("latin1"))
+    data = content[10 + header_length : ]
+    descr = header["descr"]
+
+    # in case the array holds strings
+    if descr.startswith("<U"):
+        width = int(descr[2:]) * 4
+        values = []
+        for start in range(0, len(data), width):
+            values.append(data[start : start + width].decode("utf-32-le").rstrip("\0"))
+        return values
+
+    # in case the array holds numbers
+    numbers = array("d" if descr == "<f8" else "q")
+    numbers.frombytes(data)
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    if descr == "<f8":
+        return [None if value != value else value for value in numbers]
+    return [None if value == -1 else value for value in numbers]
+
+
+def select_rows(columns, min_year, max_year):
+    """ (dict, int, int) -> dict
+
+    The function keeps only the rows of the columns whose year is between
+    min_year and max_year included. None means there is no bound.
+
+    >>> c = {"year": [1990, 2000, 2010], "name": ["a", "b", "c"]}
+    >>> select_rows(c, 1995, None)
+    {'year': [2000, 2010], 'name': ['b', 'c']}
+    >>> select_rows(c, None, 2000)["name"]
+    ['a', 'b']
+    """
+    # find which rows to keep
+    keep = []
+    for year in columns["year"]:
+        keep.append((min_year is None or year >= min_year) and (max_year is None or year <= max_year))
+
+    # filter every column
+    selected = {}
+    for column in columns:
+        selected[column] = [value for value, kept in zip(columns[column], keep) if kept]
+    return selected
+
+
+# DEFINE FUNCTIONS
+def export_countries(dict_by_iso_codes, filename):
+    """ (dict, str) -> str
+
+    The function writes all the data of a dictionary mapping ISO codes to objects
+    of type Country to a columnar file and returns the name of the file written.
+    The format is chosen from the extension of filename: .parquet or .arrow
+    (both need pyarrow) or .npz. If filename has none of these extensions,
+    .parquet is added when pyarrow is installed and .npz otherwise.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> q.add_yearly_data("1993\\t30.985\\t501000")
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, -1)
+    >>> export_countries({"QAT": q, "RUS": r}, "export_test1.npz")
+    'export_test1.npz'
+    """
+    # determine the format to use
+    extension = os.path.splitext(filename)[1]
+    if extension not in (".parquet", ".arrow", ".npz"):
+        if pyarrow is not None:
+            extension = ".parquet"
+        else:
+            extension = ".npz"
+        filename += extension
+    columns = get_columns(dict_by_iso_codes)
+
+    # in case the data is written with numpy's npz layout
+    if extension == ".npz":
+        zip_file = zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED)
+        for column in COLUMNS:
+            write_npy(zip_file, column, columns[column], column)
+        zip_file.close()
+        return filename
+
+    # in case the data is written with pyarrow
+    if pyarrow is None:
+        raise ImportError("pyarrow is needed to write " + extension + " files")
+    table = pyarrow.table(columns)
+    if extension == ".parquet":
+        pyarrow.parquet.write_table(table, filename)
+    else:
+        writer = pyarrow.ipc.new_file(filename, table.schema)
+        writer.write_table(table)
+        writer.close()
+    return filename
+
+
+def read_columns(filename, columns=COLUMNS, min_year=None, max_year=None):
+    """ (str, tuple, int, int) -> dict
+
+    The function reads a file written by export_countries.
+    It returns a dictionary mapping the requested column names to lists of values,
+    keeping only the rows whose year is between min_year and max_year included.
+    Columns that are not requested are not read.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> q.add_yearly_data("1993\\t30.985\\t501000")
+    >>> name = export_countries({"QAT": q}, "export_test2.npz")
+    >>> read_columns(name, ("iso_code", "co2_emissions"), min_year=2000)
+    {'iso_code': ['QAT'], 'co2_emissions': [62.899]}
+    >>> read_columns(name, ("population",))
+    {'population': [501000, 1218000]}
+    """
+    # the year column is always needed to select rows
+    wanted = list(columns)
+    if (min_year is not None or max_year is not None) and "year" not in wanted:
+        wanted.append("year")
+
+    # in case the data was written with numpy's npz layout
+    if filename.endswith(".npz"):
+        zip_file = zipfile.ZipFile(filename)
+        data = {}
+        for column in wanted:
+            data[column] = read_npy(zip_file, column)
+        zip_file.close()
+
+    # in case the data was written with pyarrow
+    else:
+        if pyarrow is None:
+            raise ImportError("pyarrow is needed to read " + filename)
+        if filename.endswith(".parquet"):
+            filters = []
+            if min_year is not None:
+                filters.append(("year", ">=", min_year))
+            if max_year is not None:
+                filters.append(("year", "<=", max_year))
+            table = pyarrow.parquet.read_table(filename, columns=wanted, filters=filters or None)
+        else:
+            table = pyarrow.ipc.open_file(filename).read_all().select(wanted)
+        data = table.to_pydict()
+
+    # keep only the rows and columns requested
+    if "year" in data:
+        data = select_rows(data, min_year, max_year)
+    selected = {}
+    for column in columns:
+        selected[column] = data[column]
+    return selected
+
+
+def import_countries(filename, min_year=None, max_year=None):
+    """ (str, int, int) -> dict
+
+    The function reads a file written by export_countries and returns a dictionary
+    mapping ISO codes to objects of type Country, keeping only the data recorded
+    between min_year and max_year included.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> q.add_yearly_data("1993\\t30.985\\t501000")
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, -1)
+    >>> name = export_countries({"QAT": q, "RUS": r}, "export_test3.npz")
+    >>> d = import_countries(name)
+    >>> str(d["QAT"])
+    'Qatar\\tASIA\\t{1993: 30.985, 2007: 62.899}\\t{1993: 501000, 2007: 1218000}'
+    >>> str(d["RUS"])
+    'Russia\\tASIA,EUROPE\\t{2007: 1604.778}\\t{}'
+    >>> str(import_countries(name, max_year=2000)["QAT"])
+    'Qatar\\tASIA\\t{1993: 30.985}\\t{1993: 501000}'
+    """
+    # initialize variables
+    dict_by_iso_codes = {}
+    columns = read_columns(filename, COLUMNS, min_year, max_year)
+    rows = zip(*[columns[column] for column in COLUMNS])
+
+    # rebuild the Country objects
+    for iso_code, name, continents, year, co2_emission, population in rows:
+        # in case there is no Country object associated with such country
+        if iso_code not in dict_by_iso_codes:
+            dict_by_iso_codes[iso_code] = Country(iso_code, name, continents.split(","), year, -1, -1)
+        country = dict_by_iso_codes[iso_code]
+
+        # update the Country object's attributes
+        if co2_emission is not None:
+            country.co2_emissions[year] = co2_emission
+        if population is not None:
+            country.population[year] = population
+
+    # the year sorted series must be built from the imported data
+    for iso_code in dict_by_iso_codes:
+        dict_by_iso_codes[iso_code].clear_series()
+
+    # return the dictionary
+    return dict_by_iso_codes
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
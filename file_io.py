@@ -0,0 +1,316 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import io
+import gzip
+import bz2
+import lzma
+import queue
+import threading
+from itertools import islice
+
+# zstandard is optional, .zst files are only supported when it is installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# DEFINE CONSTANTS
+DEFAULT_BUFFER_SIZE = 2 ** 16
+AVERAGE_LINE_LENGTH = 64
+CHUNK_SIZE = 2 ** 20
+QUEUE_SIZE = 8
+COMPRESSED_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+if zstandard is not None:
+    COMPRESSED_OPENERS[".zst"] = zstandard.open
+
+
+# DEFINE CLASS
+class BackgroundReader(io.RawIOBase):
+    """
+    Represents a binary stream whose data is read (and decompressed) by a
+    background thread, so that decompression overlaps the parsing done by
+    the thread consuming it.
+    
+    Instance attributes: binary_file (file), chunks (Queue), pending (memoryview),
+                         finished (bool), stopped (Event), thread (Thread)
+    Instance methods: readable, readinto, close, read_chunks
+    """
+    
+    def __init__(self, binary_file, chunk_size=CHUNK_SIZE, queue_size=QUEUE_SIZE):
+        """ (BackgroundReader, file, int, int) -> BackgroundReader
+        Creates a reader and starts the thread reading chunk_size bytes at a time
+        from binary_file. At most queue_size chunks are read ahead.
+        
+        >>> r = BackgroundReader(io.BytesIO(b"abc\\ndef"), chunk_size=2)
+        >>> r.read()
+        b'abc\\ndef'
+        >>> r.close()
+        """
+        self.binary_file = binary_file
+        self.chunks = queue.Queue(queue_size)
+        self.pending = memoryview(b"")
+        self.finished = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.read_chunks, args=(chunk_size,), daemon=True)
+        self.thread.start()
+    
+    
+    def read_chunks(self, chunk_size):
+        """ (BackgroundReader, int) -> NoneType
+        
+        The method runs in the background thread. It puts every chunk read from
+        the binary file in the queue, followed by an empty chunk marking the end
+        of the file. An exception raised while reading is put in the queue
+        so that it is raised again in the consuming thread.
+        
+        >>> r = BackgroundReader(io.BytesIO(b"xy"))
+        >>> r.thread.join()
+        >>> r.read()
+        b'xy'
+        """
+        try:
+            chunk = self.binary_file.read(chunk_size)
+            while chunk and not self.stopped.is_set():
+                self.put(chunk)
+                chunk = self.binary_file.read(chunk_size)
+        except Exception as error:
+            self.put(error)
+        self.put(b"")
+    
+    
+    def put(self, item):
+        """ (BackgroundReader, object) -> NoneType
+        
+        The method puts an item in the queue, giving up if the reader is closed
+        while the queue is full.
+        
+        >>> r = BackgroundReader(io.BytesIO(b""))
+        >>> r.close()
+        >>> r.put(b"ignored")
+        """
+        while not self.stopped.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+    
+    
+    def readable(self):
+        """ (BackgroundReader) -> bool
+        
+        The method returns True since the stream can be read.
+        
+        >>> BackgroundReader(io.BytesIO(b"")).readable()
+        True
+        """
+        return True
+    
+    
+    def readinto(self, buffer):
+        """ (BackgroundReader, bytearray) -> int
+        
+        The method copies the next available bytes into buffer and returns
+        how many were copied. It returns 0 at the end of the file.
+        
+        >>> r = BackgroundReader(io.BytesIO(b"hello"))
+        >>> b = bytearray(3)
+        >>> r.readinto(b)
+        3
+        >>> bytes(b)
+        b'hel'
+        >>> r.readinto(b)
+        2
+        >>> r.readinto(b)
+        0
+        """
+        # wait for the next chunk if the current one is used up
+        if len(self.pending) == 0:
+            if self.finished:
+                return 0
+            item = self.chunks.get()
+            if isinstance(item, Exception):
+                self.finished = True
+                raise item
+            if item == b"":
+                self.finished = True
+                return 0
+            self.pending = memoryview(item)
+        
+        # copy as much of the chunk as fits in the buffer
+        num_of_bytes = min(len(buffer), len(self.pending))
+        buffer[:num_of_bytes] = self.pending[:num_of_bytes]
+        self.pending = self.pending[num_of_bytes:]
+        return num_of_bytes
+    
+    
+    def close(self):
+        """ (BackgroundReader) -> NoneType
+        
+        The method stops the background thread and closes the binary file.
+        
+        >>> r = BackgroundReader(io.BytesIO(b"abc"))
+        >>> r.close()
+        >>> r.binary_file.closed
+        True
+        """
+        if not self.closed:
+            self.stopped.set()
+            self.thread.join()
+            self.binary_file.close()
+        io.RawIOBase.close(self)
+
+
+
+# DEFINE FUNCTIONS
+def get_compression(filename):
+    """ (str) -> str
+
+    The function returns the compressed file extension of filename
+    ('.gz', '.bz2', '.xz' or '.zst'), or an empty string if the file
+    is not compressed or its format is not supported.
+
+    >>> get_compression("large_co2_data.tsv.gz")
+    '.gz'
+    >>> get_compression("owid.txt.xz")
+    '.xz'
+    >>> get_compression("small_co2_data.tsv")
+    ''
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in COMPRESSED_OPENERS:
+        return extension
+    return ""
+
+
+def open_data_file(filename, mode="r", buffer_size=DEFAULT_BUFFER_SIZE, background=True):
+    """ (str, str, int, bool) -> file
+
+    The function opens a UTF-8 text file for reading ("r") or writing ("w").
+    Files ending in .gz, .bz2, .xz (or .zst when zstandard is installed)
+    are transparently decompressed or compressed.
+    When reading a compressed file and background is True, decompression is
+    done by a separate thread.
+
+    >>> fobj = open_data_file("open_test1.tsv.gz", "w")
+    >>> fobj.write("QAT\\tQatar\\n")
+    10
+    >>> fobj.close()
+    >>> fobj = open_data_file("open_test1.tsv.gz")
+    >>> fobj.readlines()
+    ['QAT\\tQatar\\n']
+    >>> fobj.close()
+
+    >>> fobj = open_data_file("open_test2.tsv.bz2", "w")
+    >>> fobj.write("a\\nb")
+    3
+    >>> fobj.close()
+    >>> fobj = open_data_file("open_test2.tsv.bz2", background=False)
+    >>> fobj.read()
+    'a\\nb'
+    >>> fobj.close()
+    """
+    compression = get_compression(filename)
+    
+    # in case the file is not compressed
+    if compression == "":
+        return open(filename, mode, encoding= "UTF-8", buffering= buffer_size)
+    
+    # in case the file is compressed
+    opener = COMPRESSED_OPENERS[compression]
+    if mode == "r" and background:
+        raw = BackgroundReader(opener(filename, "rb"))
+        return io.TextIOWrapper(io.BufferedReader(raw, buffer_size), encoding= "UTF-8")
+    return opener(filename, mode + "t", encoding= "UTF-8")
+
+
+def write_lines(lines, output_filename, buffer_size=DEFAULT_BUFFER_SIZE,
+                use_writelines=False, use_fadvise=False):
+    """ (iterable, str, int, bool, bool) -> int
+
+    The function takes as input an iterable of strings, each one being a line
+    of data ending with its own newline, and the file name of a file to be written,
+    which is compressed if its name ends in a supported extension.
+    Lines are consumed lazily and grouped into blocks of about buffer_size
+    characters which are written in a single call, so that the full output
+    never has to be held in memory.
+    If use_writelines is True, each block is handed to writelines instead of
+    being joined first. If use_fadvise is True and the platform supports it,
+    the kernel is told that the written pages will not be needed again.
+    The function returns an integer indicating the number of lines written.
+
+    >>> write_lines(["a\\tb\\n", "c\\td\\n", "e\\tf"], "write_test1.tsv")
+    3
+    >>> fobj = open("write_test1.tsv", "r", encoding= "UTF-8")
+    >>> fobj.read()
+    'a\\tb\\nc\\td\\ne\\tf'
+    >>> fobj.close()
+
+    >>> lines = (str(i) + "\\n" for i in range(1000))
+    >>> write_lines(lines, "write_test2.tsv", buffer_size=16, use_writelines=True)
+    1000
+    >>> fobj = open("write_test2.tsv", "r", encoding= "UTF-8")
+    >>> len(fobj.readlines())
+    1000
+    >>> fobj.close()
+
+    >>> write_lines([], "write_test3.tsv", use_fadvise=True)
+    0
+
+    >>> write_lines(["a\\n", "b\\n"], "write_test4.tsv.gz")
+    2
+    >>> fobj = open_data_file("write_test4.tsv.gz")
+    >>> fobj.read()
+    'a\\nb\\n'
+    >>> fobj.close()
+    """
+    # initialize variables
+    num_of_lines = 0
+    lines = iter(lines)
+    lines_per_block = max(1, buffer_size // AVERAGE_LINE_LENGTH)
+
+    # write the lines one block at a time
+    fobj= open_data_file(output_filename, "w", buffer_size)
+    block = list(islice(lines, lines_per_block))
+    while block:
+        write_block(fobj, block, use_writelines)
+        num_of_lines += len(block)
+        block = list(islice(lines, lines_per_block))
+
+    # let the kernel drop the pages we will not read back
+    if use_fadvise and hasattr(os, "posix_fadvise") and get_compression(output_filename) == "":
+        fobj.flush()
+        os.posix_fadvise(fobj.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    fobj.close()
+
+    # return the number of lines
+    return num_of_lines
+
+
+def write_block(fobj, block, use_writelines=False):
+    """ (file, list, bool) -> NoneType
+
+    The function writes a list of lines to an open file object in a single call.
+
+    >>> fobj = open("block_test1.txt", "w", encoding= "UTF-8")
+    >>> write_block(fobj, ["x\\n", "y\\n"])
+    >>> write_block(fobj, ["z\\n"], True)
+    >>> fobj.close()
+    >>> fobj = open("block_test1.txt", "r", encoding= "UTF-8")
+    >>> fobj.read()
+    'x\\ny\\nz\\n'
+    >>> fobj.close()
+    """
+    if use_writelines:
+        fobj.writelines(block)
+    else:
+        fobj.write("".join(block))
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
@@ -0,0 +1,128 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import json
+import shutil
+import hashlib
+from query_planner import *
+
+
+# DEFINE CONSTANTS
+INDEX_FILENAME = "index.json"
+TOP_N = 10
+
+
+# DEFINE HELPER FUNCTIONS
+def get_year_queries(year):
+    """ (int) -> list
+
+    The function returns the queries (see run_queries) answered by the shard of
+    a year, in the order of the keys of the shard.
+
+    >>> get_year_queries(2001)[0]
+    ('co2_per_capita', 'continent', 2001, None)
+    """
+    return [("co2_per_capita", "continent", year, None),
+            ("historical_co2", "continent", year, None),
+            ("co2_per_capita", "country", year, TOP_N),
+            ("historical_co2", "country", year, TOP_N)]
+
+
+def write_if_changed(content, filename):
+    """ (bytes, str) -> bool
+
+    The function writes content to filename unless the file already holds the
+    same content, so that unchanged files keep their modification time.
+    It returns True if the file was written, False otherwise.
+
+    >>> if os.path.exists("shard_test1.json"): os.remove("shard_test1.json")
+    >>> write_if_changed(b"{}", "shard_test1.json")
+    True
+    >>> write_if_changed(b"{}", "shard_test1.json")
+    False
+    """
+    # in case the file already holds the content
+    if os.path.exists(filename) and os.path.getsize(filename) == len(content):
+        fobj= open(filename, "rb")
+        same = fobj.read() == content
+        fobj.close()
+        if same:
+            return False
+
+    # write to a temporary file first so that a partial file is never served
+    fobj= open(filename + ".tmp", "wb")
+    fobj.write(content)
+    fobj.close()
+    os.replace(filename + ".tmp", filename)
+    return True
+
+
+# DEFINE FUNCTION
+def export_shards(dict_by_iso_codes, years, directory):
+    """ (dict, list, str) -> list
+
+    The function takes as input a dictionary mapping ISO codes to objects of type
+    Country. For every year, it writes to directory a compact JSON file <year>.json
+    with the values of the four yearly charts: the co2 emissions per capita and the
+    historical co2 emissions of every continent, and the top 10 countries for each.
+    All the values are computed in a single pass over the countries (see run_queries).
+    It also writes index.json, listing the continents and mapping every year to its
+    file and to a digest of its content, so that clients can tell when it changed.
+    Files whose content did not change are not written again.
+    It returns the sorted list of the years whose file was written.
+
+    >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+    >>> d = {"ALB": b, "RUS": r}
+    >>> shutil.rmtree("shards_test1", ignore_errors=True)
+    >>> export_shards(d, [2006, 2007], "shards_test1")
+    [2006, 2007]
+    >>> export_shards(d, [2006, 2007], "shards_test1")
+    []
+    >>> shard = json.load(open(os.path.join("shards_test1", "2007.json")))
+    >>> shard["historical_co2_by_continent"], shard["top_10_hist_co2"]
+    ([1604.778, 1608.702], [['RUS', 1604.778], ['ALB', 3.924]])
+    >>> index = json.load(open(os.path.join("shards_test1", "index.json")))
+    >>> index["continents"], index["years"]["2006"]["file"]
+    (['ASIA', 'EUROPE'], '2006.json')
+    """
+    # initialize variables
+    os.makedirs(directory, exist_ok=True)
+    all_continents = set()
+    for iso_code in dict_by_iso_codes:
+        all_continents.update(dict_by_iso_codes[iso_code].continents)
+    all_continents = sorted(all_continents)
+    index = {"continents": all_continents, "years": {}}
+    written = []
+
+    # answer the queries of every year together
+    queries = []
+    for year in years:
+        queries.extend(get_year_queries(year))
+    answers = run_queries(dict_by_iso_codes, queries)
+
+    # write the shard of every year
+    for position in range(len(years)):
+        year = years[position]
+        co2_pc, historical_co2, top_co2_pc, top_historical_co2 = answers[4 * position : 4 * position + 4]
+        shard = {"year": year, "co2_pc_by_continent": co2_pc,
+                 "historical_co2_by_continent": historical_co2,
+                 "top_10_co2_pc": top_co2_pc, "top_10_hist_co2": top_historical_co2}
+        content = json.dumps(shard, separators=(",", ":")).encode("UTF-8")
+        filename = str(year) + ".json"
+        if write_if_changed(content, os.path.join(directory, filename)):
+            written.append(year)
+        index["years"][str(year)] = {"file": filename, "digest": hashlib.sha256(content).hexdigest()[:16]}
+
+    # write the index and return the years written
+    content = json.dumps(index, separators=(",", ":"), sort_keys=True).encode("UTF-8")
+    write_if_changed(content, os.path.join(directory, INDEX_FILENAME))
+    written.sort()
+    return written
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
@@ -0,0 +1,236 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import time
+import argparse
+from chart_build import *
+from pipeline_cache import *
+from dataset import *
+from json_shards import *
+
+
+# DEFINE CONSTANTS
+TAB_SEP_FILENAME = "tab_sep_co2_data.tsv"
+CLEAN_FILENAME = "clean_co2_data.tsv"
+DATA_FILENAME = "co2_data.tsv"
+CACHE_DIRECTORY = ".pipeline_cache"
+MANIFEST_FILENAME = "charts_manifest.json"
+
+
+# DEFINE HELPER FUNCTIONS
+def parse_years(string):
+    """ (str) -> list
+
+    The function takes as input a comma separated list of years and ranges
+    of years (e.g. "1990-1995,2000") and returns the sorted list of the years.
+    A ValueError is raised if a range ends before it starts, so that
+    argparse reports it as an invalid value.
+
+    >>> parse_years("2000,1990-1993")
+    [1990, 1991, 1992, 1993, 2000]
+    >>> parse_years("2001")
+    [2001]
+    >>> parse_years("2001-1990")
+    Traceback (most recent call last):
+    ValueError
+    """
+    years = set()
+    for part in string.split(","):
+        # in case it is a range of years
+        if "-" in part:
+            first_year, last_year = part.split("-")
+            if int(last_year) < int(first_year):
+                raise ValueError
+            years.update(range(int(first_year), int(last_year) + 1))
+        else:
+            years.add(int(part))
+    return sorted(years)
+
+
+def parse_charts(string):
+    """ (str) -> list
+
+    The function takes as input a comma separated list of kinds of charts
+    and returns it as a list. A ValueError is raised if a kind is unknown.
+
+    >>> parse_charts("top_10_co2_pc,hist_co2_by_continent")
+    ['top_10_co2_pc', 'hist_co2_by_continent']
+    >>> parse_charts("pie_chart")
+    Traceback (most recent call last):
+    ValueError
+    """
+    kinds = string.split(",")
+    for kind in kinds:
+        if kind not in YEARLY_CHARTS:
+            raise ValueError
+    return kinds
+
+
+def print_timings(timings):
+    """ (list) -> NoneType
+
+    The function prints a table of the tuples (stage name, seconds, number of
+    items, True if the stage was skipped) returned by run_pipeline.
+
+    >>> print_timings([("clean_one", 1.5, 10, False), ("charts", 0.0, 0, True)])
+    clean_one                     1.500 s          10
+    charts                        0.000 s           0  skipped
+    total                         1.500 s
+    """
+    total = 0.0
+    for stage_name, seconds, num_of_items, skipped in timings:
+        total += seconds
+        line = stage_name.ljust(24) + " %10.3f s %11d" % (seconds, num_of_items)
+        if skipped:
+            line += "  skipped"
+        print(line)
+    print("total".ljust(24), "%10.3f s" % total)
+
+
+# DEFINE FUNCTIONS
+def run_pipeline(raw_filename, continents_filename, directory=".", years=None, kinds=None,
+                 jobs=1, resume=False, output=None, shards_directory=None):
+    """ (str, str, str, list, list, int, bool, OutputSpec, str) -> list
+
+    The function runs the whole pipeline: it cleans raw_filename, adds the continents
+    of continents_filename, reads the countries and creates the yearly charts of
+    every kind in kinds (by default, all of them) for every year in years (by default,
+    every year of the data). The intermediate files are written to directory, and so
+    are the charts unless output says otherwise; charts are created by jobs processes.
+    The outputs of the cleaning stages are kept in an ArtifactCache in directory.
+    If resume is True, the stages whose inputs did not change since their output
+    was cached are skipped (see run_stage), and so are the charts already created.
+    If shards_directory is given, the values of the yearly charts are also exported
+    there as JSON files (see export_shards).
+    It returns a list of tuples (stage name, seconds, number of lines or charts,
+    True if the stage was skipped).
+
+    >>> fobj = open("main_test1.txt", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT,Qatar,2001,41,215,615000\\nCMR-Cameroon-2001-3.324-16358000")
+    61
+    >>> fobj.close()
+    >>> fobj = open("main_continents1.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tAsia\\nCMR\\tAfrica")
+    19
+    >>> fobj.close()
+    >>> t = run_pipeline("main_test1.txt", "main_continents1.tsv", "main_out1", kinds=["top_10_co2_pc"])
+    >>> [(stage_name, num_of_items, skipped) for stage_name, seconds, num_of_items, skipped in t]
+    [('clean_one', 2, False), ('final_clean', 2, False), ('add_continents_to_data', 2, False), ('get_countries_from_file', 2, False), ('charts', 1, False)]
+    >>> sorted(os.listdir("main_out1"))
+    ['.pipeline_cache', 'charts_manifest.json', 'clean_co2_data.tsv', 'co2_data.tsv', 'tab_sep_co2_data.tsv', 'top_10_co2_pc_2001.png']
+    >>> t = run_pipeline("main_test1.txt", "main_continents1.tsv", "main_out1", kinds=["top_10_co2_pc"], resume=True)
+    >>> [(stage_name, skipped) for stage_name, seconds, num_of_items, skipped in t]
+    [('clean_one', True), ('final_clean', True), ('add_continents_to_data', True), ('get_countries_from_file', False), ('charts', False)]
+    >>> t[-1][2]
+    0
+    >>> fobj = open("main_continents1.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tEurope\\nCMR\\tAfrica")
+    21
+    >>> fobj.close()
+    >>> t = run_pipeline("main_test1.txt", "main_continents1.tsv", "main_out1", kinds=["top_10_co2_pc"], resume=True)
+    >>> [(stage_name, skipped) for stage_name, seconds, num_of_items, skipped in t][:3]
+    [('clean_one', True), ('final_clean', True), ('add_continents_to_data', False)]
+    """
+    # initialize variables
+    os.makedirs(directory, exist_ok=True)
+    if output is None:
+        output = OutputSpec(directory)
+    tab_sep_filename = os.path.join(directory, TAB_SEP_FILENAME)
+    clean_filename = os.path.join(directory, CLEAN_FILENAME)
+    data_filename = os.path.join(directory, DATA_FILENAME)
+    manifest_filename = os.path.join(directory, MANIFEST_FILENAME)
+    cache = ArtifactCache(os.path.join(directory, CACHE_DIRECTORY))
+    timings = []
+
+    # in case the run starts from the beginning, forget the charts already created
+    if not resume and os.path.exists(manifest_filename):
+        os.remove(manifest_filename)
+
+    # run the stages writing files, using their cached output if resuming
+    for stage_name, input_filenames, output_filename in get_pipeline_stages(
+            raw_filename, continents_filename, tab_sep_filename, clean_filename, data_filename):
+        start = time.perf_counter()
+        num_of_lines, cached = run_stage(cache, stage_name, input_filenames, output_filename, not resume)
+        timings.append((stage_name, time.perf_counter() - start, num_of_lines, cached))
+
+    # read the countries
+    start = time.perf_counter()
+    dict_by_iso_codes = get_countries_from_file(data_filename)
+    timings.append(("get_countries_from_file", time.perf_counter() - start, len(dict_by_iso_codes), False))
+
+    # create the charts, skipping the ones already created if resuming
+    start = time.perf_counter()
+    if years is None:
+        info = DatasetInfo(dict_by_iso_codes)
+        years = []
+        if info.min_year is not None:
+            years = list(range(info.min_year, info.max_year + 1))
+    created = build_charts(dict_by_iso_codes, years, manifest_filename, output, kinds, jobs)
+    timings.append(("charts", time.perf_counter() - start, len(created), False))
+
+    # export the values of the charts
+    if shards_directory is not None:
+        start = time.perf_counter()
+        written = export_shards(dict_by_iso_codes, years, shards_directory)
+        timings.append(("export_shards", time.perf_counter() - start, len(written), False))
+
+    # return the timings of every stage
+    return timings
+
+
+def main(arguments=None):
+    """ (list) -> NoneType
+
+    The function reads the command line arguments (or the given list of
+    arguments), runs the pipeline and prints the time taken by every stage.
+
+    >>> fobj = open("main_test2.txt", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT,Qatar,2001,41,215,615000")
+    28
+    >>> fobj.close()
+    >>> fobj = open("main_continents2.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tAsia")
+    8
+    >>> fobj.close()
+    >>> main(["main_test2.txt", "main_continents2.tsv", "--directory", "main_out2",
+    ...       "--years", "2001", "--charts", "top_10_co2_pc", "--format", "svg",
+    ...       "--shards", "main_shards2"]) # doctest: +ELLIPSIS
+    clean_one ...
+    export_shards ...
+    total ...
+    >>> os.path.exists(os.path.join("main_out2", "top_10_co2_pc_2001.svg"))
+    True
+    >>> sorted(os.listdir("main_shards2"))
+    ['2001.json', 'index.json']
+    """
+    # describe the command line arguments
+    parser = argparse.ArgumentParser(description="Clean a raw co2 data file, add the continents "
+                                     "of every country and create the yearly charts.")
+    parser.add_argument("raw_filename", help="raw data file from Our World in Data")
+    parser.add_argument("continents_filename", help="file mapping ISO codes to continents")
+    parser.add_argument("--directory", default=".", help="directory of the output files")
+    parser.add_argument("--jobs", type=int, default=1, help="number of processes creating charts")
+    parser.add_argument("--years", type=parse_years, default=None,
+                        help="years to plot, e.g. 1990-2000,2010 (default: every year)")
+    parser.add_argument("--charts", type=parse_charts, default=None,
+                        help="kinds of charts to create, separated by commas (default: all): "
+                             + ", ".join(YEARLY_CHARTS))
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the stages and charts completed by the previous run")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="png", help="format of the charts")
+    parser.add_argument("--dpi", type=int, default=None, help="resolution of the charts")
+    parser.add_argument("--shards", default=None, help="directory of the JSON files of every year")
+    args = parser.parse_args(arguments)
+
+    # run the pipeline and print the timings
+    output = OutputSpec(args.directory, args.format, args.dpi)
+    timings = run_pipeline(args.raw_filename, args.continents_filename, args.directory,
+                           args.years, args.charts, args.jobs, args.resume, output, args.shards)
+    print_timings(timings)
+
+
+# RUN PROGRAM
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import math
+import csv
+from array import array
+from build_countries import *
+
+
+# DEFINE CONSTANTS
+# the columns identifying a row; every other column of a schema is a metric
+KEY_COLUMNS = ("iso_code", "country", "continent", "year")
+# the columns of the data files with continents
+DEFAULT_SCHEMA = ("iso_code", "country", "continent", "year", "co2", "population")
+MISSING = float("nan")
+
+
+# DEFINE HELPER FUNCTION
+def parse_metric(string):
+    """ (str) -> float
+
+    The function converts a column of data to a float, or returns NaN
+    if the column is empty or is not a number.
+
+    >>> parse_metric("41.215")
+    41.215
+    >>> parse_metric("615000\\n")
+    615000.0
+    >>> math.isnan(parse_metric(""))
+    True
+    """
+    try:
+        return float(string)
+    except ValueError:
+        return MISSING
+
+
+# DEFINE CLASS
+class MetricStore:
+    """
+    Represents the yearly data of countries for any number of metrics, stored by
+    column: every metric is an array of floats with one value per row (NaN when
+    missing), so adding a metric adds one array instead of a dictionary per country.
+    Rows keep the order in which they were added, and a country has at most one row
+    per year: as with Country.add_yearly_data, the values of a later row for the same
+    year replace the earlier ones, except the missing ones.
+
+    Instance attributes: metrics (list), iso_codes (list), names (list), continents (list),
+                         positions (dict), rows_by_year (list), country_rows (array),
+                         years (array), values (dict)
+    Instance methods: add_row, get_metric, get_value, get_values_by_country,
+                      get_ratios_by_country, get_cumulative_by_country,
+                      get_totals_by_continent, get_ratios_by_continent,
+                      get_cumulative_by_continent, get_top_n, get_countries
+    """
+
+    def __init__(self, metrics):
+        """ (MetricStore, list) -> MetricStore
+        Creates an empty store for the metrics.
+
+        >>> s = MetricStore(["co2", "methane"])
+        >>> s.metrics, len(s.years)
+        (['co2', 'methane'], 0)
+        """
+        self.metrics = list(metrics)
+        self.iso_codes = []
+        self.names = []
+        self.continents = []
+        self.positions = {}
+        self.rows_by_year = []
+        self.country_rows = array("i")
+        self.years = array("i")
+        self.values = {}
+        for metric in self.metrics:
+            self.values[metric] = array("d")
+
+
+    def add_row(self, iso_code, name, continents, year, numbers):
+        """ (MetricStore, str, str, list, int, list) -> NoneType
+
+        The method adds a row of data, with one number per metric in the order
+        of the metrics (NaN when missing). If the country already has a row for
+        the year, the numbers that are not missing replace the ones of that row.
+
+        >>> s = MetricStore(["co2", "methane"])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2001, [41.215, 1.0])
+        >>> s.positions, list(s.values["co2"])
+        ({'QAT': 0}, [41.215])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2001, [42.0, MISSING])
+        >>> list(s.values["co2"]), list(s.values["methane"])
+        ([42.0], [1.0])
+        """
+        # in case it is the first row of that country
+        position = self.positions.get(iso_code)
+        if position is None:
+            position = len(self.iso_codes)
+            self.positions[iso_code] = position
+            self.iso_codes.append(iso_code)
+            self.names.append(name)
+            self.continents.append(continents)
+            self.rows_by_year.append({})
+
+        # in case the country already has a row for that year, the later values win
+        row = self.rows_by_year[position].get(year)
+        if row is not None:
+            for index in range(len(self.metrics)):
+                if not math.isnan(numbers[index]):
+                    self.values[self.metrics[index]][row] = numbers[index]
+            return
+
+        # add the row to every column
+        self.rows_by_year[position][year] = len(self.years)
+        self.country_rows.append(position)
+        self.years.append(year)
+        for index in range(len(self.metrics)):
+            self.values[self.metrics[index]].append(numbers[index])
+
+
+    def get_metric(self, metric):
+        """ (MetricStore, str) -> array
+
+        Returns the column of a metric. A KeyError is raised if there is no such metric.
+
+        >>> s = MetricStore(["co2"])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2001, [41.215])
+        >>> s.get_metric("co2")
+        array('d', [41.215])
+        """
+        return self.values[metric]
+
+
+    def get_value(self, iso_code, metric, year):
+        """ (MetricStore, str, str, int) -> float
+
+        Returns the value of the metric for the country in the year,
+        or None if it is missing.
+
+        >>> s = MetricStore(["co2", "methane"])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2001, [41.215, MISSING])
+        >>> s.get_value("QAT", "co2", 2001), s.get_value("QAT", "methane", 2001)
+        (41.215, None)
+        """
+        row = self.rows_by_year[self.positions[iso_code]].get(year)
+        if row is None or math.isnan(self.values[metric][row]):
+            return None
+        return self.values[metric][row]
+
+
+    def get_values_by_country(self, metric, year):
+        """ (MetricStore, str, int) -> dict
+
+        Returns a dictionary mapping the ISO code of every country with a value
+        of the metric in the year to that value.
+
+        >>> s = MetricStore(["co2"])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2001, [41.215])
+        >>> s.add_row("ALB", "Albania", ["EUROPE"], 2001, [MISSING])
+        >>> s.get_values_by_country("co2", 2001)
+        {'QAT': 41.215}
+        """
+        values = {}
+        column = self.values[metric]
+        for row in range(len(self.years)):
+            if self.years[row] == year and not math.isnan(column[row]):
+                values[self.iso_codes[self.country_rows[row]]] = column[row]
+        return values
+
+
+    def get_ratios_by_country(self, numerator, denominator, year, scale=1):
+        """ (MetricStore, str, str, int, float) -> dict
+
+        Returns a dictionary mapping the ISO code of every country with both
+        metrics in the year (and a denominator other than 0) to
+        numerator * scale / denominator, like Country.get_co2_per_capita_by_year
+        for co2 and population with a scale of 10**6 (except that a numerator
+        of 0 gives 0.0 instead of leaving the country out).
+
+        >>> s = MetricStore(["co2", "population"])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2007, [62.899, 1218000])
+        >>> s.add_row("ALB", "Albania", ["EUROPE"], 2007, [3.924, MISSING])
+        >>> {iso_code: round(value, 5) for iso_code, value in s.get_ratios_by_country("co2", "population", 2007, 10**6).items()}
+        {'QAT': 51.64122}
+        """
+        ratios = {}
+        numerators = self.values[numerator]
+        denominators = self.values[denominator]
+        for row in range(len(self.years)):
+            if self.years[row] == year and not math.isnan(numerators[row]) \
+               and not math.isnan(denominators[row]) and denominators[row] != 0:
+                ratios[self.iso_codes[self.country_rows[row]]] = (numerators[row] * scale) / denominators[row]
+        return ratios
+
+
+    def get_cumulative_by_country(self, metric, year):
+        """ (MetricStore, str, int) -> dict
+
+        Returns a dictionary mapping the ISO code of every country to the sum of
+        its values of the metric up to and including the year, added in order of
+        year like Country.get_historical_co2.
+
+        >>> s = MetricStore(["co2"])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2007, [62.899])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 1993, [30.985])
+        >>> s.add_row("ALB", "Albania", ["EUROPE"], 2007, [3.924])
+        >>> s.get_cumulative_by_country("co2", 2000)
+        {'QAT': 30.985, 'ALB': 0.0}
+        """
+        totals = {}
+        column = self.values[metric]
+        for position in range(len(self.iso_codes)):
+            rows_by_year = self.rows_by_year[position]
+            total = 0.0
+            for row_year in sorted(rows_by_year):
+                if row_year > year:
+                    break
+                row = rows_by_year[row_year]
+                if not math.isnan(column[row]):
+                    total += column[row]
+            totals[self.iso_codes[position]] = total
+        return totals
+
+
+    def get_totals_by_continent(self, metric, year):
+        """ (MetricStore, str, int) -> dict
+
+        Returns a dictionary mapping every continent to the sum of the values
+        of the metric of its countries in the year.
+
+        >>> s = MetricStore(["co2"])
+        >>> s.add_row("ALB", "Albania", ["EUROPE"], 2007, [3.924])
+        >>> s.add_row("RUS", "Russia", ["ASIA", "EUROPE"], 2007, [1604.778])
+        >>> s.get_totals_by_continent("co2", 2007)
+        {'EUROPE': 1608.702, 'ASIA': 1604.778}
+        """
+        totals = {}
+        for continents in self.continents:
+            for continent in continents:
+                totals[continent] = 0.0
+        values = self.get_values_by_country(metric, year)
+        for iso_code in values:
+            for continent in self.continents[self.positions[iso_code]]:
+                totals[continent] += values[iso_code]
+        return totals
+
+
+    def get_ratios_by_continent(self, numerator, denominator, year, scale=1):
+        """ (MetricStore, str, str, int, float) -> dict
+
+        Returns a dictionary mapping every continent to the sum of the numerator
+        times scale over the sum of the denominator, for its countries with both
+        metrics in the year (0.0 if the sum of the denominator is 0), like
+        Country.get_total_co2_emissions_per_capita_by_year for co2 and population
+        with a scale of 10**6.
+
+        >>> s = MetricStore(["co2", "population"])
+        >>> s.add_row("ALB", "Albania", ["EUROPE"], 2007, [3.924, 3034000])
+        >>> s.add_row("RUS", "Russia", ["ASIA", "EUROPE"], 2007, [1604.778, 14266000])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2007, [62.899, MISSING])
+        >>> r = s.get_ratios_by_continent("co2", "population", 2007, 10**6)
+        >>> round(r["EUROPE"], 5), round(r["ASIA"], 5)
+        (92.98855, 112.4897)
+        """
+        # add up the data of the countries with both metrics
+        numerator_totals = {}
+        denominator_totals = {}
+        numerators = self.values[numerator]
+        denominators = self.values[denominator]
+        for continents in self.continents:
+            for continent in continents:
+                numerator_totals[continent] = 0.0
+                denominator_totals[continent] = 0.0
+        for row in range(len(self.years)):
+            if self.years[row] == year and not math.isnan(numerators[row]) and not math.isnan(denominators[row]):
+                for continent in self.continents[self.country_rows[row]]:
+                    numerator_totals[continent] += numerators[row]
+                    denominator_totals[continent] += denominators[row]
+
+        # compute the ratio of every continent
+        ratios = {}
+        for continent in numerator_totals:
+            if denominator_totals[continent] == 0:
+                ratios[continent] = 0.0
+            else:
+                ratios[continent] = (numerator_totals[continent] * scale) / denominator_totals[continent]
+        return ratios
+
+
+    def get_cumulative_by_continent(self, metric, year):
+        """ (MetricStore, str, int) -> dict
+
+        Returns a dictionary mapping every continent to the sum of the values of
+        the metric of its countries up to and including the year, like
+        Country.get_total_historical_co2_emissions.
+
+        >>> s = MetricStore(["co2"])
+        >>> s.add_row("ALB", "Albania", ["EUROPE"], 2006, [3.924])
+        >>> s.add_row("RUS", "Russia", ["ASIA", "EUROPE"], 2007, [1604.778])
+        >>> s.get_cumulative_by_continent("co2", 2006)
+        {'EUROPE': 3.924, 'ASIA': 0.0}
+        """
+        totals = {}
+        cumulative = self.get_cumulative_by_country(metric, year)
+        for iso_code in cumulative:
+            for continent in self.continents[self.positions[iso_code]]:
+                totals[continent] = totals.get(continent, 0.0) + cumulative[iso_code]
+        return totals
+
+
+    def get_top_n(self, values, n):
+        """ (MetricStore, dict, int) -> list
+
+        Returns the n largest values of a dictionary mapping ISO codes to numbers,
+        as a list of (iso code, value) tuples. Ties are sorted by country name,
+        as Country.get_top_n does.
+
+        >>> s = MetricStore(["co2"])
+        >>> s.add_row("ZAF", "South Africa", ["AFRICA"], 2007, [1.0])
+        >>> s.add_row("ALB", "Albania", ["EUROPE"], 2007, [1.0])
+        >>> s.add_row("BEL", "Belgium", ["EUROPE"], 2007, [2.0])
+        >>> s.get_top_n(s.get_values_by_country("co2", 2007), 2)
+        [('BEL', 2.0), ('ALB', 1.0)]
+        """
+        iso_codes = sorted(values, key=lambda iso_code: (-values[iso_code], self.names[self.positions[iso_code]]))
+        return [(iso_code, values[iso_code]) for iso_code in iso_codes[ : n]]
+
+
+    def get_countries(self, co2_metric="co2", population_metric="population"):
+        """ (MetricStore, str, str) -> dict
+
+        Returns a dictionary mapping ISO codes to Country objects holding the
+        two metrics used as co2 emissions and population.
+
+        >>> s = MetricStore(["co2", "population"])
+        >>> s.add_row("QAT", "Qatar", ["ASIA"], 2007, [62.899, 1218000])
+        >>> str(s.get_countries()["QAT"])
+        'Qatar\\tASIA\\t{2007: 62.899}\\t{2007: 1218000}'
+        """
+        # convert the columns, using None for missing values
+        co2_emissions = [None if math.isnan(value) else value for value in self.values[co2_metric]]
+        populations = [None if math.isnan(value) else int(value) for value in self.values[population_metric]]
+        iso_codes = [self.iso_codes[position] for position in self.country_rows]
+        names = [self.names[position] for position in self.country_rows]
+        continents = [self.continents[position] for position in self.country_rows]
+        return Country.get_countries_from_columns(iso_codes, names, continents, list(self.years),
+                                                  co2_emissions, populations)
+
+
+# DEFINE FUNCTION
+def load_metric_store(filename, schema=None, delimiter="\t", errors=None):
+    """ (str, list, str, list) -> MetricStore
+
+    The function reads a data file into a MetricStore. The schema is the list of
+    the names of the columns: "iso_code", "country", "continent" (continents
+    separated by commas, optional) and "year" identify a row, and every other
+    column is a metric. If schema is None, it is read from the first line of the
+    file, as in the Our World in Data files. Columns are separated by delimiter
+    and may be quoted, as in CSV files. Rows with an invalid ISO code (such as the
+    aggregates of regions) are skipped. Rows with the wrong number of columns or
+    an invalid year are skipped too; if errors is a list, a tuple (line number,
+    column, value, reason) is added to it for each one, as with validate_lines.
+
+    >>> fobj = open("metric_test1.csv", "w", encoding= "UTF-8")
+    >>> fobj.write("country,year,iso_code,co2,methane,gdp\\n")
+    38
+    >>> fobj.write("Qatar,2001,QAT,41.215,,2.1e10\\nWorld,2001,,25000.0,8000.0,\\n")
+    58
+    >>> fobj.close()
+    >>> s = load_metric_store("metric_test1.csv", delimiter=",")
+    >>> s.metrics, s.iso_codes
+    (['co2', 'methane', 'gdp'], ['QAT'])
+    >>> s.get_value("QAT", "gdp", 2001), s.get_value("QAT", "methane", 2001)
+    (21000000000.0, None)
+
+    >>> fobj = open("metric_test3.csv", "w", encoding= "UTF-8")
+    >>> fobj.write('country,year,iso_code,co2\\n"Korea, South",2001,KOR,448.5\\nQatar,20O1,QAT,1\\nQatar,2001\\n')
+    84
+    >>> fobj.close()
+    >>> errors = []
+    >>> load_metric_store("metric_test3.csv", delimiter=",", errors=errors).names
+    ['Korea, South']
+    >>> for error in errors:
+    ...     print(error)
+    (3, 'year', '20O1', 'invalid year')
+    (4, 'line', 'Qatar,2001', 'wrong number of columns')
+
+    >>> fobj = open("metric_test2.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t14266000\\n")
+    46
+    >>> fobj.close()
+    >>> s = load_metric_store("metric_test2.tsv", DEFAULT_SCHEMA)
+    >>> s.continents, s.get_value("RUS", "population", 2007)
+    ([['ASIA', 'EUROPE']], 14266000.0)
+    """
+    fobj= open_data_file(filename)
+    reader = csv.reader(fobj, delimiter=delimiter)
+
+    # read the schema from the header if needed
+    if schema is None:
+        schema = next(reader, [])
+    schema = list(schema)
+    iso_code_index = schema.index("iso_code")
+    name_index = schema.index("country")
+    year_index = schema.index("year")
+    continent_index = None
+    if "continent" in schema:
+        continent_index = schema.index("continent")
+    metric_indexes = [index for index in range(len(schema)) if schema[index] not in KEY_COLUMNS]
+    store = MetricStore([schema[index] for index in metric_indexes])
+
+    # add every row of a country
+    for columns in reader:
+        if not columns:
+            continue
+
+        # in case the row is malformed
+        if len(columns) != len(schema):
+            if errors is not None:
+                errors.append((reader.line_num, "line", delimiter.join(columns), "wrong number of columns"))
+            continue
+        iso_code = columns[iso_code_index]
+        if not iso_is_valid(iso_code):
+            continue
+        if not columns[year_index].isdecimal():
+            if errors is not None:
+                errors.append((reader.line_num, "year", columns[year_index], "invalid year"))
+            continue
+        continents = []
+        if continent_index is not None and columns[continent_index] != "":
+            continents = columns[continent_index].split(",")
+        numbers = [parse_metric(columns[index]) for index in metric_indexes]
+        store.add_row(iso_code, columns[name_index], continents, int(columns[year_index]), numbers)
+
+    fobj.close()
+    return store
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
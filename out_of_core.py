@@ -0,0 +1,354 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+from itertools import islice
+from build_countries import *
+
+
+# DEFINE CONSTANT
+DEFAULT_CHUNK_SIZE = 100000
+
+
+# DEFINE HELPER FUNCTIONS
+def parse_number(string, number_type):
+    """ (str, type) -> object
+
+    The function converts a column of data to number_type and returns it,
+    or returns None if the column is empty or is not a number.
+
+    >>> parse_number("1.5", float)
+    1.5
+    >>> parse_number("130831000\\n", int)
+    130831000
+    >>> print(parse_number("\\n", int))
+    None
+    """
+    try:
+        return number_type(string)
+    except ValueError:
+        return None
+
+
+def parse_known_number(string, number_type):
+    """ (str, type) -> object
+
+    The function converts a column of data to number_type and returns it,
+    or returns None if the column is empty. As with add_yearly_data,
+    a ValueError is raised if the column is not a number.
+
+    >>> parse_known_number("1.5", float)
+    1.5
+    >>> print(parse_known_number("\\n", int))
+    None
+    >>> parse_known_number("n/a", float)
+    Traceback (most recent call last):
+    ValueError: could not convert string to float: 'n/a'
+    """
+    if string == '' or string == '\n':
+        return None
+    return number_type(string)
+
+
+# DEFINE CLASS
+class AggregateState:
+    """
+    Represents the partial state needed to compute the static aggregates for a
+    set of years, without keeping the whole dataset in memory: the co2 emissions of
+    every country by year, and the populations of the requested years only. As with
+    Country.add_yearly_data, a later line for the same country and year replaces the
+    values of the earlier one. Two states built from consecutive chunks of a file
+    can be merged.
+
+    Instance attributes: years (list), year_set (set), names (dict), continents (dict),
+                         co2_emissions (dict), population (dict), co2_series (dict)
+    Instance methods: add_line, merge, get_all_continents, get_historical_co2,
+                      get_co2_pc_by_continent, get_historical_co2_by_continent, get_top_n,
+                      get_top_n_co2_per_capita, get_top_n_historical_co2
+    """
+
+    def __init__(self, years):
+        """ (AggregateState, list) -> AggregateState
+        Creates an empty state for the list of years.
+
+        >>> s = AggregateState([2001, 1990])
+        >>> s.years
+        [1990, 2001]
+        """
+        self.years = sorted(years)
+        self.year_set = set(years)
+        self.names = {}
+        self.continents = {}
+        self.co2_emissions = {}
+        self.population = {}
+        self.co2_series = {}
+
+
+    def add_line(self, line):
+        """ (AggregateState, str) -> NoneType
+
+        The method updates the state with a line of data with continents,
+        as read by get_countries_from_file: numbers that cannot be read on the
+        first line of a country are treated as missing, and on later lines a
+        ValueError is raised.
+
+        >>> s = AggregateState([2000])
+        >>> s.add_line("QAT\\tQatar\\tASIA\\t1993\\t30.985\\t501000\\n")
+        >>> s.add_line("QAT\\tQatar\\tASIA\\t2000\\t40.0\\t\\n")
+        >>> s.add_line("QAT\\tQatar\\tASIA\\t2000\\t41.0\\t\\n")
+        >>> s.co2_emissions["QAT"], s.population["QAT"]
+        ({1993: 30.985, 2000: 41.0}, {})
+        >>> s.get_historical_co2("QAT", 2000)
+        71.985
+        >>> s.add_line("QAT\\tQatar\\tASIA\\t2001\\tn/a\\t\\n")
+        Traceback (most recent call last):
+        ValueError: could not convert string to float: 'n/a'
+        """
+        # separate the data into columns
+        columns = line.split("\t")
+        iso_code = columns[0]
+        year = int(columns[3])
+
+        # in case it is the first line of that country
+        if iso_code not in self.names:
+            co2_emission = parse_number(columns[4], float)
+            population = parse_number(columns[5], int)
+            self.names[iso_code] = columns[1]
+            self.continents[iso_code] = columns[2].split(",")
+            self.co2_emissions[iso_code] = {}
+            self.population[iso_code] = {}
+        else:
+            co2_emission = parse_known_number(columns[4], float)
+            population = parse_known_number(columns[5], int)
+
+        # keep every emission, the later one winning, and the requested populations only
+        if co2_emission is not None:
+            self.co2_emissions[iso_code][year] = co2_emission
+            self.co2_series.pop(iso_code, None)
+        if population is not None and year in self.year_set:
+            self.population[iso_code][year] = population
+
+
+    def merge(self, other):
+        """ (AggregateState, AggregateState) -> AggregateState
+
+        The method adds the data of another state for the same years to this one
+        and returns it. Countries keep the order in which they were first seen, and
+        the values of other win for the same country and year, so other must come
+        from a later part of the file. This lets states computed in parallel from
+        parts of a file be combined.
+
+        >>> s1 = AggregateState([2000])
+        >>> s1.add_line("QAT\\tQatar\\tASIA\\t1993\\t30.985\\t501000\\n")
+        >>> s1.add_line("QAT\\tQatar\\tASIA\\t2000\\t39.0\\t600000\\n")
+        >>> s2 = AggregateState([2000])
+        >>> s2.add_line("QAT\\tQatar\\tASIA\\t2000\\t40.0\\t600000\\n")
+        >>> s2.add_line("ALB\\tAlbania\\tEUROPE\\t2000\\t3.0\\t3000000\\n")
+        >>> s = s1.merge(s2)
+        >>> s.get_historical_co2("QAT", 2000), s.get_historical_co2("ALB", 2000)
+        (70.985, 3.0)
+        """
+        for iso_code in other.names:
+            # in case the country is new
+            if iso_code not in self.names:
+                self.names[iso_code] = other.names[iso_code]
+                self.continents[iso_code] = other.continents[iso_code]
+                self.co2_emissions[iso_code] = {}
+                self.population[iso_code] = {}
+
+            # merge the data of the country
+            self.co2_emissions[iso_code].update(other.co2_emissions[iso_code])
+            self.population[iso_code].update(other.population[iso_code])
+            self.co2_series.pop(iso_code, None)
+        return self
+
+
+    def get_all_continents(self):
+        """ (AggregateState) -> list
+
+        Returns the sorted list of all the continents of the countries.
+
+        >>> s = AggregateState([2000])
+        >>> s.add_line("RUS\\tRussia\\tASIA,EUROPE\\t2000\\t1.0\\t1\\n")
+        >>> s.get_all_continents()
+        ['ASIA', 'EUROPE']
+        """
+        all_continents = set()
+        for iso_code in self.continents:
+            all_continents.update(self.continents[iso_code])
+        return sorted(all_continents)
+
+
+    def get_historical_co2(self, iso_code, year):
+        """ (AggregateState, str, int) -> float
+
+        Returns the historical co2 emissions of the country up to the year, added
+        in increasing order of year from a YearSeries as Country.get_historical_co2
+        does. The series is built once and reused until the country's data changes.
+
+        >>> s = AggregateState([2007])
+        >>> s.add_line("QAT\\tQatar\\tASIA\\t2007\\t62.899\\t1218000\\n")
+        >>> s.add_line("QAT\\tQatar\\tASIA\\t1993\\t30.985\\t501000\\n")
+        >>> s.get_historical_co2("QAT", 2000), s.get_historical_co2("QAT", 2007)
+        (30.985, 93.884)
+        """
+        # build the series if it is missing
+        if iso_code not in self.co2_series:
+            self.co2_series[iso_code] = YearSeries(self.co2_emissions[iso_code])
+        return self.co2_series[iso_code].get_cumulative_sum(year)
+
+
+    def get_co2_pc_by_continent(self, year):
+        """ (AggregateState, int) -> list
+
+        Returns the list of the co2 emissions per capita of each continent in the
+        year, in alphabetical order of continents, as get_bar_co2_pc_by_continent does.
+
+        >>> s = AggregateState([2007])
+        >>> s.add_line("ALB\\tAlbania\\tEUROPE\\t2007\\t3.924\\t3034000\\n")
+        >>> s.add_line("RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t14266000\\n")
+        >>> [round(value, 5) for value in s.get_co2_pc_by_continent(2007)]
+        [112.4897, 92.98855]
+        """
+        co2_emissions = []
+        for continent in self.get_all_continents():
+            # add up the data of the countries with both values that year
+            total_co2 = 0.0
+            total_population = 0
+            for iso_code in self.names:
+                if continent in self.continents[iso_code]:
+                    if year in self.co2_emissions[iso_code] and year in self.population[iso_code]:
+                        total_co2 += self.co2_emissions[iso_code][year]
+                        total_population += self.population[iso_code][year]
+
+            # compute the co2 emissions per capita
+            if total_population == 0:
+                co2_emissions.append(0.0)
+            else:
+                co2_emissions.append((total_co2 * 10**6) / total_population)
+        return co2_emissions
+
+
+    def get_historical_co2_by_continent(self, year):
+        """ (AggregateState, int) -> list
+
+        Returns the list of the historical co2 emissions of each continent up to the
+        year, in alphabetical order of continents, as get_bar_historical_co2_by_continent does.
+
+        >>> s = AggregateState([2007])
+        >>> s.add_line("ALB\\tAlbania\\tEUROPE\\t2006\\t3.924\\t3034000\\n")
+        >>> s.add_line("ALB\\tAlbania\\tEUROPE\\t2007\\t4.0\\t3034000\\n")
+        >>> s.add_line("RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t14266000\\n")
+        >>> s.get_historical_co2_by_continent(2007)
+        [1604.778, 1612.702]
+        """
+        co2_emissions = []
+        for continent in self.get_all_continents():
+            total_co2_emissions = 0.0
+            for iso_code in self.names:
+                if continent in self.continents[iso_code]:
+                    total_co2_emissions += self.get_historical_co2(iso_code, year)
+            co2_emissions.append(total_co2_emissions)
+        return co2_emissions
+
+
+    def get_top_n(self, values, n):
+        """ (AggregateState, dict, int) -> list
+
+        Returns the n largest values of a dictionary mapping ISO codes to numbers,
+        as a list of (iso code, value) tuples. Ties are sorted by country name,
+        as Country.get_top_n does.
+
+        >>> s = AggregateState([2000])
+        >>> s.names = {"ZAF": "South Africa", "ALB": "Albania", "BEL": "Belgium"}
+        >>> s.get_top_n({"ZAF": 1.0, "ALB": 1.0, "BEL": 2.0}, 2)
+        [('BEL', 2.0), ('ALB', 1.0)]
+        """
+        iso_codes = sorted(values, key=lambda iso_code: (-values[iso_code], self.names[iso_code]))
+        return [(iso_code, values[iso_code]) for iso_code in iso_codes[ : n]]
+
+
+    def get_top_n_co2_per_capita(self, year, n):
+        """ (AggregateState, int, int) -> list
+
+        Returns the top n countries for co2 emissions per capita in the year,
+        as a list of (iso code, value) tuples. Countries without data are left out.
+
+        >>> s = AggregateState([2007])
+        >>> s.add_line("ALB\\tAlbania\\tEUROPE\\t2007\\t3.924\\t3034000\\n")
+        >>> s.add_line("RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t\\n")
+        >>> [(iso_code, round(value, 5)) for iso_code, value in s.get_top_n_co2_per_capita(2007, 10)]
+        [('ALB', 1.29334)]
+        """
+        co2_per_capita = {}
+        for iso_code in self.names:
+            co2_emission = self.co2_emissions[iso_code].get(year, 0.0)
+            population = self.population[iso_code].get(year, 0.0)
+            if co2_emission != 0.0 and population != 0.0:
+                co2_per_capita[iso_code] = (co2_emission * 10**6) / population
+        return self.get_top_n(co2_per_capita, n)
+
+
+    def get_top_n_historical_co2(self, year, n):
+        """ (AggregateState, int, int) -> list
+
+        Returns the top n countries for historical co2 emissions up to the year,
+        as a list of (iso code, value) tuples.
+
+        >>> s = AggregateState([2007])
+        >>> s.add_line("ALB\\tAlbania\\tEUROPE\\t2007\\t3.924\\t3034000\\n")
+        >>> s.add_line("RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t\\n")
+        >>> s.get_top_n_historical_co2(2007, 1)
+        [('RUS', 1604.778)]
+        """
+        historical_co2 = {}
+        for iso_code in self.names:
+            historical_co2[iso_code] = self.get_historical_co2(iso_code, year)
+        return self.get_top_n(historical_co2, n)
+
+
+# DEFINE FUNCTION
+def aggregate_file(filename, years, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ (str, list, int) -> AggregateState
+
+    The function reads a data file with continents chunk_size lines at a time
+    and adds every chunk to the state, so that only one chunk is in memory at once.
+    It returns the state, which gives the same aggregates as the in-memory functions
+    for the requested years.
+
+    >>> fobj = open("chunk_test1.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tQatar\\tASIA\\t1989\\t14.292\\t462000\\n")
+    34
+    >>> fobj.write("QAT\\tQatar\\tASIA\\t1993\\t30.985\\t501000\\n")
+    34
+    >>> fobj.write("QAT\\tQatar\\tASIA\\t2007\\t62.899\\t1218000\\n")
+    35
+    >>> fobj.write("RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t14266000\\n")
+    46
+    >>> fobj.close()
+    >>> s = aggregate_file("chunk_test1.tsv", [2000, 2007], chunk_size=2)
+    >>> s.get_historical_co2_by_continent(2000)
+    [45.277, 0.0]
+    >>> d = get_countries_from_file("chunk_test1.tsv")
+    >>> s.get_top_n_historical_co2(2007, 2) == Country.get_top_n(Country.get_historical_co2_emissions(list(d.values()), 2007), 2)
+    True
+    """
+    # initialize variables
+    state = AggregateState(years)
+
+    # process the file one chunk at a time
+    fobj= open_data_file(filename)
+    chunk = list(islice(fobj, chunk_size))
+    while chunk:
+        for line in chunk:
+            state.add_line(line)
+        chunk = list(islice(fobj, chunk_size))
+    fobj.close()
+
+    # return the state
+    return state
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
@@ -0,0 +1,311 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import json
+import shutil
+import hashlib
+from data_cleanup import *
+from add_continents import *
+
+
+# DEFINE CONSTANTS
+# the version of a stage must be increased whenever its output changes
+STAGE_VERSIONS = {"clean_one": 1, "final_clean": 2, "add_continents_to_data": 1}
+STAGE_FUNCTIONS = {"clean_one": clean_one, "final_clean": final_clean,
+                   "add_continents_to_data": add_continents_to_data}
+DEFAULT_CACHE_SIZE = 2 ** 30
+
+
+# DEFINE HELPER FUNCTIONS
+def hash_file(filename):
+    """ (str) -> str
+
+    The function returns the SHA-256 digest of the content of a file.
+
+    >>> fobj = open("hash_test1.txt", "w", encoding= "UTF-8")
+    >>> fobj.write("abc")
+    3
+    >>> fobj.close()
+    >>> hash_file("hash_test1.txt")[:16]
+    'ba7816bf8f01cfea'
+    """
+    digest = hashlib.sha256()
+    fobj= open(filename, "rb")
+    chunk = fobj.read(CHUNK_SIZE)
+    while chunk:
+        digest.update(chunk)
+        chunk = fobj.read(CHUNK_SIZE)
+    fobj.close()
+    return digest.hexdigest()
+
+
+def get_stage_key(stage_name, input_filenames, output_filename):
+    """ (str, list, str) -> str
+
+    The function returns the cache key of a stage: a digest of the name and
+    version of the stage, of the content of each of its input files and of the
+    compression of its output file, since the artifact is stored as written.
+
+    >>> fobj = open("key_test1.txt", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT,Qatar,2001,41,215,615000")
+    28
+    >>> fobj.close()
+    >>> k1 = get_stage_key("clean_one", ["key_test1.txt"], "out.tsv")
+    >>> k1 == get_stage_key("clean_one", ["key_test1.txt"], "other.tsv")
+    True
+    >>> k1 == get_stage_key("final_clean", ["key_test1.txt"], "out.tsv")
+    False
+    >>> k1 == get_stage_key("clean_one", ["key_test1.txt"], "out.tsv.gz")
+    False
+    """
+    digest = hashlib.sha256()
+    digest.update((stage_name + "\t" + str(STAGE_VERSIONS[stage_name])).encode("UTF-8"))
+    digest.update(get_compression(output_filename).encode("UTF-8"))
+    for filename in input_filenames:
+        digest.update(hash_file(filename).encode("UTF-8"))
+    return digest.hexdigest()
+
+
+# DEFINE CLASS
+class ArtifactCache:
+    """
+    Represents a directory storing the output files of the pipeline stages,
+    each one named after the key of the stage that produced it.
+    The least recently used artifacts are removed once the total size
+    of the cache goes over max_size bytes.
+
+    Instance attributes: directory (str), max_size (int)
+    Instance methods: get, put, evict, get_artifacts
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_CACHE_SIZE):
+        """ (ArtifactCache, str, int) -> ArtifactCache
+        Creates an object of type ArtifactCache, creating its directory if needed.
+
+        >>> c = ArtifactCache("cache_test1", 1000)
+        >>> os.path.isdir("cache_test1")
+        True
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+
+    def get(self, key, output_filename):
+        """ (ArtifactCache, str, str) -> int
+
+        The method copies the artifact stored under key to output_filename and
+        returns the number of lines it contains. It returns None if there is no
+        such artifact.
+
+        >>> c = ArtifactCache("cache_test2")
+        >>> print(c.get("missing", "cache_out1.txt"))
+        None
+        """
+        artifact_filename = os.path.join(self.directory, key)
+        metadata_filename = artifact_filename + ".json"
+
+        # in case there is no such artifact
+        if not os.path.exists(artifact_filename) or not os.path.exists(metadata_filename):
+            return None
+
+        # restore the artifact and mark it as recently used
+        shutil.copyfile(artifact_filename, output_filename)
+        os.utime(artifact_filename)
+        fobj= open(metadata_filename, "r", encoding= "UTF-8")
+        metadata = json.load(fobj)
+        fobj.close()
+        return metadata["num_of_lines"]
+
+
+    def put(self, key, output_filename, num_of_lines):
+        """ (ArtifactCache, str, str, int) -> NoneType
+
+        The method stores a copy of output_filename under key, with the number
+        of lines it contains, then evicts old artifacts if the cache is too big.
+
+        >>> fobj = open("cache_in1.txt", "w", encoding= "UTF-8")
+        >>> fobj.write("a\\nb\\n")
+        4
+        >>> fobj.close()
+        >>> c = ArtifactCache("cache_test3")
+        >>> c.put("k1", "cache_in1.txt", 2)
+        >>> c.get("k1", "cache_out2.txt")
+        2
+        >>> open("cache_out2.txt").read()
+        'a\\nb\\n'
+        """
+        artifact_filename = os.path.join(self.directory, key)
+
+        # write to temporary files first so that a partial artifact is never used
+        shutil.copyfile(output_filename, artifact_filename + ".tmp")
+        fobj= open(artifact_filename + ".json.tmp", "w", encoding= "UTF-8")
+        json.dump({"num_of_lines": num_of_lines}, fobj)
+        fobj.close()
+        os.replace(artifact_filename + ".tmp", artifact_filename)
+        os.replace(artifact_filename + ".json.tmp", artifact_filename + ".json")
+
+        self.evict()
+
+
+    def get_artifacts(self):
+        """ (ArtifactCache) -> list
+
+        The method returns a list of tuples (last use time, size, key) for every
+        artifact in the cache, from the least to the most recently used.
+
+        >>> ArtifactCache("cache_test4").get_artifacts()
+        []
+        """
+        artifacts = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") or name.endswith(".tmp"):
+                continue
+            status = os.stat(os.path.join(self.directory, name))
+            artifacts.append((status.st_mtime, status.st_size, name))
+        artifacts.sort()
+        return artifacts
+
+
+    def evict(self):
+        """ (ArtifactCache) -> int
+
+        The method removes the least recently used artifacts until the total size
+        of the cache is at most max_size, and returns the number of artifacts removed.
+
+        >>> fobj = open("cache_in2.txt", "w", encoding= "UTF-8")
+        >>> fobj.write("0123456789")
+        10
+        >>> fobj.close()
+        >>> c = ArtifactCache("cache_test5", 15)
+        >>> c.put("old", "cache_in2.txt", 1)
+        >>> os.utime(os.path.join("cache_test5", "old"), (0, 0))
+        >>> c.put("new", "cache_in2.txt", 1)
+        >>> [key for time, size, key in c.get_artifacts()]
+        ['new']
+        """
+        # initialize variables
+        artifacts = self.get_artifacts()
+        total_size = sum(size for time, size, key in artifacts)
+        num_of_removed = 0
+
+        # remove the oldest artifacts first
+        for time, size, key in artifacts:
+            if total_size <= self.max_size:
+                break
+            os.remove(os.path.join(self.directory, key))
+            if os.path.exists(os.path.join(self.directory, key + ".json")):
+                os.remove(os.path.join(self.directory, key + ".json"))
+            total_size -= size
+            num_of_removed += 1
+
+        return num_of_removed
+
+
+# DEFINE FUNCTIONS
+def get_pipeline_stages(raw_filename, continents_filename, tab_sep_filename, clean_filename, output_filename):
+    """ (str, str, str, str, str) -> list
+
+    The function returns the stages of the pipeline in the order they must run,
+    as a list of tuples (stage name, input files, output file).
+
+    >>> [stage_name for stage_name, input_filenames, output_filename in get_pipeline_stages("r", "c", "t", "l", "o")]
+    ['clean_one', 'final_clean', 'add_continents_to_data']
+    """
+    return [("clean_one", [raw_filename], tab_sep_filename),
+            ("final_clean", [tab_sep_filename], clean_filename),
+            ("add_continents_to_data", [clean_filename, continents_filename], output_filename)]
+
+
+def run_stage(cache, stage_name, input_filenames, output_filename, refresh=False):
+    """ (ArtifactCache, str, list, str, bool) -> tuple
+
+    The function runs the pipeline stage stage_name (clean_one, final_clean or
+    add_continents_to_data) on the input files to write output_filename, unless
+    the cache already holds its output for the same inputs and stage version.
+    If refresh is True, the stage is always run and its cached output replaced.
+    It returns a tuple (number of lines written, True if the cache was used).
+
+    >>> fobj = open("stage_test1.txt", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT,Qatar,2001,41,215,615000")
+    28
+    >>> fobj.close()
+    >>> shutil.rmtree("cache_test6", ignore_errors=True)
+    >>> c = ArtifactCache("cache_test6")
+    >>> run_stage(c, "clean_one", ["stage_test1.txt"], "stage_out1.tsv")
+    (1, False)
+    >>> run_stage(c, "clean_one", ["stage_test1.txt"], "stage_out1.tsv")
+    (1, True)
+    >>> run_stage(c, "clean_one", ["stage_test1.txt"], "stage_out1.tsv.gz")
+    (1, False)
+    >>> run_stage(c, "clean_one", ["stage_test1.txt"], "stage_out2.tsv")
+    (1, True)
+    >>> open("stage_out2.tsv", "rb").read()[:4]
+    b'QAT\\t'
+    >>> open_data_file("stage_out1.tsv.gz").read() == open("stage_out2.tsv").read()
+    True
+    >>> run_stage(c, "clean_one", ["stage_test1.txt"], "stage_out2.tsv", True)
+    (1, False)
+    """
+    key = get_stage_key(stage_name, input_filenames, output_filename)
+
+    # in case the output is already cached
+    if not refresh:
+        num_of_lines = cache.get(key, output_filename)
+        if num_of_lines is not None:
+            return num_of_lines, True
+
+    # run the stage and cache its output
+    function = STAGE_FUNCTIONS[stage_name]
+    num_of_lines = function(*input_filenames, output_filename)
+    cache.put(key, output_filename, num_of_lines)
+    return num_of_lines, False
+
+
+def run_cached_pipeline(cache, raw_filename, continents_filename,
+                        tab_sep_filename, clean_filename, output_filename):
+    """ (ArtifactCache, str, str, str, str, str) -> list
+
+    The function runs clean_one, final_clean and add_continents_to_data one after
+    the other, skipping every stage whose inputs have not changed since its output
+    was cached. It returns a list of tuples (stage name, number of lines, True if
+    the cache was used).
+
+    >>> fobj = open("pipeline_test1.txt", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT,Qatar,2001,41,215,615000")
+    28
+    >>> fobj.close()
+    >>> fobj = open("pipeline_continents1.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tAsia")
+    8
+    >>> fobj.close()
+    >>> shutil.rmtree("cache_test7", ignore_errors=True)
+    >>> c = ArtifactCache("cache_test7")
+    >>> files = ["pipeline_test1.txt", "pipeline_continents1.tsv", "p1.tsv", "p2.tsv", "p3.tsv"]
+    >>> run_cached_pipeline(c, *files)
+    [('clean_one', 1, False), ('final_clean', 1, False), ('add_continents_to_data', 1, False)]
+    >>> fobj = open("pipeline_continents1.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tAsia\\nQAT\\tEurope")
+    19
+    >>> fobj.close()
+    >>> run_cached_pipeline(c, *files)
+    [('clean_one', 1, True), ('final_clean', 1, True), ('add_continents_to_data', 1, False)]
+    >>> open("p3.tsv").read()
+    'QAT\\tQatar\\tASIA,EUROPE\\t2001\\t41.215\\t615000'
+    """
+    stages = get_pipeline_stages(raw_filename, continents_filename, tab_sep_filename,
+                                 clean_filename, output_filename)
+
+    # run every stage in order
+    results = []
+    for stage_name, input_filenames, stage_output_filename in stages:
+        num_of_lines, cached = run_stage(cache, stage_name, input_filenames, stage_output_filename)
+        results.append((stage_name, num_of_lines, cached))
+    return results
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
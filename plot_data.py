@@ -2,14 +2,123 @@
 
 # IMPORT MODULES
 import doctest
+import io
+import os
+import matplotlib
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 from data_cleanup import *
 from add_continents import *
 from build_countries import *
+from emissions_cube import *
+
+
+
+# DEFINE CONSTANTS
+# metadata keys written by matplotlib for each format, removed when stripping metadata
+METADATA_KEYS = {"png": ("Software",), "svg": ("Creator", "Date", "Format", "Type"),
+                 "pdf": ("Creator", "Producer", "CreationDate")}
+# the formats charts can be saved in
+OUTPUT_FORMATS = ("png", "svg", "pdf")
+
+
+
+# DEFINE CLASS
+class OutputSpec:
+    """
+    Represents how and where charts are saved.
+    If directory is None, charts are rendered to memory and their bytes are
+    kept in images, mapping file names to bytes, instead of being written to disk.
+    optimization_level 1 compresses PNG files as much as possible, and level 2
+    also rasterizes the plotted data of vector formats (svg, pdf) so that
+    charts with many points stay small.
+    
+    Instance attributes: directory (str), format (str), dpi (int),
+                         optimization_level (int), strip_metadata (bool), images (dict)
+    Instance methods: get_filename
+    """
+    
+    def __init__(self, directory=".", format="png", dpi=None, optimization_level=0, strip_metadata=False):
+        """ (OutputSpec, str, str, int, int, bool) -> OutputSpec
+        Creates an object of type OutputSpec. A dpi of None uses matplotlib's default.
+        
+        >>> o = OutputSpec(None, "svg", strip_metadata=True)
+        >>> o.format, o.images
+        ('svg', {})
+        """
+        self.directory = directory
+        self.format = format
+        self.dpi = dpi
+        self.optimization_level = optimization_level
+        self.strip_metadata = strip_metadata
+        self.images = {}
+    
+    
+    def get_filename(self, fig_name):
+        """ (OutputSpec, str) -> str
+        
+        Returns the name of the file of a chart, with the extension of the format.
+        
+        >>> OutputSpec("charts", "svg").get_filename("top_10_co2_pc_2001")
+        'charts/top_10_co2_pc_2001.svg'
+        >>> OutputSpec(None).get_filename("top_10_co2_pc_2001")
+        'top_10_co2_pc_2001.png'
+        """
+        filename = fig_name + "." + self.format
+        if self.directory is None:
+            return filename
+        return os.path.join(self.directory, filename)
 
 
 
 # DEFINE HELPER FUNCTIONS
+def save_figure(fig_name, output=None):
+    """ (str, OutputSpec) -> NoneType
+    
+    The function saves the current figure under fig_name (without extension).
+    If output is None, it is saved as a PNG file in the current directory.
+    Otherwise it is saved according to the output spec.
+    
+    >>> reset = plt.figure()
+    >>> bars = plt.bar(["A", "B"], [1, 2])
+    >>> o = OutputSpec(None, "svg", strip_metadata=True)
+    >>> save_figure("save_test", o)
+    >>> o.images["save_test.svg"][:5]
+    b'<?xml'
+    >>> b"<dc:date>" in o.images["save_test.svg"]
+    False
+    """
+    # in case the default settings are used
+    if output is None:
+        plt.savefig(fig_name + ".png")
+        return
+    
+    # gather the settings of the output spec
+    options = {"format": output.format}
+    if output.dpi is not None:
+        options["dpi"] = output.dpi
+    if output.strip_metadata and output.format in METADATA_KEYS:
+        options["metadata"] = dict.fromkeys(METADATA_KEYS[output.format])
+    if output.optimization_level >= 1 and output.format == "png":
+        options["pil_kwargs"] = {"optimize": True}
+    if output.optimization_level >= 2 and output.format in ("svg", "pdf"):
+        for axes in plt.gcf().get_axes():
+            for artist in axes.patches + axes.lines + axes.collections:
+                artist.set_rasterized(True)
+    
+    # in case the chart is kept in memory
+    if output.directory is None:
+        buffer = io.BytesIO()
+        plt.savefig(buffer, **options)
+        output.images[output.get_filename(fig_name)] = buffer.getvalue()
+    
+    # in case the chart is written to disk
+    else:
+        os.makedirs(output.directory, exist_ok=True)
+        plt.savefig(output.get_filename(fig_name), **options)
+
+
 def shorten_names(all_continents):
     """ (list) -> NoneType
     
@@ -38,14 +147,31 @@ def shorten_names(all_continents):
             all_continents[index] = "N. AMERICA"
 
 
+def get_line_colours(colormap, num_of_lines):
+    """ (str, int) -> list
+    
+    The function returns the colours of num_of_lines lines picked evenly
+    along the named matplotlib colormap, from its first colour to its last one.
+    
+    >>> colours = get_line_colours("viridis", 3)
+    >>> len(colours), colours[0] == matplotlib.colormaps["viridis"](0.0)
+    (3, True)
+    """
+    colours = matplotlib.colormaps[colormap]
+    return [colours(index / max(num_of_lines - 1, 1)) for index in range(num_of_lines)]
+
+
 
 # DEFINE FUNCTIONS
-def get_bar_co2_pc_by_continent(dict_by_iso_codes, year):
-    """ (dict, int) -> list
+def get_bar_co2_pc_by_continent(dict_by_iso_codes, year, output=None, cube=None):
+    """ (dict, int, OutputSpec, EmissionsCube) -> list
     
     The function creates a bar plot representing the co2 emissions per capital
     (in tonnes) produced by all countries in each continent.
     It returns a list of the values being plotted.
+    The chart is saved according to output (see OutputSpec), or as a PNG
+    file in the current directory if output is None.
+    If the cube of the data is given, the values are read from it instead.
     
     >>> d1 = get_countries_from_file("small_co2_data.tsv")
     >>> get_bar_co2_pc_by_continent(d1, 2001)
@@ -70,28 +196,44 @@ def get_bar_co2_pc_by_continent(dict_by_iso_codes, year):
     7.6609
     >>> round(data[3],5) # S. AMERICA
     1.41961
-    """
-    # initialize variables
-    all_countries = []
-    co2_emissions = []
-    
-    # compile all Country objects
-    for iso_code in dict_by_iso_codes:
-        country = dict_by_iso_codes[iso_code]
-        all_countries.append(country)
     
-    # sort the Country objects by their continent
-    countries_per_continent = Country.get_countries_by_continent(all_countries)
+    >>> reset = plt.figure()
+    >>> o = OutputSpec(None, "svg", optimization_level=2)
+    >>> data = get_bar_co2_pc_by_continent(d3, 2001, o)
+    >>> list(o.images)
+    ['co2_pc_by_continent_2001.svg']
     
-    # create a list of all continents from the dictionary's keys
-    all_continents = list(countries_per_continent.keys())
-    all_continents.sort()
+    >>> reset = plt.figure()
+    >>> get_bar_co2_pc_by_continent(d3, 2001, o, EmissionsCube(d3)) == data
+    True
+    """
+    # in case the values are precomputed in the cube
+    if cube is not None:
+        all_continents = cube.continents[:]
+        co2_emissions = cube.get_by_year("co2_per_capita", year)
     
-    # compute the continent's co2 emission per capita for the given year
-    for continent in all_continents:
-        countries = countries_per_continent[continent]
-        continent_co2_emission = Country.get_total_co2_emissions_per_capita_by_year(countries, year)
-        co2_emissions.append(continent_co2_emission)
+    else:
+        # initialize variables
+        all_countries = []
+        co2_emissions = []
+        
+        # compile all Country objects
+        for iso_code in dict_by_iso_codes:
+            country = dict_by_iso_codes[iso_code]
+            all_countries.append(country)
+        
+        # sort the Country objects by their continent
+        countries_per_continent = Country.get_countries_by_continent(all_countries)
+        
+        # create a list of all continents from the dictionary's keys
+        all_continents = list(countries_per_continent.keys())
+        all_continents.sort()
+        
+        # compute the continent's co2 emission per capita for the given year
+        for continent in all_continents:
+            countries = countries_per_continent[continent]
+            continent_co2_emission = Country.get_total_co2_emissions_per_capita_by_year(countries, year)
+            co2_emissions.append(continent_co2_emission)
     
     # shorten names of continents
     shorten_names(all_continents)
@@ -105,19 +247,22 @@ def get_bar_co2_pc_by_continent(dict_by_iso_codes, year):
     plt.ylabel("co2 (in tonnes)")
     
     # save the graph
-    fig_name = "co2_pc_by_continent_" + str(year) + ".png"
-    plt.savefig(fig_name)
+    fig_name = "co2_pc_by_continent_" + str(year)
+    save_figure(fig_name, output)
 
     # return a list of the values plotted
     return co2_emissions
 
 
-def get_bar_historical_co2_by_continent(dict_by_iso_codes, year):
-    """ (dict, int) -> list
+def get_bar_historical_co2_by_continent(dict_by_iso_codes, year, output=None, cube=None):
+    """ (dict, int, OutputSpec, EmissionsCube) -> list
     
     The function creates a bar plot representing the historical co2 emissions (in
     millions of tonnes) produced by all countries in each continent.
     It returns a list of the values being plotted.
+    The chart is saved according to output (see OutputSpec), or as a PNG
+    file in the current directory if output is None.
+    If the cube of the data is given, the values are read from it instead.
     
     >>> reset = plt.figure()
     >>> d1 = get_countries_from_file("small_co2_data.tsv")
@@ -143,28 +288,38 @@ def get_bar_historical_co2_by_continent(dict_by_iso_codes, year):
     41.215
     >>> round(data[2], 5) # EUROPE
     355.619
-    """
-    # initialize variables
-    all_countries = []
-    co2_emissions = []
     
-    # compile all Country objects
-    for iso_code in dict_by_iso_codes:
-        country = dict_by_iso_codes[iso_code]
-        all_countries.append(country)
-    
-    # sort the Country objects by their continent
-    countries_per_continent = Country.get_countries_by_continent(all_countries)
-    
-    # create a list of all continents from the dictionary's keys
-    all_continents = list(countries_per_continent.keys())
-    all_continents.sort()
+    >>> reset = plt.figure()
+    >>> get_bar_historical_co2_by_continent(d2, 2001, cube=EmissionsCube(d2)) == data
+    True
+    """
+    # in case the values are precomputed in the cube
+    if cube is not None:
+        all_continents = cube.continents[:]
+        co2_emissions = cube.get_by_year("cumulative_co2", year)
     
-    # compute the continent's historic co2 emission up until the given year
-    for continent in all_continents:
-        countries = countries_per_continent[continent]
-        continent_co2_emission = Country.get_total_historical_co2_emissions(countries, year)
-        co2_emissions.append(continent_co2_emission)
+    else:
+        # initialize variables
+        all_countries = []
+        co2_emissions = []
+        
+        # compile all Country objects
+        for iso_code in dict_by_iso_codes:
+            country = dict_by_iso_codes[iso_code]
+            all_countries.append(country)
+        
+        # sort the Country objects by their continent
+        countries_per_continent = Country.get_countries_by_continent(all_countries)
+        
+        # create a list of all continents from the dictionary's keys
+        all_continents = list(countries_per_continent.keys())
+        all_continents.sort()
+        
+        # compute the continent's historic co2 emission up until the given year
+        for continent in all_continents:
+            countries = countries_per_continent[continent]
+            continent_co2_emission = Country.get_total_historical_co2_emissions(countries, year)
+            co2_emissions.append(continent_co2_emission)
     
     # shorten names of continents
     shorten_names(all_continents)
@@ -178,19 +333,21 @@ def get_bar_historical_co2_by_continent(dict_by_iso_codes, year):
     plt.ylabel("co2 (in millions of tonnes)")
     
     # save the graph
-    fig_name = "hist_co2_by_continent_" + str(year) + ".png"
-    plt.savefig(fig_name)
+    fig_name = "hist_co2_by_continent_" + str(year)
+    save_figure(fig_name, output)
 
     # return a list of the values plotted
     return co2_emissions
 
 
-def get_bar_co2_pc_top_ten(dict_by_iso_codes, year):
-    """ (dict, int) -> list
+def get_bar_co2_pc_top_ten(dict_by_iso_codes, year, output=None):
+    """ (dict, int, OutputSpec) -> list
     
     The function creates a bar plot representing the co2 emissions per capital
     (in tonnes) produced by the top 10 producing countries in the dictionary.
     It returns a list of the values being plotted.
+    The chart is saved according to output (see OutputSpec), or as a PNG
+    file in the current directory if output is None.
     
     >>> reset = plt.figure()
     >>> d1 = get_countries_from_file("small_co2_data.tsv")
@@ -252,20 +409,22 @@ def get_bar_co2_pc_top_ten(dict_by_iso_codes, year):
     plt.ylabel("co2 (in tonnes)")
     
     # save the graph
-    fig_name = "top_10_co2_pc_" + str(year) + ".png"
-    plt.savefig(fig_name)
+    fig_name = "top_10_co2_pc_" + str(year)
+    save_figure(fig_name, output)
 
     # return a list of the values plotted
     return top_ten_co2_emissions
 
 
-def get_bar_top_ten_historical_co2(dict_by_iso_codes, year):
-    """ (dict, int) -> list
+def get_bar_top_ten_historical_co2(dict_by_iso_codes, year, output=None):
+    """ (dict, int, OutputSpec) -> list
     
     The function creates a bar plot representing the historical co2 emissions
     (in millions of tonnes) produced by the top 10 producing countries
     in the dictionary.
     It returns a list of the values being plotted.
+    The chart is saved according to output (see OutputSpec), or as a PNG
+    file in the current directory if output is None.
     
     >>> reset = plt.figure()
     >>> d1 = get_countries_from_file("small_co2_data.tsv")
@@ -334,21 +493,23 @@ def get_bar_top_ten_historical_co2(dict_by_iso_codes, year):
     plt.ylabel("co2 (in millions of tonnes)")
     
     # save the graph
-    fig_name = "top_10_hist_co2_" + str(year) + ".png"
-    plt.savefig(fig_name)
+    fig_name = "top_10_hist_co2_" + str(year)
+    save_figure(fig_name, output)
 
     # return a list of the values plotted
     return top_ten_co2_emissions
 
 
-def get_plot_co2_emissions(dict_by_iso_codes, iso_codes, min_year, max_year):
-    """ (dict, list, int, int) -> list
+def get_plot_co2_emissions(dict_by_iso_codes, iso_codes, min_year, max_year, output=None):
+    """ (dict, list, int, int, OutputSpec) -> list
     
     The function plots the co2 emissions of the selected countries from
     min_year to max_year.
     It returns a 2D list for which each sublist contains the co2 emission of
     a selected country from min_year to max_year, and the position of the sublist
     matches the position of the ISO code in the input list.
+    The chart is saved according to output (see OutputSpec), or as a PNG
+    file in the current directory if output is None.
     
     >>> reset = plt.figure()
     >>> d2 = get_countries_from_file("large_co2_data.tsv")
@@ -379,6 +540,14 @@ def get_plot_co2_emissions(dict_by_iso_codes, iso_codes, min_year, max_year):
     0.0
     >>> data[1][1] # GBR
     0.0
+    
+    >>> reset = plt.figure()
+    >>> b = Country("ALB", "Albania", ["EUROPE"], 2006, 3.924, 3034000)
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> codes = ["ALB", "XYZ", "QAT", "ALB", "QAT", "ALB", "QAT"]
+    >>> data = get_plot_co2_emissions({"ALB": b, "QAT": q}, codes, 2006, 2007, OutputSpec(None))
+    >>> data[1], len(data), codes[:2]
+    ([0.0, 62.899], 6, ['ALB', 'QAT'])
     """
     # initialize variables
     styles = [".:b", "s:c", "*:k", "x:m", "D:g"]
@@ -395,19 +564,16 @@ def get_plot_co2_emissions(dict_by_iso_codes, iso_codes, min_year, max_year):
     
     for iso_code in copy_iso_codes:
         # update the 2D list to return
-        sublist = []
         if iso_code in dict_by_iso_codes:
             country = dict_by_iso_codes[iso_code]
         # in case there is no data available at all for such country
         # remove country from the list
         else:
             iso_codes.remove(iso_code)
-            break
+            continue
         
-        # create and append sublist for that country
-        for year in range(min_year, max_year + 1):
-            co2_emission = country.get_co2_emissions_by_year(year)
-            sublist.append(co2_emission)
+        # create and append sublist for that country from its year sorted series
+        sublist = country.get_co2_series().get_dense(min_year, max_year)
         list_2D.append(sublist)
         
         # retrieve and sort the data from the years to plot
@@ -416,7 +582,7 @@ def get_plot_co2_emissions(dict_by_iso_codes, iso_codes, min_year, max_year):
             co2_emissions_to_plot.append(list_2D[counter][index])
         
         # plot the data
-        plt.plot(years_to_plot, co2_emissions_to_plot, styles[counter])
+        plt.plot(years_to_plot, co2_emissions_to_plot, styles[counter % len(styles)])
         counter += 1
     
     # define the graph's properties
@@ -427,14 +593,177 @@ def get_plot_co2_emissions(dict_by_iso_codes, iso_codes, min_year, max_year):
     plt.legend(iso_codes)
     
     # save the graph
-    fig_name = "co2_emissions_" + str(min_year) + "_" + str(max_year) + ".png"
-    plt.savefig(fig_name)
+    fig_name = "co2_emissions_" + str(min_year) + "_" + str(max_year)
+    save_figure(fig_name, output)
 
     # return a list of the values plotted
     return list_2D    
 
 
 
+def get_plot_co2_emissions_collection(dict_by_iso_codes, iso_codes, min_year, max_year,
+                                      highlight=(), colormap="viridis", output=None):
+    """ (dict, list, int, int, list, str, OutputSpec) -> list
+    
+    The function plots the co2 emissions of any number of countries from
+    min_year to max_year, every year included. All the lines are drawn at once as
+    a single collection, coloured along the colormap in the order of the countries,
+    so that hundreds of countries can be plotted quickly. If iso_codes is None,
+    every country of the dictionary is plotted; unknown ISO codes are skipped.
+    The countries in highlight are drawn on top, thicker, and named in the legend,
+    while the other ones are faded.
+    It returns a 2D list for which each sublist contains the co2 emissions of
+    a plotted country from min_year to max_year, in the order of the countries.
+    The chart is saved according to output (see OutputSpec), or as a PNG
+    file in the current directory if output is None.
+    
+    >>> reset = plt.figure()
+    >>> b = Country("ALB", "Albania", ["EUROPE"], 2006, 3.924, 3034000)
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+    >>> d = {"ALB": b, "QAT": q, "RUS": r}
+    >>> o = OutputSpec(None)
+    >>> get_plot_co2_emissions_collection(d, None, 2006, 2008, ["QAT"], output=o)
+    [[3.924, 0.0, 0.0], [0.0, 62.899, 0.0], [0.0, 1604.778, 0.0]]
+    >>> get_plot_co2_emissions_collection(d, ["XYZ", "RUS"], 2007, 2007, output=o)
+    [[1604.778]]
+    >>> sorted(o.images)
+    ['co2_emissions_collection_2006_2008.png', 'co2_emissions_collection_2007_2007.png']
+    """
+    # initialize variables
+    if iso_codes is None:
+        iso_codes = list(dict_by_iso_codes)
+    iso_codes = [iso_code for iso_code in iso_codes if iso_code in dict_by_iso_codes]
+    highlight = set(highlight)
+    years = range(min_year, max_year + 1)
+    list_2D = []
+    lines = []
+    highlighted_lines = []
+    
+    # create the line of every country from the years of its sorted series
+    for iso_code in iso_codes:
+        sublist = dict_by_iso_codes[iso_code].get_co2_series().get_dense(min_year, max_year)
+        list_2D.append(sublist)
+        line = list(zip(years, sublist))
+        if iso_code in highlight:
+            highlighted_lines.append(line)
+        else:
+            lines.append(line)
+    
+    # pick the colours of the lines along the colormap
+    all_colours = get_line_colours(colormap, len(iso_codes))
+    highlighted_colours = []
+    other_colours = []
+    for index in range(len(iso_codes)):
+        if iso_codes[index] in highlight:
+            highlighted_colours.append(all_colours[index])
+        else:
+            other_colours.append(all_colours[index])
+    
+    # draw all the lines at once, the highlighted ones on top
+    axes = plt.gca()
+    alpha = 1.0
+    if highlighted_lines:
+        alpha = 0.3
+    axes.add_collection(LineCollection(lines, colors=other_colours, linewidths=0.8, alpha=alpha))
+    axes.add_collection(LineCollection(highlighted_lines, colors=highlighted_colours, linewidths=2.0))
+    axes.autoscale_view()
+    
+    # define the graph's properties
+    title = "CO2 emissions between " + str(min_year) + " and " + str(max_year)
+    title += " by annie.kuo@mail.mcgill.ca"
+    plt.title(title)
+    plt.ylabel("co2 (in millions of tonnes)")
+    if highlighted_lines:
+        handles = [Line2D([], [], color=colour, linewidth=2.0) for colour in highlighted_colours]
+        plt.legend(handles, [iso_code for iso_code in iso_codes if iso_code in highlight])
+    
+    # save the graph
+    fig_name = "co2_emissions_collection_" + str(min_year) + "_" + str(max_year)
+    save_figure(fig_name, output)
+    
+    # return a list of the values plotted
+    return list_2D
+
+
+
+def get_grid_co2_emissions_by_continent(dict_by_iso_codes, min_year, max_year, colormap="viridis",
+                                        num_of_columns=3, output=None):
+    """ (dict, int, int, str, int, OutputSpec) -> dict
+    
+    The function plots the co2 emissions of the countries from min_year to
+    max_year, every year included, as a grid of small charts sharing the same
+    axes: one chart per continent, in alphabetical order, with num_of_columns
+    charts per row. The series of every country are computed once, even for
+    countries in several continents, and the whole grid is saved as a single figure.
+    It returns a dictionary mapping every continent to a 2D list for which each
+    sublist contains the co2 emissions of one of its countries from min_year to
+    max_year, in the order of the countries.
+    The chart is saved according to output (see OutputSpec), or as a PNG
+    file in the current directory if output is None.
+    
+    >>> b = Country("ALB", "Albania", ["EUROPE"], 2006, 3.924, 3034000)
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+    >>> o = OutputSpec(None)
+    >>> data = get_grid_co2_emissions_by_continent({"ALB": b, "QAT": q, "RUS": r}, 2006, 2007, output=o)
+    >>> data["ASIA"]
+    [[0.0, 62.899], [0.0, 1604.778]]
+    >>> data["EUROPE"]
+    [[3.924, 0.0], [0.0, 1604.778]]
+    >>> list(o.images)
+    ['co2_emissions_by_continent_2006_2007.png']
+    """
+    # initialize variables
+    countries_by_continent = Country.get_countries_by_continent(list(dict_by_iso_codes.values()))
+    all_continents = sorted(countries_by_continent)
+    years = range(min_year, max_year + 1)
+    lines_by_iso_code = {}
+    data_by_continent = {}
+    
+    # create the line of every country once, from the years of its sorted series
+    for iso_code in dict_by_iso_codes:
+        sublist = dict_by_iso_codes[iso_code].get_co2_series().get_dense(min_year, max_year)
+        lines_by_iso_code[iso_code] = (sublist, list(zip(years, sublist)))
+    
+    # create a grid of charts sharing the same axes
+    num_of_rows = max((len(all_continents) + num_of_columns - 1) // num_of_columns, 1)
+    figure, grid = plt.subplots(num_of_rows, num_of_columns, sharex=True, sharey=True, squeeze=False,
+                                figsize=(4 * num_of_columns, 3 * num_of_rows))
+    all_axes = [axes for row in grid for axes in row]
+    names = all_continents[:]
+    shorten_names(names)
+    
+    # draw the lines of every continent at once in its own chart
+    for index in range(len(all_continents)):
+        countries = countries_by_continent[all_continents[index]]
+        data_by_continent[all_continents[index]] = [lines_by_iso_code[country.iso_code][0] for country in countries]
+        lines = [lines_by_iso_code[country.iso_code][1] for country in countries]
+        axes = all_axes[index]
+        axes.add_collection(LineCollection(lines, colors=get_line_colours(colormap, len(lines)), linewidths=0.8))
+        axes.autoscale_view()
+        axes.set_title(names[index])
+    
+    # hide the charts left empty
+    for axes in all_axes[len(all_continents) : ]:
+        axes.set_axis_off()
+    
+    # define the graph's properties
+    title = "CO2 emissions by continent between " + str(min_year) + " and " + str(max_year)
+    title += " by annie.kuo@mail.mcgill.ca"
+    figure.suptitle(title)
+    figure.supylabel("co2 (in millions of tonnes)")
+    
+    # save the graph and close it
+    fig_name = "co2_emissions_by_continent_" + str(min_year) + "_" + str(max_year)
+    save_figure(fig_name, output)
+    plt.close(figure)
+    
+    # return the values plotted for every continent
+    return data_by_continent
+
+
+
 # TEST MODULE
 if __name__ == "__main__":
     doctest.testmod()
\ No newline at end of file
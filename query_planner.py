@@ -0,0 +1,151 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+from build_countries import *
+
+
+# DEFINE CONSTANTS
+METRICS = ("co2_per_capita", "historical_co2")
+GROUPINGS = ("continent", "country")
+
+
+# DEFINE HELPER FUNCTION
+def plan_queries(queries):
+    """ (list) -> dict
+
+    The function takes as input a list of queries, each one a tuple
+    (metric, grouping, year, top n), where metric is "co2_per_capita" or
+    "historical_co2" and grouping is "continent" or "country". Top n is only
+    used for countries. It returns a dictionary mapping "per_capita_years" and
+    "historical_years" to the sorted lists of the years needed for each metric,
+    so that every query can be answered from a single pass over the countries.
+    An AssertionError is raised if a query has an unknown metric or grouping.
+
+    >>> plan_queries([("co2_per_capita", "continent", 2001, None),
+    ...               ("historical_co2", "country", 1990, 10),
+    ...               ("co2_per_capita", "country", 2001, 10)])
+    {'per_capita_years': [2001], 'historical_years': [1990]}
+    >>> plan_queries([("co2", "continent", 2001, None)])
+    Traceback (most recent call last):
+    AssertionError
+    """
+    # gather the years of every metric, shared by all the queries
+    per_capita_years = set()
+    historical_years = set()
+    for metric, grouping, year, top_n in queries:
+        if metric not in METRICS or grouping not in GROUPINGS:
+            raise AssertionError
+        if metric == "co2_per_capita":
+            per_capita_years.add(year)
+        else:
+            historical_years.add(year)
+
+    # return the plan
+    return {"per_capita_years": sorted(per_capita_years),
+            "historical_years": sorted(historical_years)}
+
+
+# DEFINE FUNCTION
+def run_queries(dict_by_iso_codes, queries):
+    """ (dict, list) -> list
+
+    The function takes as input a dictionary mapping ISO codes to objects of type
+    Country and a list of queries (see plan_queries). It goes through the countries
+    once, computing the co2 emissions per capita and the historical co2 emissions
+    of every year needed, and returns the list of the answers in the order of the
+    queries. The answer to a query on continents is the list of the values of
+    every continent in alphabetical order, as get_bar_co2_pc_by_continent and
+    get_bar_historical_co2_by_continent return. The answer to a query on countries
+    is the list of (iso code, value) tuples of the top n countries, as
+    Country.get_top_n returns; countries without a per capita value are left out.
+
+    >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 1993, 30.985, 501000)
+    >>> q.add_yearly_data("2007\\t62.899\\t")
+    >>> d = {"ALB": b, "RUS": r, "QAT": q}
+    >>> a = run_queries(d, [("co2_per_capita", "continent", 2007, None),
+    ...                     ("historical_co2", "continent", 2007, None),
+    ...                     ("co2_per_capita", "country", 2007, 2),
+    ...                     ("historical_co2", "country", 2000, 2)])
+    >>> [round(value, 5) for value in a[0]]
+    [112.4897, 92.98855]
+    >>> a[1]
+    [1698.662, 1608.702]
+    >>> [(iso_code, round(value, 5)) for iso_code, value in a[2]]
+    [('RUS', 112.4897), ('ALB', 1.29334)]
+    >>> a[3]
+    [('QAT', 30.985), ('ALB', 0.0)]
+    """
+    # initialize variables
+    plan = plan_queries(queries)
+    per_capita_years = plan["per_capita_years"]
+    historical_years = plan["historical_years"]
+    all_continents = set()
+    complete_co2 = {}
+    complete_population = {}
+    historical_co2 = {}
+    per_capita_by_country = {}
+    historical_by_country = {}
+    for year in per_capita_years:
+        complete_co2[year] = {}
+        complete_population[year] = {}
+        per_capita_by_country[year] = {}
+    for year in historical_years:
+        historical_co2[year] = {}
+        historical_by_country[year] = {}
+
+    # go through the countries once, in the order of the dictionary
+    for iso_code in dict_by_iso_codes:
+        country = dict_by_iso_codes[iso_code]
+        all_continents.update(country.continents)
+
+        # the values of the years needing the co2 emissions per capita
+        for year in per_capita_years:
+            co2_per_capita = country.get_co2_per_capita_by_year(year)
+            if co2_per_capita is not None:
+                per_capita_by_country[year][country] = co2_per_capita
+            if year in country.co2_emissions and year in country.population:
+                for continent in country.continents:
+                    complete_co2[year][continent] = complete_co2[year].get(continent, 0.0) + country.co2_emissions[year]
+                    complete_population[year][continent] = complete_population[year].get(continent, 0) + country.population[year]
+
+        # the values of the years needing the historical co2 emissions
+        series = country.get_co2_series()
+        for year in historical_years:
+            co2_emission = series.get_cumulative_sum(year)
+            historical_by_country[year][country] = co2_emission
+            for continent in country.continents:
+                historical_co2[year][continent] = historical_co2[year].get(continent, 0.0) + co2_emission
+
+    # answer every query from the computed values
+    all_continents = sorted(all_continents)
+    answers = []
+    for metric, grouping, year, top_n in queries:
+        # in case the query is about continents
+        if grouping == "continent" and metric == "co2_per_capita":
+            answer = []
+            for continent in all_continents:
+                total_population = complete_population[year].get(continent, 0)
+                if total_population == 0:
+                    answer.append(0.0)
+                else:
+                    answer.append((complete_co2[year][continent] * 10**6) / total_population)
+        elif grouping == "continent":
+            answer = [historical_co2[year].get(continent, 0.0) for continent in all_continents]
+
+        # in case the query is about countries
+        elif metric == "co2_per_capita":
+            answer = Country.get_top_n(per_capita_by_country[year], top_n)
+        else:
+            answer = Country.get_top_n(historical_by_country[year], top_n)
+        answers.append(answer)
+
+    # return the answers
+    return answers
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
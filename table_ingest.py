@@ -0,0 +1,179 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+from build_countries import *
+from add_continents import *
+
+# pandas and pyarrow are optional, their tables are only supported when they are installed
+try:
+    import pandas
+except ImportError:
+    pandas = None
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+# DEFINE CONSTANT
+# the names of the columns read, as in the Our World in Data tables
+TABLE_COLUMNS = ("iso_code", "country", "year", "co2", "population")
+
+
+# DEFINE HELPER FUNCTIONS
+def get_continents_by_iso_code(countries_per_continent):
+    """ (dict) -> dict
+
+    The function takes as input a dictionary mapping continents' names to lists of
+    ISO codes (as returned by get_iso_codes_by_continent) and returns the dictionary
+    mapping every ISO code to the list of its continents, in the same order as
+    add_continent_to_line, so that the continents of a row are found with a single lookup.
+
+    >>> get_continents_by_iso_code({"ASIA": ["RUS", "QAT"], "EUROPE": ["RUS"]})
+    {'RUS': ['ASIA', 'EUROPE'], 'QAT': ['ASIA']}
+    """
+    continents_by_iso_code = {}
+    for continent in countries_per_continent:
+        for iso_code in countries_per_continent[continent]:
+            if iso_code not in continents_by_iso_code:
+                continents_by_iso_code[iso_code] = []
+            continents_by_iso_code[iso_code].append(continent)
+    return continents_by_iso_code
+
+
+def is_missing(value):
+    """ (object) -> bool
+
+    The function returns True if the value of a table means missing data:
+    None, NaN, or pandas.NA and NaT when pandas is installed.
+
+    >>> is_missing(None), is_missing(float("nan")), is_missing(0.0), is_missing("")
+    (True, True, False, False)
+    """
+    if value is None:
+        return True
+    if pandas is not None:
+        return bool(pandas.isna(value))
+    # NaN is the only value not equal to itself
+    return isinstance(value, float) and value != value
+
+
+def get_table_column(table, name):
+    """ (object, str) -> list
+
+    The function returns the column called name of a table as a list, with None for
+    missing values (see is_missing). The table may be a dictionary mapping names to
+    sequences of values, a pandas DataFrame (including nullable columns, whose missing
+    values are pandas.NA) or a pyarrow Table or RecordBatch (where both nulls and NaN
+    mean missing). A KeyError is raised if the table has no such column.
+
+    >>> get_table_column({"year": (2001, 2002)}, "year")
+    [2001, 2002]
+    >>> get_table_column({"co2": [41.215, float("nan")]}, "co2")
+    [41.215, None]
+    >>> if pandas is not None:
+    ...     table = pandas.DataFrame({"population": pandas.array([1218000, None], dtype="Int64")})
+    ... else:
+    ...     table = {"population": [1218000, None]}
+    >>> get_table_column(table, "population")
+    [1218000, None]
+    >>> if pyarrow is not None:
+    ...     table = pyarrow.table({"population": [1218000.0, float("nan"), None]})
+    ... else:
+    ...     table = {"population": [1218000.0, float("nan"), None]}
+    >>> get_table_column(table, "population")
+    [1218000.0, None, None]
+    """
+    # in case it is a pyarrow table
+    if pyarrow is not None and isinstance(table, (pyarrow.Table, pyarrow.RecordBatch)):
+        if name not in table.schema.names:
+            raise KeyError(name)
+        values = table.column(name).to_pylist()
+
+    # in case it is a pandas DataFrame or a dictionary of columns
+    elif pandas is not None and isinstance(table, pandas.DataFrame):
+        values = table[name].tolist()
+    else:
+        values = list(table[name])
+
+    return [None if is_missing(value) else value for value in values]
+
+
+# DEFINE FUNCTION
+def get_countries_from_table(table, countries_per_continent, dict_by_iso_codes=None,
+                             column_names=TABLE_COLUMNS):
+    """ (object, dict, dict, tuple) -> dict
+
+    The function takes as input a table of data already in memory (see get_table_column)
+    and a dictionary mapping continents' names to lists of ISO codes (as returned by
+    get_iso_codes_by_continent). It returns a dictionary mapping ISO codes to Country
+    objects, built directly from the columns of the table with get_countries_from_columns,
+    without writing the data to a file and parsing it back.
+    The columns read are named by column_names, in the order ISO code, name, year,
+    co2 emissions and population. Continents are added as add_continents_to_data does,
+    looking up every distinct ISO code once. Rows without a valid ISO code (such as the
+    aggregates of regions) or without a year are skipped.
+    If dict_by_iso_codes is given, the data is added to it instead of a new dictionary;
+    the result can be given to DatasetStore.replace.
+
+    >>> table = {"iso_code": ["RUS", "QAT", "", "QAT"],
+    ...          "country": ["Russia", "Qatar", "World", "Qatar"],
+    ...          "year": [1971, 2007, 2007, 1993],
+    ...          "co2": [1533.262, 62.899, 29000.0, float("nan")],
+    ...          "population": [130831000.0, 1218000.0, None, 501000.0]}
+    >>> d = get_countries_from_table(table, {"ASIA": ["RUS", "QAT"], "EUROPE": ["RUS"]})
+    >>> str(d["RUS"])
+    'Russia\\tASIA,EUROPE\\t{1971: 1533.262}\\t{1971: 130831000}'
+    >>> str(d["QAT"])
+    'Qatar\\tASIA\\t{2007: 62.899}\\t{2007: 1218000, 1993: 501000}'
+    >>> list(d)
+    ['RUS', 'QAT']
+    """
+    # read the columns of the table
+    iso_code_name, country_name, year_name, co2_name, population_name = column_names
+    all_iso_codes = get_table_column(table, iso_code_name)
+    all_names = get_table_column(table, country_name)
+    all_years = get_table_column(table, year_name)
+    all_co2_emissions = get_table_column(table, co2_name)
+    all_populations = get_table_column(table, population_name)
+
+    # validate every distinct ISO code once and join it with its continents
+    continents_by_iso_code = get_continents_by_iso_code(countries_per_continent)
+    continents_of_valid_codes = {}
+    for iso_code in set(all_iso_codes):
+        if isinstance(iso_code, str) and iso_is_valid(iso_code):
+            continents_of_valid_codes[iso_code] = continents_by_iso_code.get(iso_code, [])
+
+    # keep the rows of countries with a year, converting the numbers
+    iso_codes = []
+    names = []
+    continents = []
+    years = []
+    co2_emissions = []
+    populations = []
+    for index in range(len(all_iso_codes)):
+        iso_code = all_iso_codes[index]
+        if iso_code not in continents_of_valid_codes or all_years[index] is None:
+            continue
+        iso_codes.append(iso_code)
+        names.append(all_names[index])
+        continents.append(continents_of_valid_codes[iso_code])
+        years.append(int(all_years[index]))
+        if all_co2_emissions[index] is None:
+            co2_emissions.append(None)
+        else:
+            co2_emissions.append(float(all_co2_emissions[index]))
+        if all_populations[index] is None:
+            populations.append(None)
+        else:
+            populations.append(int(all_populations[index]))
+
+    # group the rows by country
+    return Country.get_countries_from_columns(iso_codes, names, continents, years,
+                                              co2_emissions, populations, dict_by_iso_codes)
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
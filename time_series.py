@@ -0,0 +1,247 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+from bisect import bisect_left, bisect_right
+
+
+# DEFINE CLASS
+class YearSeries:
+    """
+    Represents yearly data of a country, sorted by year.
+
+    Instance attributes: years (list), values (list), prefix_sums (list)
+    Instance methods: __len__, __iter__, __contains__, get, first_year, last_year,
+                      get_index_range, get_range, get_range_sum, get_cumulative_sum,
+                      get_gaps, get_dense
+    """
+
+    def __init__(self, data):
+        """ (YearSeries, dict) -> YearSeries
+        Creates an object of type YearSeries from a dictionary mapping years to numbers.
+
+        >>> s = YearSeries({2007: 62.899, 1993: 30.985, 1989: 14.292})
+        >>> s.years
+        [1989, 1993, 2007]
+        >>> s.values
+        [14.292, 30.985, 62.899]
+        >>> s.prefix_sums[-1]
+        108.176
+        """
+        # sort the data by year
+        self.years = sorted(data)
+        self.values = [data[year] for year in self.years]
+
+        # prefix_sums[i] is the sum of the first i values
+        self.prefix_sums = [0.0]
+        total = 0.0
+        for value in self.values:
+            total += value
+            self.prefix_sums.append(total)
+
+
+    def __len__(self):
+        """ (YearSeries) -> int
+
+        Returns the number of years recorded.
+
+        >>> len(YearSeries({2000: 1.0, 2001: 2.0}))
+        2
+        >>> len(YearSeries({}))
+        0
+        """
+        return len(self.years)
+
+
+    def __iter__(self):
+        """ (YearSeries) -> iterator
+
+        Iterates through the (year, value) pairs in increasing order of year.
+
+        >>> list(YearSeries({2001: 2.0, 2000: 1.0}))
+        [(2000, 1.0), (2001, 2.0)]
+        """
+        return iter(zip(self.years, self.values))
+
+
+    def __contains__(self, year):
+        """ (YearSeries, int) -> bool
+
+        Returns True if data is recorded for the year, False otherwise.
+
+        >>> s = YearSeries({2000: 1.0})
+        >>> 2000 in s
+        True
+        >>> 1999 in s
+        False
+        """
+        index = bisect_left(self.years, year)
+        return index < len(self.years) and self.years[index] == year
+
+
+    def get(self, year, default=0.0):
+        """ (YearSeries, int, object) -> float
+
+        Returns the value recorded for the year, or default if there is none.
+
+        >>> s = YearSeries({2000: 1.0, 2005: 3.5})
+        >>> s.get(2005)
+        3.5
+        >>> s.get(2003)
+        0.0
+        >>> print(s.get(2003, None))
+        None
+        """
+        index = bisect_left(self.years, year)
+        if index < len(self.years) and self.years[index] == year:
+            return self.values[index]
+        return default
+
+
+    def first_year(self):
+        """ (YearSeries) -> int
+
+        Returns the first year recorded, or None if there is no data.
+
+        >>> YearSeries({2005: 3.5, 2000: 1.0}).first_year()
+        2000
+        >>> print(YearSeries({}).first_year())
+        None
+        """
+        if self.years:
+            return self.years[0]
+        return None
+
+
+    def last_year(self):
+        """ (YearSeries) -> int
+
+        Returns the last year recorded, or None if there is no data.
+
+        >>> YearSeries({2005: 3.5, 2000: 1.0}).last_year()
+        2005
+        >>> print(YearSeries({}).last_year())
+        None
+        """
+        if self.years:
+            return self.years[-1]
+        return None
+
+
+    def get_index_range(self, min_year, max_year):
+        """ (YearSeries, int, int) -> tuple
+
+        Returns the start and end indexes (end excluded) of the years between
+        min_year and max_year included.
+
+        >>> s = YearSeries({2000: 1.0, 2002: 2.0, 2004: 3.0})
+        >>> s.get_index_range(2001, 2004)
+        (1, 3)
+        >>> s.get_index_range(1990, 1995)
+        (0, 0)
+        """
+        return bisect_left(self.years, min_year), bisect_right(self.years, max_year)
+
+
+    def get_range(self, min_year, max_year):
+        """ (YearSeries, int, int) -> list
+
+        Returns a list of the (year, value) pairs recorded between min_year
+        and max_year included, in increasing order of year.
+
+        >>> s = YearSeries({2000: 1.0, 2002: 2.0, 2004: 3.0})
+        >>> s.get_range(2001, 2004)
+        [(2002, 2.0), (2004, 3.0)]
+        >>> s.get_range(2010, 2020)
+        []
+        """
+        start, end = self.get_index_range(min_year, max_year)
+        return list(zip(self.years[start : end], self.values[start : end]))
+
+
+    def get_range_sum(self, min_year, max_year):
+        """ (YearSeries, int, int) -> float
+
+        Returns the sum of the values recorded between min_year and max_year included.
+
+        >>> s = YearSeries({2000: 1.0, 2002: 2.0, 2004: 3.0})
+        >>> s.get_range_sum(2001, 2004)
+        5.0
+        >>> s.get_range_sum(1990, 1995)
+        0.0
+        """
+        start, end = self.get_index_range(min_year, max_year)
+        if start == 0:
+            return self.prefix_sums[end]
+        return self.prefix_sums[end] - self.prefix_sums[start]
+
+
+    def get_cumulative_sum(self, year):
+        """ (YearSeries, int) -> float
+
+        Returns the sum of all the values recorded up to and including the year.
+
+        >>> s = YearSeries({2007: 62.899, 1993: 30.985, 1989: 14.292})
+        >>> s.get_cumulative_sum(2000)
+        45.277
+        >>> s.get_cumulative_sum(1900)
+        0.0
+        """
+        return self.prefix_sums[bisect_right(self.years, year)]
+
+
+    def get_gaps(self, min_year=None, max_year=None):
+        """ (YearSeries, int, int) -> list
+
+        Returns a list of the years between min_year and max_year included
+        for which no data is recorded. By default, the first and last years
+        recorded are used as bounds.
+
+        >>> s = YearSeries({2000: 1.0, 2002: 2.0, 2005: 3.0})
+        >>> s.get_gaps()
+        [2001, 2003, 2004]
+        >>> s.get_gaps(1998, 2002)
+        [1998, 1999, 2001]
+        >>> YearSeries({}).get_gaps()
+        []
+        """
+        # determine the bounds
+        if min_year is None:
+            min_year = self.first_year()
+        if max_year is None:
+            max_year = self.last_year()
+        if min_year is None or max_year is None:
+            return []
+
+        # walk the recorded years and the range together
+        gaps = []
+        start, end = self.get_index_range(min_year, max_year)
+        expected_year = min_year
+        for year in self.years[start : end]:
+            gaps.extend(range(expected_year, year))
+            expected_year = year + 1
+        gaps.extend(range(expected_year, max_year + 1))
+        return gaps
+
+
+    def get_dense(self, min_year, max_year, fill=0.0):
+        """ (YearSeries, int, int, object) -> list
+
+        Returns a list with one value for every year from min_year to max_year
+        included, using fill for the years with no data.
+
+        >>> s = YearSeries({2000: 1.0, 2002: 2.0})
+        >>> s.get_dense(1999, 2003)
+        [0.0, 1.0, 0.0, 2.0, 0.0]
+        >>> s.get_dense(2000, 2001, None)
+        [1.0, None]
+        """
+        dense = [fill] * (max_year - min_year + 1)
+        for year, value in self.get_range(min_year, max_year):
+            dense[year - min_year] = value
+        return dense
+
+
+# TEST MODULE
+if __name__ == "__main__":
+    doctest.testmod()
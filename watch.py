@@ -0,0 +1,396 @@
+# Annie Kuo
+
+# IMPORT MODULES
+import doctest
+import os
+import sys
+import time
+import argparse
+from pipeline_cache import *
+from dataset import *
+
+
+# DEFINE CONSTANTS
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_DEBOUNCE_DELAY = 2.0
+
+
+# DEFINE CLASS
+class DirectoryWatcher:
+    """
+    Represents the state of the raw data files of a directory (and of the file of
+    continents), used to find the files that changed since the last poll.
+    A file is considered changed when its content changes: its hash is only
+    computed again when its size or modification time changes.
+    The standard library has no portable way of being notified of changes,
+    so the directory is polled.
+
+    Instance attributes: directory (str), continents_filename (str), states (dict)
+    Instance methods: get_filenames, poll, get_changed
+    """
+
+    def __init__(self, directory, continents_filename):
+        """ (DirectoryWatcher, str, str) -> DirectoryWatcher
+        Creates a watcher of the directory that has not seen any file yet.
+
+        >>> w = DirectoryWatcher("watch_test1", "continents.tsv")
+        >>> w.states
+        {}
+        """
+        self.directory = directory
+        self.continents_filename = continents_filename
+        self.states = {}
+
+
+    def get_filenames(self):
+        """ (DirectoryWatcher) -> list
+
+        Returns the sorted list of the names of the raw data files of the directory,
+        skipping hidden and temporary files.
+
+        >>> os.makedirs("watch_test2", exist_ok=True)
+        >>> for name in ["b.txt", "a.txt.gz", ".hidden", "c.txt.tmp"]:
+        ...     open(os.path.join("watch_test2", name), "w").close()
+        >>> [os.path.basename(filename) for filename in DirectoryWatcher("watch_test2", "x.tsv").get_filenames()]
+        ['a.txt.gz', 'b.txt']
+        """
+        filenames = []
+        for name in os.listdir(self.directory):
+            filename = os.path.join(self.directory, name)
+            if name.startswith(".") or name.endswith(".tmp") or not os.path.isfile(filename):
+                continue
+            filenames.append(filename)
+        filenames.sort()
+        return filenames
+
+
+    def poll(self):
+        """ (DirectoryWatcher) -> list
+
+        Returns the list of the raw data files that are new, whose content changed
+        or that were removed since the last poll. If the file of continents changed,
+        every raw data file is returned, since the continents of all of them must be
+        added again. A file removed while polling (or a missing file of continents)
+        is not an error: it is simply seen as removed (or unchanged).
+
+        >>> os.makedirs("watch_test3", exist_ok=True)
+        >>> fobj = open(os.path.join("watch_test3", "a.txt"), "w", encoding= "UTF-8")
+        >>> fobj.write("QAT,Qatar,2001,41,215,615000")
+        28
+        >>> fobj.close()
+        >>> fobj = open("watch_continents3.tsv", "w", encoding= "UTF-8")
+        >>> fobj.write("QAT\\tAsia")
+        8
+        >>> fobj.close()
+        >>> w = DirectoryWatcher("watch_test3", "watch_continents3.tsv")
+        >>> [os.path.basename(filename) for filename in w.poll()]
+        ['a.txt']
+        >>> w.poll()
+        []
+        >>> os.utime(os.path.join("watch_test3", "a.txt"), (0, 0))
+        >>> w.poll()
+        []
+        >>> os.remove(os.path.join("watch_test3", "a.txt"))
+        >>> [os.path.basename(filename) for filename in w.poll()]
+        ['a.txt']
+        >>> os.remove("watch_continents3.tsv")
+        >>> w.poll()
+        []
+        """
+        # initialize variables
+        changed = []
+        filenames = []
+        try:
+            continents_changed = self.get_changed(self.continents_filename)
+        except OSError:
+            continents_changed = False
+
+        # compare every file with its last known state
+        for filename in self.get_filenames():
+            try:
+                file_changed = self.get_changed(filename)
+            # in case the file was removed after listing the directory
+            except OSError:
+                continue
+            filenames.append(filename)
+            if file_changed or continents_changed:
+                changed.append(filename)
+
+        # forget the files that were removed, which changes the dataset too
+        for filename in list(self.states):
+            if filename not in filenames and filename != self.continents_filename:
+                del self.states[filename]
+                changed.append(filename)
+
+        return changed
+
+
+    def get_changed(self, filename):
+        """ (DirectoryWatcher, str) -> bool
+
+        Updates the known state (size, modification time, hash) of a file and
+        returns True if its content is new or changed, False otherwise.
+
+        >>> fobj = open("watch_test4.txt", "w", encoding= "UTF-8")
+        >>> fobj.write("abc")
+        3
+        >>> fobj.close()
+        >>> w = DirectoryWatcher(".", "x.tsv")
+        >>> w.get_changed("watch_test4.txt"), w.get_changed("watch_test4.txt")
+        (True, False)
+        """
+        status = os.stat(filename)
+        size_and_time = (status.st_size, status.st_mtime_ns)
+        state = self.states.get(filename)
+
+        # in case the size and modification time are the same
+        if state is not None and state[0] == size_and_time:
+            return False
+
+        # compare the hash of the content
+        digest = hash_file(filename)
+        self.states[filename] = (size_and_time, digest)
+        return state is None or state[1] != digest
+
+
+# DEFINE FUNCTIONS
+def ingest_file(cache, filename, continents_filename, output_directory):
+    """ (ArtifactCache, str, str, str) -> list
+
+    The function cleans a raw data file with clean_with_quarantine, adds the
+    continents with the add_continents_to_data stage (skipped if its inputs did not
+    change, see run_stage) and returns the list of valid lines of data with continents,
+    each one ending the line. The files of the raw file are written to output_directory.
+    Lines that cannot be cleaned, and clean lines that are not valid (see validate_lines),
+    are skipped and written to its quarantine file instead of stopping the ingestion;
+    the clean lines are numbered as in the file with continents.
+
+    >>> os.makedirs("watch_test7", exist_ok=True)
+    >>> fobj = open(os.path.join("watch_test7", "a.txt"), "w", encoding= "UTF-8")
+    >>> fobj.write("QAT,Qatar,2001,41,215,615000\\nQAT,Qatar\\nQAT,Qatar,2001,41\\nQ4T,Qatar,2002,46,0,650000")
+    83
+    >>> fobj.close()
+    >>> fobj = open("watch_continents7.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tAsia")
+    8
+    >>> fobj.close()
+    >>> ingest_file(ArtifactCache("watch_cache7"), os.path.join("watch_test7", "a.txt"),
+    ...             "watch_continents7.tsv", "watch_out7")
+    ['QAT\\tQatar\\tASIA\\t2001\\t41.215\\t615000\\n']
+    >>> for line in open(os.path.join("watch_out7", "a.txt.quarantine.tsv")):
+    ...     print(line.split("\\t")[ : 3])
+    ['2', 'wrong number of columns', 'QAT,Qatar\\n']
+    ['3', 'wrong number of columns', 'QAT,Qatar,2001,41\\n']
+    ['2', 'invalid iso code', 'Q4T']
+    """
+    # initialize variables
+    os.makedirs(output_directory, exist_ok=True)
+    name = os.path.basename(filename)
+    clean_filename = os.path.join(output_directory, name + ".clean.tsv")
+    quarantine_filename = os.path.join(output_directory, name + ".quarantine.tsv")
+    output_filename = os.path.join(output_directory, name + ".tsv")
+
+    # clean the file, quarantining the lines that cannot be cleaned, then add the continents
+    clean_with_quarantine(filename, clean_filename, quarantine_filename)
+    run_stage(cache, "add_continents_to_data", [clean_filename, continents_filename], output_filename)
+
+    # read the lines, making sure each one ends the line
+    lines = []
+    fobj= open_data_file(output_filename)
+    for line in fobj:
+        if not line.endswith("\n"):
+            line += "\n"
+        lines.append(line)
+    fobj.close()
+
+    # quarantine the lines that are not valid too
+    errors = validate_lines(lines)
+    if not errors:
+        return lines
+    invalid_indexes = set()
+    fobj= open(quarantine_filename, "a", encoding= "UTF-8")
+    for line_number, column, value, reason in errors:
+        if line_number - 1 not in invalid_indexes:
+            invalid_indexes.add(line_number - 1)
+            fobj.write(str(line_number) + "\t" + reason + "\t" + lines[line_number - 1].rstrip("\n") + "\n")
+    fobj.close()
+    return [lines[index] for index in range(len(lines)) if index not in invalid_indexes]
+
+
+def ingest_files(cache, filenames, continents_filename, output_directory, store,
+                 lines_by_filename=None, changed_filenames=None):
+    """ (ArtifactCache, list, str, str, DatasetStore, dict, set) -> Dataset
+
+    The function ingests (see ingest_file) the raw data files of the list that are in
+    changed_filenames (all of them by default) or not yet in lines_by_filename, a dictionary
+    mapping raw data files to their valid lines which is updated. The lines of the other
+    files are reused as they are, and the files no longer in the list are forgotten.
+    The new version of the dataset of the store is then rebuilt from the lines of all the
+    files and returned, so that corrected continents and rows removed from a raw file are
+    not kept from older versions. When the same country and year are in several files,
+    the last file wins.
+
+    >>> os.makedirs("watch_test5", exist_ok=True)
+    >>> for name in ["a.txt", "b.txt"]:
+    ...     fobj = open(os.path.join("watch_test5", name), "w", encoding= "UTF-8")
+    ...     size = fobj.write("QAT,Qatar,2001,41,215,615000")
+    ...     fobj.close()
+    >>> fobj = open("watch_continents5.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tAsia")
+    8
+    >>> fobj.close()
+    >>> s = DatasetStore()
+    >>> c = ArtifactCache("watch_cache5")
+    >>> files = [os.path.join("watch_test5", "a.txt"), os.path.join("watch_test5", "b.txt")]
+    >>> lines_by_filename = {}
+    >>> d = ingest_files(c, files[:1], "watch_continents5.tsv", "watch_out5", s, lines_by_filename)
+    >>> d.version, d.dict_by_iso_codes["QAT"].co2_emissions
+    (1, {2001: 41.215})
+    >>> fobj = open(files[0], "w", encoding= "UTF-8")
+    >>> fobj.write("QAT,Qatar,2002,46,0,650000")
+    26
+    >>> fobj.close()
+    >>> fobj = open("watch_continents5.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tEurope")
+    10
+    >>> fobj.close()
+    >>> d = ingest_files(c, files[:1], "watch_continents5.tsv", "watch_out5", s, lines_by_filename)
+    >>> d.dict_by_iso_codes["QAT"].co2_emissions, d.dict_by_iso_codes["QAT"].continents
+    ({2002: 46.0}, ['EUROPE'])
+    >>> d = ingest_files(c, files, "watch_continents5.tsv", "watch_out5", s, lines_by_filename, set())
+    >>> d.dict_by_iso_codes["QAT"].co2_emissions
+    {2002: 46.0, 2001: 41.215}
+    >>> sorted(os.path.basename(filename) for filename in lines_by_filename)
+    ['a.txt', 'b.txt']
+    """
+    # initialize variables
+    if lines_by_filename is None:
+        lines_by_filename = {}
+    if changed_filenames is None:
+        changed_filenames = set(filenames)
+
+    # forget the files that were removed
+    for filename in list(lines_by_filename):
+        if filename not in filenames:
+            del lines_by_filename[filename]
+
+    # ingest the files that changed only
+    for filename in filenames:
+        if filename in changed_filenames or filename not in lines_by_filename:
+            lines_by_filename[filename] = ingest_file(cache, filename, continents_filename,
+                                                      output_directory)
+
+    # rebuild the whole dataset from the lines of all the files
+    lines = []
+    for filename in filenames:
+        lines.extend(lines_by_filename[filename])
+    columns = get_columns_from_lines(lines, set())
+    return store.replace(Country.get_countries_from_columns(*columns))
+
+
+def watch(directory, continents_filename, output_directory, store, cache,
+          poll_interval=DEFAULT_POLL_INTERVAL, debounce_delay=DEFAULT_DEBOUNCE_DELAY, max_polls=None):
+    """ (str, str, str, DatasetStore, ArtifactCache, float, float, int) -> generator
+
+    The function polls the directory every poll_interval seconds and, whenever raw
+    data files changed, ingests the changed files and merges them with the lines kept
+    from the other files (see ingest_files) into the store. Changes are debounced: files
+    are only ingested once no other file changed for debounce_delay seconds, so that a
+    burst of changes creates a single new version of the dataset. Bad lines are
+    quarantined (see ingest_file); if the ingestion fails anyway (e.g. a file is missing),
+    the error is printed, the changes stay pending and it is tried again after
+    debounce_delay seconds.
+    It yields every version created, and stops after max_polls polls (never by default).
+
+    >>> os.makedirs("watch_test6", exist_ok=True)
+    >>> for name in ["a.txt", "b.txt"]:
+    ...     fobj = open(os.path.join("watch_test6", name), "w", encoding= "UTF-8")
+    ...     size = fobj.write("QAT,Qatar,2001,41,215,615000")
+    ...     fobj.close()
+    >>> fobj = open("watch_continents6.tsv", "w", encoding= "UTF-8")
+    >>> fobj.write("QAT\\tAsia")
+    8
+    >>> fobj.close()
+    >>> s = DatasetStore()
+    >>> [d.version for d in watch("watch_test6", "watch_continents6.tsv", "watch_out6", s,
+    ...                           ArtifactCache("watch_cache6"), 0, 0, 2)]
+    [1]
+    >>> [d.version for d in watch("watch_test6", "watch_continents6.tsv", "watch_out6", s,
+    ...                           ArtifactCache("watch_cache6"), 0, 10, 2)]
+    []
+    >>> [d.version for d in watch("watch_test6", "missing_continents6.tsv", "watch_out6", s,
+    ...                           ArtifactCache("watch_cache6"), 0, 0, 3)]
+    []
+    >>> fobj = open(os.path.join("watch_test6", "c.txt"), "w", encoding= "UTF-8")
+    >>> fobj.write("QAT,Qatar\\nQAT,Qatar,2001,41")
+    27
+    >>> fobj.close()
+    >>> [d.version for d in watch("watch_test6", "watch_continents6.tsv", "watch_out6", s,
+    ...                           ArtifactCache("watch_cache6"), 0, 0, 2)]
+    [2]
+    """
+    # initialize variables
+    watcher = DirectoryWatcher(directory, continents_filename)
+    lines_by_filename = {}
+    pending = set()
+    last_change = None
+    num_of_polls = 0
+
+    while max_polls is None or num_of_polls < max_polls:
+        # remember the files that changed and when
+        changed = watcher.poll()
+        num_of_polls += 1
+        now = time.monotonic()
+        if changed:
+            pending.update(changed)
+            last_change = now
+
+        # ingest all the files once the changes have settled
+        elif pending and now - last_change >= debounce_delay:
+            try:
+                dataset = ingest_files(cache, watcher.get_filenames(), continents_filename,
+                                       output_directory, store, lines_by_filename, pending)
+            # in case it fails, keep the changes pending and try again later
+            except Exception as error:
+                print("ingestion failed:", repr(error), file=sys.stderr)
+                last_change = now
+            else:
+                pending = set()
+                yield dataset
+
+        time.sleep(poll_interval)
+
+
+def main(arguments=None):
+    """ (list) -> NoneType
+
+    The function reads the command line arguments (or the given list of
+    arguments) and watches a directory of raw data files until it is interrupted,
+    printing every new version of the dataset.
+    """
+    # read the command line arguments
+    parser = argparse.ArgumentParser(description="Ingest the raw data files of a directory "
+                                     "whenever they change.")
+    parser.add_argument("directory", help="directory of the raw data files")
+    parser.add_argument("continents_filename", help="file mapping ISO codes to continents")
+    parser.add_argument("output_directory", help="directory of the cleaned files")
+    parser.add_argument("--cache", default=".pipeline_cache", help="directory of the stage cache")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL, help="seconds between polls")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE_DELAY,
+                        help="seconds without changes before ingesting")
+    args = parser.parse_args(arguments)
+
+    # watch the directory and print every new version of the dataset
+    store = DatasetStore()
+    cache = ArtifactCache(args.cache)
+    try:
+        for dataset in watch(args.directory, args.continents_filename, args.output_directory,
+                             store, cache, args.interval, args.debounce):
+            print("version", dataset.version, "with", dataset.info.num_of_countries, "countries")
+    except KeyboardInterrupt:
+        pass
+
+
+# RUN PROGRAM
+if __name__ == "__main__":
+    main()